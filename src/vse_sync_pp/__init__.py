@@ -0,0 +1,5 @@
+### SPDX-License-Identifier: GPL-2.0-or-later
+
+"""Synchronization post-processing"""
+
+__version__ = '0.1.0'
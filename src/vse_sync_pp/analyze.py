@@ -3,25 +3,232 @@
 """Analyze log messages from a single source."""
 
 from argparse import ArgumentParser
+import os
 import sys
 
-from .common import (
-    open_input,
-    print_loj,
-)
+from .common import print_loj
 
+from .cache import (
+    MAX_BYTES,
+    Cache,
+    digest_file,
+)
+from .index import (
+    add_range_arguments,
+    in_range,
+    open_range,
+)
 from .parsers import PARSERS
+from .profiling import (
+    Profiler,
+    iterate,
+    profiling,
+    stage,
+)
+from .shm import handoff_blocks
 from .analyzers import (
     ANALYZERS,
     Config,
 )
 
+# default number of parsed items held in shared memory when handing off
+HANDOFF = 64 * 1024
+
+
+def analyze(analyzer, fid, canonical=False):
+    """Return a dict of the test result and data analysis of `analyzer`.
+
+    `analyzer` collects data parsed from file object `fid`. If `canonical` is
+    truthy, then `fid` contains canonical data.
+    """
+    return analyze_profiles((analyzer,), fid, canonical)[0]
+
+
+def analyze_profiles(analyzers, fid, canonical=False, start=None, end=None):
+    """Return a list of dicts of the test result and data analysis of `analyzers`.
+
+    Each analyzer in `analyzers` collects data parsed once from file object
+    `fid`. If `canonical` is truthy, then `fid` contains canonical data. Only
+    data with timestamps from `start` to `end` is collected: if either is None
+    then the range is unbounded at that side.
+    Analyzers of the same class and collection key collect data once and share
+    the data collected, and analyzers of the same class share values computed
+    from collected data, so that analyzers differing only in configuration
+    hold and compute them once. Dicts are in `analyzers` order.
+
+    Raise :class:`ValueError` if `analyzers` do not all use the same parser.
+    """
+    names = {analyzer.parser for analyzer in analyzers}
+    if len(names) != 1:
+        raise ValueError(f'analyzers must use one parser, not {sorted(names)}')
+    parser = PARSERS[names.pop()]()
+    method = parser.canonical if canonical else parser.parse
+    collectors = _collectors(analyzers)
+    for parsed in iterate('parse', in_range(method(iterate('read', fid)), start, end)):
+        with stage('collect', 1):
+            for analyzer in collectors:
+                analyzer.collect(parsed)
+    return _results(analyzers)
+
+
+def _collectors(analyzers):
+    """Return a list of the analyzers in `analyzers` which must collect data.
+
+    An analyzer with the same class and collection key as an earlier analyzer
+    does not collect: the earlier analyzer shares the data it collected.
+    """
+    first = {}
+    collectors = []
+    for analyzer in analyzers:
+        key = analyzer.collection_key()
+        if key is None or first.setdefault((type(analyzer), key), analyzer) is analyzer:
+            collectors.append(analyzer)
+    return collectors
+
+
+def _results(analyzers):
+    """Return a list of dicts of the test result and data analysis of `analyzers`.
+
+    Analyzers which did not collect data share the data collected by the
+    analyzer of the same class and collection key which did: see
+    :func:`_collectors`. Analyzers of the same class share values computed
+    from collected data.
+    """
+    first = {}
+    for analyzer in analyzers:
+        key = analyzer.collection_key()
+        if key is not None:
+            collector = first.setdefault((type(analyzer), key), analyzer)
+            if collector is not analyzer:
+                collector.share_data(analyzer)
+    first = {}
+    for analyzer in analyzers:
+        first.setdefault(type(analyzer), analyzer).share(analyzer)
+    return [{
+        'result': analyzer.result,
+        'timestamp': analyzer.timestamp,
+        'duration': analyzer.duration,
+        'reason': analyzer.reason,
+        'analysis': analyzer.analysis,
+    } for analyzer in analyzers]
+
+
+def _parsed(filename, id_, canonical=False, encoding='utf-8'):
+    """Generator yielding (id_, data) parsed from file `filename` by parser `id_`"""
+    parser = PARSERS[id_]()
+    with open(filename, encoding=encoding) as fid:
+        for parsed in (parser.canonical if canonical else parser.parse)(fid):
+            yield (id_, parsed)
+
+
+def analyze_handoff(analyzers, filename, canonical=False, maxsize=HANDOFF):
+    """Return a list of dicts of the test result and data analysis of `analyzers`.
+
+    As :func:`analyze_profiles`, for input from file `filename` parsed in a
+    background process, holding up to about `maxsize` parsed items. Parsed
+    data is handed off in shared memory: see
+    :func:`vse_sync_pp.shm.handoff_blocks`. Analyzers which can collect data
+    from the typed columns of a block (time error analyzers) map them without
+    copying; other analyzers collect rows copied out of each block.
+
+    Raise :class:`ValueError` if `analyzers` do not all use the same parser.
+    """
+    names = {analyzer.parser for analyzer in analyzers}
+    if len(names) != 1:
+        raise ValueError(f'analyzers must use one parser, not {sorted(names)}')
+    id_ = names.pop()
+    collectors = _collectors(analyzers)
+    for block in iterate('parse', handoff_blocks(_parsed, (filename, id_, canonical), maxsize)):
+        with stage('collect', len(block)):
+            rows = None
+            for analyzer in collectors:
+                if hasattr(analyzer, 'collect_block'):
+                    analyzer.collect_block(block, id_)
+                else:
+                    if rows is None:
+                        rows = block.rows(id_)
+                    analyzer.collect(*rows)
+    return _results(analyzers)
+
+
+def analyze_cached(cache, filename, analyzers, configs, canonical=False, curves=False):
+    """Return a list of dicts of the test result and data analysis of `analyzers`.
+
+    As :func:`analyze_profiles`, for input from file `filename`, using `cache`,
+    a :class:`Cache`. `configs` is a sequence of strings, the content of the
+    configuration of each analyzer in `analyzers`. Results are looked up by
+    digest of input content, analyzer id, configuration content and
+    `canonical`: only analyzers without a cached result analyze the input.
+
+    Every analyzer restores values computed by an earlier analysis of the same
+    input by the same analyzer id (for example, with a different configuration).
+    If `curves` is truthy, then results are only used if the curve of each
+    analyzer is among the values restored, so that every analyzer can plot its
+    curve after return; otherwise the input is analyzed again.
+    """
+    with stage('digest'):
+        digest = digest_file(filename)
+    computed = {}
+    with stage('cache'):
+        for analyzer in analyzers:
+            if analyzer.id_ not in computed:
+                key = cache.key('computed', digest, analyzer.id_, canonical)
+                computed[analyzer.id_] = (key, cache.get(key))
+            try:
+                analyzer.restore(computed[analyzer.id_][1] or [])
+            # an unusable entry is replaced once the input is analyzed again
+            except (ValueError, TypeError):
+                computed[analyzer.id_] = (computed[analyzer.id_][0], None)
+        keys = [
+            cache.key('result', digest, analyzer.id_, config, canonical)
+            for (analyzer, config) in zip(analyzers, configs)
+        ]
+        dcts = [cache.get(key) for key in keys]
+    missing = [
+        idx for (idx, dct) in enumerate(dcts)
+        if dct is None or (curves and not analyzers[idx].has_curve())
+    ]
+    if not missing:
+        return dcts
+    with open(filename, encoding='utf-8') as fid:
+        analyzed = analyze_profiles([analyzers[idx] for idx in missing], fid, canonical)
+    updated = {}
+    with stage('cache'):
+        for (idx, dct) in zip(missing, analyzed):
+            cache.put(keys[idx], dct)
+            dcts[idx] = dct
+            updated.setdefault(analyzers[idx].id_, analyzers[idx])
+        for (id_, analyzer) in updated.items():
+            cache.put(computed[id_][0], analyzer.computed())
+    return dcts
+
+
+def plot_curves(analyzers, labels, filename):
+    """Plot the curve of `analyzers` against the mask of each to `filename`.
+
+    Analyzers in `analyzers` have the same class and collect the same data, so
+    the curve is plotted once; `labels` contains a label for each mask.
+    """
+    # matplotlib is slow to import: only import it to plot
+    from .plot import MaskPlotter # pylint: disable=import-outside-toplevel
+    plotter = MaskPlotter(f'{analyzers[0].metric} (ns)')
+    plotter.set_curve(*zip(*analyzers[0].toplot()))
+    for (analyzer, label) in zip(analyzers, labels):
+        plotter.add_mask(label, analyzer.mask)
+    return plotter.plot(filename)
+
 
 def main():
     """Analyze log messages from a single source.
 
     Analyze data parsed from the log messages in input. Print the test result
-    and data analysis as JSON.
+    and data analysis as JSON, for each config if more than one is specified.
+    If profiling, then each JSON object also contains the wall time, CPU time,
+    item count and, if tracing memory, peak memory of each stage of the whole
+    run. If a time range is specified, then only data within the range is
+    analyzed and results are not cached. With --shared-memory, uncached input
+    is parsed in a background process and handed off to analyzers in shared
+    memory.
     """
     aparser = ArgumentParser(description=main.__doc__)
     aparser.add_argument(
@@ -29,9 +236,47 @@ def main():
         help="input contains canonical data",
     )
     aparser.add_argument(
-        '--config',
-        help="YAML file specifying test requirements and parameters",
+        '--config', action='append',
+        help="YAML file specifying test requirements and parameters;"
+             " if given more than once, then test and analyze for each",
+    )
+    aparser.add_argument(
+        '--cache', default=os.environ.get('VSE_SYNC_PP_CACHE'),
+        help="directory caching results by input and config content"
+             " (default: $VSE_SYNC_PP_CACHE, if set)",
+    )
+    aparser.add_argument(
+        '--cache-size', type=int, default=MAX_BYTES,
+        help=f"maximum total size of cached results in bytes (default: {MAX_BYTES})",
+    )
+    aparser.add_argument(
+        '--no-cache', action='store_true',
+        help="neither look up nor store cached results",
+    )
+    aparser.add_argument(
+        '--plot', metavar='IMAGE',
+        help="plot TDEV or MTIE against the mask of each config to image file IMAGE",
+    )
+    aparser.add_argument(
+        '--shared-memory', action='store_true',
+        help="parse input in a background process, handing off parsed data in shared memory;"
+             " time error analyzers collect data from typed columns without copying",
+    )
+    aparser.add_argument(
+        '--profile', action='store_true', default=bool(os.environ.get('VSE_SYNC_PP_PROFILE')),
+        help="record time and item counts of each stage of analysis"
+             " (default: if $VSE_SYNC_PP_PROFILE is set and not empty)",
+    )
+    aparser.add_argument(
+        '--profile-memory', action='store_true',
+        help="also record peak memory of each stage of analysis, which slows analysis;"
+             " implies --profile",
+    )
+    aparser.add_argument(
+        '--no-profile', action='store_true',
+        help="do not profile, even if $VSE_SYNC_PP_PROFILE is set",
     )
+    add_range_arguments(aparser)
     aparser.add_argument(
         'input',
         help="input file, or '-' to read from stdin",
@@ -41,23 +286,48 @@ def main():
         help="analyzer to run over input",
     )
     args = aparser.parse_args()
-    config = Config.from_yaml(args.config) if args.config else Config()
-    analyzer = ANALYZERS[args.analyzer](config)
-    parser = PARSERS[analyzer.parser]()
-    with open_input(args.input) as fid:
-        method = parser.canonical if args.canonical else parser.parse
-        for parsed in method(fid):
-            analyzer.collect(parsed)
-    dct = {
-        'result': analyzer.result,
-        'timestamp': analyzer.timestamp,
-        'duration': analyzer.duration,
-        'reason': analyzer.reason,
-        'analysis': analyzer.analysis,
-    }
-    # Python exits with error code 1 on EPIPE
-    if not print_loj(dct):
-        sys.exit(1)
+    if args.plot and not hasattr(ANALYZERS[args.analyzer], 'mask'):
+        aparser.error(f'cannot plot masks for analyzer {args.analyzer}')
+    if args.config is None:
+        configs = {None: Config()}
+    else:
+        configs = {filename: Config.from_yaml(filename) for filename in args.config}
+    analyzers = [ANALYZERS[args.analyzer](config) for config in configs.values()]
+    profiler = None
+    if (args.profile or args.profile_memory) and not args.no_profile:
+        profiler = Profiler(args.profile_memory)
+    with profiling(profiler):
+        # input from stdin cannot be digested then read; results for a time
+        # range are not cached
+        ranged = args.start is not None or args.end is not None
+        if args.cache and not args.no_cache and args.input != '-' and not ranged:
+            contents = []
+            for filename in configs:
+                if filename is None:
+                    contents.append(None)
+                else:
+                    with open(filename, encoding='utf-8') as fid:
+                        contents.append(fid.read())
+            cache = Cache(args.cache, args.cache_size)
+            dcts = analyze_cached(cache, args.input, analyzers, contents, args.canonical, bool(args.plot))
+        elif args.shared_memory and args.input != '-' and not ranged:
+            dcts = analyze_handoff(analyzers, args.input, args.canonical)
+        else:
+            parser = PARSERS[analyzers[0].parser]()
+            kind = 'canonical' if args.canonical else 'logged'
+            with open_range(args.input, kind, parser, args.start, args.index) as fid:
+                dcts = analyze_profiles(analyzers, fid, args.canonical, args.start, args.end)
+    for (filename, dct) in zip(configs, dcts):
+        # identify the config when testing against more than one
+        if 1 < len(configs):
+            dct = {'config': filename, **dct}
+        if profiler is not None:
+            dct = {**dct, 'profile': profiler.report()}
+        # Python exits with error code 1 on EPIPE
+        if not print_loj(dct):
+            sys.exit(1)
+    if args.plot:
+        plot_curves(analyzers, [os.path.basename(filename) for filename in configs], args.plot)
 
 
 if __name__ == '__main__':
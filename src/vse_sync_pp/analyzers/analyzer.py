@@ -3,15 +3,29 @@
 """Common analyzer functionality"""
 
 import yaml
-from pandas import DataFrame
+from collections import namedtuple
 from datetime import (datetime, timezone)
 
-import allantools
 import numpy as np
 
-from scipy import signal as scipy_signal
+# pandas, scipy and allantools are imported where used: they are slow to import
+# and are not needed by every analyzer
 
-from ..requirements import REQUIREMENTS
+from ..profiling import stage
+from ..requirements import (
+    REQUIREMENTS,
+    compiled,
+)
+from ..shm import as_float
+from ..stats import (
+    Histogram,
+    Summary,
+    Windows,
+    as_array,
+)
+
+# marks a configuration parameter without a default value
+_REQUIRED = object()
 
 
 class Config():
@@ -20,6 +34,9 @@ class Config():
         self._filename = filename
         self._requirements = requirements
         self._parameters = parameters
+        # requirements are compiled, and so validated, when the config is
+        # built; unknown requirements are reported when looked up
+        self._compiled = compiled(requirements) if requirements in REQUIREMENTS else None
 
     def _reason(self, reason):
         """Return `reason`, extended if this config is from a file."""
@@ -30,33 +47,57 @@ class Config():
     def requirement(self, key):
         """Return the value at `key` in this configuration's requirements.
 
-        Raise :class:`KeyError` if a value cannot be returned.
+        Requirements which are functions of tau by range are returned as
+        :class:`vse_sync_pp.requirements.Mask` values, compiled once and shared
+        by every config. Raise :class:`KeyError` if a value cannot be returned.
         """
-        try:
-            return REQUIREMENTS[self._requirements][key]
-        except KeyError as exc:
-            if self._requirements is None:
-                reason = 'no requirements specified'
-            elif self._requirements not in REQUIREMENTS:
-                reason = f'unknown requirements {self._requirements}'
-            else:
-                reason = f'unknown requirement {key} in {self._requirements}'
-            raise KeyError(self._reason(reason)) from exc
+        if self._compiled is not None and key in self._compiled:
+            return self._compiled[key]
+        if self._requirements is None:
+            reason = 'no requirements specified'
+        elif self._compiled is None:
+            reason = f'unknown requirements {self._requirements}'
+        else:
+            reason = f'unknown requirement {key} in {self._requirements}'
+        raise KeyError(self._reason(reason))
 
-    def parameter(self, key):
+    def parameter(self, key, default=_REQUIRED):
         """Return the value at `key` in this configuration's parameters.
 
-        Raise :class:`KeyError` if a value cannot be returned.
+        If `default` is supplied then return `default` if there is no value at
+        `key`. Otherwise raise :class:`KeyError` if a value cannot be returned.
         """
         try:
             return self._parameters[key]
         except TypeError as exc:
+            if default is not _REQUIRED:
+                return default
             reason = 'no parameters specified'
             raise KeyError(self._reason(reason)) from exc
         except KeyError as exc:
+            if default is not _REQUIRED:
+                return default
             reason = f'unknown parameter {key}'
             raise KeyError(self._reason(reason)) from exc
 
+    def positive_parameter(self, key, default=_REQUIRED):
+        """Return the positive number at `key` in this configuration's parameters.
+
+        As :meth:`parameter`, which may return `default`. Otherwise raise
+        :class:`ValueError` if the value is not a positive number.
+        """
+        value = self.parameter(key, default)
+        if default is not _REQUIRED and value is default:
+            return value
+        try:
+            positive = 0 < value
+        except TypeError:
+            positive = False
+        if not positive:
+            reason = f'parameter {key} must be positive, not {value!r}'
+            raise ValueError(self._reason(reason))
+        return value
+
     @classmethod
     def from_yaml(cls, filename, encoding='utf-8'):
         """Build configuration from YAML file at `filename`"""
@@ -71,10 +112,22 @@ class CollectionIsClosed(Exception):
 
 
 class Analyzer():
-    """A base class providing common analyzer functionality"""
+    """A base class providing common analyzer functionality.
+
+    Data collected by an analyzer may be summarized as a partial state, which
+    can be merged into another analyzer of the same class and configuration.
+    Derived classes with compact partial states override :meth:`_partial`,
+    :meth:`_combine` and :meth:`_reduce`, and may set class attribute
+    `fold_rows` to bound the number of collected rows held in memory.
+    """
+    # if not None, fold collected rows into partial state once this many rows
+    # have been collected
+    fold_rows = None
+
     def __init__(self, config):
         self._config = config
         self._rows = []
+        self._state = None
         self._data = None
         self._result = None
         self._reason = None
@@ -87,6 +140,53 @@ class Analyzer():
         if self._rows is None:
             raise CollectionIsClosed()
         self._rows += rows
+        if self.fold_rows is not None and self.fold_rows <= len(self._rows):
+            self._state = self.partial()
+            self._rows = []
+
+    def _partial(self, rows):
+        """Return the partial state of collected data `rows`.
+
+        The default partial state is a tuple of `rows`.
+        """
+        return tuple(rows)
+
+    def _combine(self, first, second):
+        """Return the partial state combining partial states `first`, `second`.
+
+        The data summarized in `second` must follow that in `first`.
+        """
+        return first + second
+
+    def _reduce(self, partial):
+        """Return data to test and explain from partial state `partial`.
+
+        The default data is a :class:`DataFrame` of rows prepared by
+        :meth:`prepare` from the rows in `partial`.
+        """
+        from pandas import DataFrame # pylint: disable=import-outside-toplevel
+        (columns, records) = self.prepare(list(partial))
+        return DataFrame.from_records(records, columns=columns)
+
+    def partial(self):
+        """Return the partial state of data collected by this analyzer.
+
+        The partial state can be pickled and merged into another analyzer of
+        the same class and configuration by :meth:`merge`. Merging the partial
+        states of analyzers of consecutive shards of input, in input order,
+        gives the same result and analysis as analyzing the whole input.
+        """
+        if self._rows is None:
+            raise CollectionIsClosed()
+        partial = self._partial(self._rows)
+        if self._state is None:
+            return partial
+        return self._combine(self._state, partial)
+
+    def merge(self, partial):
+        """Merge `partial`, the partial state of data following that collected"""
+        self._state = self._combine(self.partial(), partial)
+        self._rows = []
 
     def prepare(self, rows):
         """Return (columns, records) from collected data `rows`
@@ -98,24 +198,69 @@ class Analyzer():
         """
         return (rows[0]._fields, rows) if rows else ((), ())
 
+    def collection_key(self):
+        """Return a hashable key of the configuration affecting collected data.
+
+        Analyzers of the same class with equal keys reduce the same data from
+        the same input, so data may be collected by one of them and shared with
+        the others by :meth:`share_data`. If the key is None, the default, then
+        data collected by this analyzer is not shared.
+        """
+        return None
+
+    def share_data(self, other):
+        """Share data collected by this analyzer with `other`.
+
+        `other` is an analyzer of the same class and :meth:`collection_key`
+        which has not collected data. Data collection is closed for both.
+        """
+        self.close()
+        other._data = self._data
+        other._rows = None
+        other._state = None
+
+    def share(self, other):
+        """Share values computed from collected data with `other`.
+
+        `other` is an analyzer of the same class, which collects the same data
+        as this analyzer but may have a different configuration. Values which
+        are costly to compute and independent of the configuration differences
+        are then computed once for both analyzers. By default nothing is shared.
+        """
+
+    def computed(self):
+        """Return a list of values computed from collected data, worth keeping.
+
+        The list can be serialized as JSON and restored by :meth:`restore` into
+        an analyzer of the same class collecting the same data, possibly with a
+        different configuration. By default nothing is kept.
+        """
+        return []
+
+    def restore(self, computed):
+        """Restore values `computed` by an analyzer collecting the same data"""
+
     def close(self):
         """Close data collection"""
         if self._data is None:
-            (columns, records) = self.prepare(self._rows)
-            self._data = DataFrame.from_records(records, columns=columns)
+            with stage('close'):
+                self._data = self._reduce(self.partial())
             self._rows = None
+            self._state = None
 
     def _test(self):
         """Close data collection and test collected data"""
         if self._result is None:
             self.close()
-            (self._result, self._reason) = self.test(self._data)
+            with stage('test'):
+                (self._result, self._reason) = self.test(self._data)
 
     def _explain(self):
         """Close data collection and explain collected data"""
         if self._analysis is None:
             self.close()
-            self._analysis = self.explain(self._data)
+            with stage('explain'):
+                self._analysis = self.explain(self._data)
             self._timestamp = self._analysis.pop('timestamp', None)
             self._duration = self._analysis.pop('duration', None)
 
@@ -182,24 +327,21 @@ class Analyzer():
         return self._analysis
 
     @staticmethod
-    def _statistics(data, units, ndigits=3):
-        """Return a dict of statistics for `data`, rounded to `ndigits`"""
-        def _round(val):
-            """Return `val` as native Python type or Decimal, rounded to `ndigits`"""
-            try:
-                return round(val.item(), ndigits)
-            except AttributeError:
-                return round(val, ndigits)
-        min_ = data.min()
-        max_ = data.max()
+    def _statistics(data, units, ndigits=3, ddof=1):
+        """Return a dict of statistics for `data`, rounded to `ndigits`.
+
+        `data` is a sequence of values or their :class:`Summary`. Standard
+        deviation and variance are normalized by N - `ddof`.
+        """
+        summary = data if isinstance(data, Summary) else Summary(data)
         return {
             'units': units,
-            'min': _round(min_),
-            'max': _round(max_),
-            'range': _round(max_ - min_),
-            'mean': _round(data.mean()),
-            'stddev': _round(data.std()),
-            'variance': _round(data.var()),
+            'min': round(summary.min, ndigits),
+            'max': round(summary.max, ndigits),
+            'range': round(summary.range, ndigits),
+            'mean': round(summary.mean, ndigits),
+            'stddev': round(summary.stddev(ddof), ndigits),
+            'variance': round(summary.variance(ddof), ndigits),
         }
 
     def test(self, data):
@@ -220,13 +362,97 @@ class Analyzer():
         raise NotImplementedError
 
 
+class TimeErrorDigest():
+    """A mergeable digest of time error samples.
+
+    Records what time error analysis needs from samples in bounded memory:
+    sample count, first and last timestamps, states, time error statistics,
+    optionally a time error histogram, and (up to two) distinct intervals
+    between samples rounded to whole seconds. If `window` is not None, then
+    time error statistics are also recorded in windows `window` seconds wide,
+    flagging samples in states other than `locked`.
+    """
+    def __init__(self, rows=(), binwidth=None, window=None, locked=frozenset()):
+        self.count = len(rows)
+        self.tfirst = rows[0].timestamp if rows else None
+        self.tlast = rows[-1].timestamp if rows else None
+        self.states = frozenset(row.state for row in rows)
+        values = [row.terror for row in rows]
+        terror = as_array(values)
+        # extremes are kept as sample values
+        self.summary = Summary(values)
+        self.histogram = None if binwidth is None else Histogram(terror, width=binwidth)
+        self.windows = None
+        if window is not None:
+            self.windows = Windows(
+                [row.timestamp for row in rows], terror, window,
+                [row.state not in locked for row in rows],
+            )
+        diffs = np.diff(np.array([row.timestamp for row in rows], dtype=object))
+        self.intervals = frozenset(np.unique(diffs.astype(float).round(0))[:2].tolist())
+
+    @classmethod
+    def from_arrays(cls, span, timestamps, terror, states, unlocked, binwidth=None, window=None):
+        """Return a digest of samples given as arrays rather than rows.
+
+        `span` is (first, last) timestamp of samples; `timestamps` and `terror`
+        are numeric arrays of the timestamp and time error of each sample,
+        `states` the set of states of samples and `unlocked` a boolean array
+        flagging samples in states other than locked states.
+        """
+        digest = cls((), binwidth)
+        digest.count = len(terror)
+        if digest.count == 0:
+            return digest
+        (digest.tfirst, digest.tlast) = span
+        digest.states = frozenset(states)
+        digest.summary = Summary(terror)
+        if binwidth is not None:
+            digest.histogram = Histogram(terror, width=binwidth)
+        if window is not None:
+            digest.windows = Windows(timestamps, terror, window, unlocked)
+        digest.intervals = frozenset(np.unique(np.diff(timestamps).round(0))[:2].tolist())
+        return digest
+
+    def merge(self, other):
+        """Merge `other`, a digest of samples following those in this digest"""
+        if other.count == 0:
+            return self
+        intervals = self.intervals.union(other.intervals)
+        if self.count == 0:
+            self.tfirst = other.tfirst
+        else:
+            intervals = intervals.union((float(round(float(other.tfirst - self.tlast))),))
+        self.intervals = frozenset(sorted(intervals)[:2])
+        self.count += other.count
+        self.tlast = other.tlast
+        self.states = self.states.union(other.states)
+        self.summary.merge(other.summary)
+        if self.histogram is not None:
+            self.histogram.merge(other.histogram)
+        if self.windows is not None:
+            self.windows.merge(other.windows)
+        return self
+
+
+# partial state of time error analysis:
+# `tstart` is the timestamp of the first collected sample (or None);
+# `head` a tuple of collected samples in the transient period from `tstart`;
+# `digest` a :class:`TimeErrorDigest` of samples following the transient period
+TimeErrorPartial = namedtuple('TimeErrorPartial', ('tstart', 'head', 'digest'))
+
+
 class TimeErrorAnalyzerBase(Analyzer):
     """Analyze time error.
 
     Derived classes must override class attribute `locked`, specifying a
     frozenset of values representing locked states.
+
+    Collected samples are folded into a :class:`TimeErrorDigest` as they are
+    collected, so the memory used does not grow with test duration.
     """
     locked = frozenset()
+    fold_rows = 65536
 
     def __init__(self, config):
         super().__init__(config)
@@ -240,6 +466,12 @@ class TimeErrorAnalyzerBase(Analyzer):
         self._transient = config.parameter('transient-period/s')
         # minimum test duration for a valid test
         self._duration_min = config.parameter('min-test-duration/s')
+        # optional percentiles of absolute time error to explain
+        self._percentiles = tuple(config.parameter('time-error-percentiles', ()))
+        # optional histogram bin width: explain histogram if specified
+        self._binwidth = config.positive_parameter('time-error-histogram-bin/ns', None)
+        # optional window width: explain verdicts per window if specified
+        self._window = config.positive_parameter('time-error-window/s', None)
 
     def prepare(self, rows):
         idx = 0
@@ -254,43 +486,214 @@ class TimeErrorAnalyzerBase(Analyzer):
                 idx += 1
         return super().prepare(rows[idx:])
 
+    def _histogram_width(self):
+        """Return the bin width of the time error histogram to digest, or None"""
+        if self._percentiles or self._binwidth is not None:
+            return 1 if self._binwidth is None else self._binwidth
+        return None
+
+    def _digest(self, rows=()):
+        """Return a :class:`TimeErrorDigest` of `rows`"""
+        return TimeErrorDigest(rows, self._histogram_width(), self._window, self.locked)
+
+    def _partial(self, rows):
+        (_, records) = self.prepare(rows)
+        return TimeErrorPartial(
+            rows[0].timestamp if rows else None,
+            tuple(rows[:len(rows) - len(records)]),
+            self._digest(records),
+        )
+
+    def _combine(self, first, second):
+        if first.tstart is None:
+            return second
+        if second.tstart is None:
+            return first
+        # samples in `second` transient period may follow `first` transient
+        # period: if so, then these samples must be digested
+        idx = 0
+        if first.digest.count == 0:
+            tstart = first.tstart + self._transient
+            while idx < len(second.head):
+                if tstart <= second.head[idx].timestamp:
+                    break
+                idx += 1
+        digest = self._digest().merge(first.digest)
+        digest.merge(self._digest(second.head[idx:])).merge(second.digest)
+        return TimeErrorPartial(first.tstart, first.head + second.head[:idx], digest)
+
+    def _reduce(self, partial):
+        return partial.digest
+
+    def collection_key(self):
+        return (self._transient, self._histogram_width(), self._window)
+
+    def _states(self, kind, column):
+        """Return (states, unlocked) of samples in state `column` of `kind`.
+
+        `states` is the set of states of samples; `unlocked` a boolean array
+        flagging samples in states other than :attr:`locked` states. `kind`
+        is 'str' or 'int'.
+        """
+        if kind == 'str':
+            (codes, categories) = column
+            states = {categories[code] for code in np.unique(codes).tolist()}
+            locked = [code for (code, value) in enumerate(categories) if value in self.locked]
+            return (states, ~np.isin(codes, locked))
+        locked = [value for value in self.locked if isinstance(value, int)]
+        return (set(np.unique(column).tolist()), ~np.isin(column, locked))
+
+    def collect_block(self, block, id_):
+        """Collect data for `id_` from `block`, a :class:`vse_sync_pp.shm.Block`.
+
+        Time error statistics are reduced from the columns mapped in `block`
+        directly, without building a row for each sample: only samples in the
+        transient period are copied out of the block as rows. Data with
+        columns of unsupported kinds is collected row by row.
+        """
+        if self._rows is None:
+            raise CollectionIsClosed()
+        count = block.count(id_)
+        kinds = block.kinds(id_)
+        if (
+            count == 0
+            or kinds['timestamp'] not in ('int', 'float', 'decimal')
+            or kinds['terror'] not in ('int', 'float', 'decimal')
+            or kinds['state'] not in ('int', 'str')
+        ):
+            self.collect(*block.rows(id_))
+            return
+        state = self.partial()
+        (tstart, head, idx) = (state.tstart, state.head, 0)
+        if state.digest.count == 0:
+            # samples in the transient period are kept as rows, as collected
+            found = False
+            while idx < count and not found:
+                for row in block.rows(id_, idx, idx + 256):
+                    if tstart is None:
+                        tstart = row.timestamp
+                    if tstart + self._transient <= row.timestamp:
+                        found = True
+                        break
+                    head += (row,)
+                    idx += 1
+        digest = self._digest().merge(state.digest)
+        if idx < count:
+            (first,) = block.rows(id_, idx, idx + 1)
+            (last,) = block.rows(id_, count - 1)
+            columns = block.columns(id_)
+            column = columns['state']
+            if kinds['state'] == 'str':
+                column = (column[0][idx:], column[1])
+            else:
+                column = column[idx:]
+            (states, unlocked) = self._states(kinds['state'], column)
+            # integer time error keeps integer extremes, as when collecting rows
+            terror = columns['terror'] if kinds['terror'] == 'int' else as_float(columns['terror'])
+            digest.merge(TimeErrorDigest.from_arrays(
+                (first.timestamp, last.timestamp),
+                as_float(columns['timestamp'])[idx:], terror[idx:],
+                states, unlocked, self._histogram_width(), self._window,
+            ))
+            # arrays viewing the block must not outlive it
+            del (columns, column, terror)
+        self._state = TimeErrorPartial(tstart, head, digest)
+        self._rows = []
+
+    @staticmethod
+    def _check_missing_samples(data, result, reason):
+        if reason is None:
+            if len(data.intervals) > 1:
+                return (False, "missing test samples")
+        return result, reason
+
     def test(self, data):
-        if len(data) == 0:
+        if data.count == 0:
             return ("error", "no data")
-        if frozenset(data.state.unique()).difference(self.locked): # pylint: disable=no-member
+        if data.states.difference(self.locked):
             return (False, "loss of lock")
-        terr_min = data.terror.min()
-        terr_max = data.terror.max()
-        if self._unacceptable <= max(abs(terr_min), abs(terr_max)):
+        if self._unacceptable <= max(abs(data.summary.min), abs(data.summary.max)):
             return (False, "unacceptable time error")
-        if data.iloc[-1].timestamp - data.iloc[0].timestamp < self._duration_min:
+        if data.tlast - data.tfirst < self._duration_min:
             return (False, "short test duration")
-        if len(data) - 1 < self._duration_min:
+        if data.count - 1 < self._duration_min:
             return (False, "short test samples")
         return (True, None)
 
+    def _histogram(self, histogram, ndigits=3):
+        """Return a dict of optional percentiles and time error `histogram`.
+
+        Percentiles of absolute time error are included if configured, as is
+        `histogram` if histogram bin width is configured.
+        """
+        dct = {}
+        if histogram is not None:
+            if self._percentiles:
+                values = histogram.percentiles(self._percentiles, absolute=True)
+                dct['abs_percentiles'] = {
+                    f'p{pct:g}': round(val, ndigits)
+                    for (pct, val) in zip(self._percentiles, values)
+                }
+            if self._binwidth is not None:
+                dct['histogram'] = {
+                    'width': histogram.width,
+                    'bins': [[low, count] for (low, count) in histogram.bins()],
+                }
+        return dct
+
+    def _windows(self, windows, ndigits=3):
+        """Return a dict of time error verdicts for each window in `windows`.
+
+        Each window is a row of its lower timestamp (formatted as the timestamp
+        of the analysis), sample count, minimum, maximum and mean time error,
+        whether all samples were locked and whether the window passes the test
+        of time error and lock.
+        """
+        rows = []
+        for (low, count, min_, max_, mean, unlocked) in windows.windows():
+            locked = unlocked == 0
+            acceptable = max(abs(min_), abs(max_)) < self._unacceptable
+            rows.append([
+                self._timestamp_from_dec(low), count,
+                round(min_, ndigits), round(max_, ndigits), round(mean, ndigits),
+                locked, locked and acceptable,
+            ])
+        return {
+            'width': windows.width,
+            'units': 'ns',
+            'columns': ['timestamp', 'count', 'min', 'max', 'mean', 'locked', 'result'],
+            'rows': rows,
+        }
+
     def explain(self, data):
-        if len(data) == 0:
+        if data.count == 0:
             return {}
-        return {
-            'timestamp': self._timestamp_from_dec(data.iloc[0].timestamp),
-            'duration': data.iloc[-1].timestamp - data.iloc[0].timestamp,
-            'terror': self._statistics(data.terror, 'ns'),
+        terror = self._statistics(data.summary, 'ns')
+        terror.update(self._histogram(data.histogram))
+        dct = {
+            'timestamp': self._timestamp_from_dec(data.tfirst),
+            'duration': data.tlast - data.tfirst,
+            'terror': terror,
         }
+        if data.windows is not None:
+            dct['windows'] = self._windows(data.windows)
+        return dct
 
 
 def calculate_limit(accuracy, limit_percentage, tau):
     """Calculate upper limit based on tau
 
-    `accuracy` is the list of functions to calculate upper limits
+    `accuracy` is the :class:`vse_sync_pp.requirements.Mask` of upper limits
     `limit_percentage` is the unaccuracy percentage
     `tau` is the observation window interval
 
-    Return the upper limit value based on `tau`
+    Return the upper limit value based on `tau`, or None if `tau` is outside
+    the range of `accuracy`
     """
-    for (low, high), f in accuracy.items():
-        if ((low is None or tau > low) and (tau <= high)):
-            return f(tau) * (limit_percentage / 100)
+    mask = accuracy.limit(tau)
+    if mask is None:
+        return None
+    return mask * (limit_percentage / 100)
 
 
 def out_of_range(taus, samples, accuracy, limit):
@@ -298,7 +701,7 @@ def out_of_range(taus, samples, accuracy, limit):
 
     `taus` list of observation windows intervals
     `samples` are input samples
-    `accuracy` contains the list of upper bound limit functions
+    `accuracy` is the :class:`vse_sync_pp.requirements.Mask` of upper limits
     `limit` is the percentage to apply the upper limit
 
     Return `True` if any value in `samples` is out of range
@@ -324,19 +727,62 @@ def calculate_filter(input_signal, transient, sample_rate):
     scipy_signal.butter return arguments:
         `numerator` coefficient vector and `denominator coefficient vector of the butterworth digital filter
         """
+    from scipy import signal as scipy_signal # pylint: disable=import-outside-toplevel
     numerator, denominator = scipy_signal.butter(1, 0.1 / (sample_rate / 2), btype="low", analog=False, output="ba")
     lpf_signal = scipy_signal.filtfilt(numerator, denominator, input_signal.terror)
     lpf_signal = lpf_signal[transient:len(lpf_signal)]
     return lpf_signal
 
 
+def calculate_tdev(phase, rate, taus):
+    """Calculate time deviation (TDEV) of `phase` at `rate` samples per second
+
+    Each tau in `taus` is rounded to an averaging factor `m` of whole samples;
+    factors for which fewer than two second differences can be formed are
+    dropped. For each remaining factor, the second differences of `m`-sample
+    averages are computed from a single prefix sum of `phase`, so the work per
+    tau is a handful of vector operations over the prefix sum rather than a
+    sum over `m` samples for each of the differences.
+
+    Return (`taus`, `samples`), the observation intervals in seconds for which
+    TDEV was calculated and the TDEV at each interval. The result matches
+    allantools.tdev(phase, rate=rate, data_type="phase", taus=taus).
+    """
+    phase = np.asarray(phase, dtype=np.float64)
+    size = len(phase)
+    factors = np.unique(np.round(np.asarray(taus, dtype=np.float64) * rate)).astype(np.int64)
+    factors = factors[(0 < factors) & (3 * factors < size)]
+    # prefix sums of mean-removed phase: second differences are independent
+    # of the mean, and removing it keeps prefix sums small
+    prefix = np.zeros(size + 1)
+    np.cumsum(phase - phase.mean(), out=prefix[1:])
+    samples = np.empty(len(factors))
+    for (idx, m) in enumerate(factors.tolist()):
+        count = size - 3 * m + 1
+        # sums of second differences of phase over each window of `m` samples
+        sums = (
+            prefix[3 * m:3 * m + count] - prefix[:count]
+            - 3 * (prefix[2 * m:2 * m + count] - prefix[m:m + count])
+        )
+        samples[idx] = np.sqrt(np.dot(sums, sums) / (6 * m * m * count))
+    return (factors / rate, samples)
+
+
 class TimeIntervalErrorAnalyzerBase(Analyzer):
     """Analyze Time Interval Error (also referred to as Wander).
 
     Derived classes calculate specific Time Interval Error metric focused on measuring
     the change of Time Error.
+
+    The low-pass filter is applied forwards and backwards over the whole time
+    error series, so every filtered sample depends on every collected sample:
+    the partial state of these analyzers carries all collected samples.
+
+    Derived classes set class attribute `curve` to the name of the curve they
+    compute, as shared with other analyzers.
     """
     locked = frozenset()
+    curve = None
 
     def __init__(self, config):
         super().__init__(config)
@@ -354,6 +800,8 @@ class TimeIntervalErrorAnalyzerBase(Analyzer):
         self._taus_list = np.concatenate((taus_below_10k, taus_above_10k))
         self._rate = None
         self._lpf_signal = None
+        # values computed from collected data, shared with other analyzers
+        self._shared = {}
 
     def prepare(self, rows):
         idx = 0
@@ -391,22 +839,67 @@ class TimeIntervalErrorAnalyzerBase(Analyzer):
     def _explain_common(self, data):
         if len(data) == 0:
             return {}
-        if self._rate is None:
-            self._rate = self.calculate_rate(self._data)
-        if self._lpf_signal is None:
-            self._lpf_signal = calculate_filter(data, self._transient, self._rate)
         return None
 
+    def collection_key(self):
+        return (self._transient,)
+
+    def share(self, other):
+        # collected data, filtered signal and curves depend on the transient
+        # period: values are shared keyed by transient period, so analyzers
+        # with differing requirements or limits compute each curve once
+        other._shared = self._shared
+
+    def _compute(self, name, func):
+        """Return value `name` computed by calling `func` with no arguments.
+
+        The value is computed once for analyzers sharing values with this one.
+        """
+        key = (name, self._transient)
+        if key not in self._shared:
+            with stage(name):
+                self._shared[key] = func()
+        return self._shared[key]
+
+    def computed(self):
+        # curves are kept: the filtered signal is as large as collected data
+        computed = []
+        for ((name, transient), value) in self._shared.items():
+            if name in ('tdev', 'mtie'):
+                (taus, samples) = value
+                computed.append([name, transient, taus.tolist(), samples.tolist()])
+        return computed
+
+    def restore(self, computed):
+        for (name, transient, taus, samples) in computed:
+            self._shared[(name, transient)] = (np.array(taus), np.array(samples))
+
+    def has_curve(self):
+        """Return True if the curve is computed or restored for this analyzer.
+
+        The curve may then be plotted without collecting data.
+        """
+        return (self.curve, self._transient) in self._shared
+
     def toplot(self):
         self.close()
         self._generate_taus()
         yield from zip(self._taus, self._samples)
 
+    def mask(self, taus):
+        """Return a list of the upper limit of samples at each tau in `taus`.
+
+        The limit is None for a tau outside the range of requirements.
+        """
+        return [calculate_limit(self._accuracy, self._limit, tau) for tau in taus]
+
     def _generate_taus(self):
         if self._rate is None:
-            self._rate = self.calculate_rate(self._data)
+            self._rate = self._compute('rate', lambda: self.calculate_rate(self._data))
         if self._lpf_signal is None:
-            self._lpf_signal = calculate_filter(self._data, self._transient, self._rate)
+            self._lpf_signal = self._compute(
+                'lpf', lambda: calculate_filter(self._data, self._transient, self._rate),
+            )
         return None
 
 
@@ -416,6 +909,10 @@ class TimeDeviationAnalyzerBase(TimeIntervalErrorAnalyzerBase):
     Derived classes must override class attribute `locked`, specifying a
     frozenset of values representing locked states.
     """
+    # name of the metric in plots
+    metric = 'TDEV'
+    curve = 'tdev'
+
     def __init__(self, config):
         super().__init__(config)
         # required system time deviation output
@@ -428,15 +925,21 @@ class TimeDeviationAnalyzerBase(TimeIntervalErrorAnalyzerBase):
         # TDEV samples
         self._samples = None
 
-    def _generate_taus(self):
+    def _tdev(self):
+        """Return (taus, samples) of TDEV of the filtered signal"""
         super()._generate_taus()
+        return calculate_tdev(self._lpf_signal, self._rate, self._taus_list)
+
+    def _generate_taus(self):
         if self._samples is None:
-            self._taus, self._samples, errors, ns = allantools.tdev(self._lpf_signal, rate=self._rate, data_type="phase", taus=self._taus_list) # noqa
+            self._taus, self._samples = self._compute(self.curve, self._tdev)
 
     def test(self, data):
         result = self._test_common(data)
         if result is None:
             self._generate_taus()
+            if len(self._samples) == 0:
+                return ("error", "no time deviation samples")
             if out_of_range(self._taus, self._samples, self._accuracy, self._limit):
                 return (False, "unacceptable time deviation")
             return (True, None)
@@ -449,7 +952,7 @@ class TimeDeviationAnalyzerBase(TimeIntervalErrorAnalyzerBase):
             return {
                 'timestamp': self._timestamp_from_dec(data.iloc[0].timestamp),
                 'duration': data.iloc[-1].timestamp - data.iloc[0].timestamp,
-                'tdev': self._statistics(self._samples, 'ns'),
+                'tdev': self._statistics(self._samples, 'ns', ddof=0),
             }
         return analysis
 
@@ -460,6 +963,10 @@ class MaxTimeIntervalErrorAnalyzerBase(TimeIntervalErrorAnalyzerBase):
     Derived classes must override class attribute `locked`, specifying a
     frozenset of values representing locked states.
     """
+    # name of the metric in plots
+    metric = 'MTIE'
+    curve = 'mtie'
+
     def __init__(self, config):
         super().__init__(config)
         # required system maximum time interval error output in ns
@@ -472,10 +979,16 @@ class MaxTimeIntervalErrorAnalyzerBase(TimeIntervalErrorAnalyzerBase):
         # MTIE samples
         self._samples = None
 
-    def _generate_taus(self):
+    def _mtie(self):
+        """Return (taus, samples) of MTIE of the filtered signal"""
+        import allantools # pylint: disable=import-outside-toplevel
         super()._generate_taus()
+        (taus, samples, _, _) = allantools.mtie(self._lpf_signal, rate=self._rate, data_type="phase", taus=self._taus_list) # noqa
+        return (taus, samples)
+
+    def _generate_taus(self):
         if self._samples is None:
-            self._taus, self._samples, errors, ns = allantools.mtie(self._lpf_signal, rate=self._rate, data_type="phase", taus=self._taus_list) # noqa
+            self._taus, self._samples = self._compute(self.curve, self._mtie)
 
     def test(self, data):
         result = self._test_common(data)
@@ -493,6 +1006,6 @@ class MaxTimeIntervalErrorAnalyzerBase(TimeIntervalErrorAnalyzerBase):
             return {
                 'timestamp': self._timestamp_from_dec(data.iloc[0].timestamp),
                 'duration': data.iloc[-1].timestamp - data.iloc[0].timestamp,
-                'mtie': self._statistics(self._samples, 'ns'),
+                'mtie': self._statistics(self._samples, 'ns', ddof=0),
             }
         return analysis
@@ -97,25 +97,108 @@ def get_named_clock_class_result(clock_class_count):
     return named_clock_class_count
 
 
+def make_clock_class_count():
+    """Return a new dict of zero clock class counts for each state"""
+    return {state: copy.deepcopy(BASE_CLOCK_CLASS_COUNT) for state in STATE_NAMES}
+
+
+class ClockStateDigest():
+    """A mergeable digest of clock state samples.
+
+    Records sample count, first and last timestamps and the outcome of
+    checking clock class, accuracy and variance in each sample in order,
+    up to the first sample with a wrong clock class.
+    """
+    def __init__(self, rows=()):
+        self.count = 0
+        self.tfirst = None
+        self.tlast = None
+        # (clock class, clock accuracy, offset scaled log variance) of the
+        # first sample: this sample is checked when following other samples
+        self.first = None
+        self.state = None
+        self.wrong_clock_class = None
+        self.illegal_transition = False
+        self.illegal_clock_accuracy = False
+        self.illegal_offset_scaled_log_variance = False
+        self.transition_count = 0
+        self.clock_class_count = make_clock_class_count()
+        for row in rows:
+            self._digest(row.timestamp, row.clock_class, row.clockAccuracy, row.offsetScaledLogVariance)
+
+    def _digest(self, timestamp, *values):
+        """Digest a sample at `timestamp` with clock class, accuracy, variance `values`"""
+        if self.count == 0:
+            self.tfirst = timestamp
+            self.first = values
+        self.count += 1
+        self.tlast = timestamp
+        self._check(*values)
+
+    def _check(self, clock_class, clock_accuracy, offset_scaled_log_variance):
+        """Check a sample, updating state, counts and outcome"""
+        if self.wrong_clock_class is not None:
+            return
+        if (self.state is None) and (clock_class in STATE_TRANSITION):
+            self.state = clock_class
+            return
+        if clock_class != self.state:
+            self.transition_count += 1
+        if clock_class not in STATE_TRANSITION:
+            self.wrong_clock_class = clock_class
+            return
+        if is_illegal_transition(self.state, clock_class):
+            self.illegal_transition = True
+        self.clock_class_count[self.state]["transitions"][clock_class] += 1
+        self.state = clock_class
+        self.clock_class_count[clock_class]["count"] += 1
+        if is_illegal_clock_accuracy(self.state, clock_accuracy):
+            self.illegal_clock_accuracy = True
+        if is_illegal_offset_scaled_log_variance(self.state, offset_scaled_log_variance):
+            self.illegal_offset_scaled_log_variance = True
+
+    def merge(self, other):
+        """Merge `other`, a digest of samples following those in this digest"""
+        if other.count == 0:
+            return self
+        if self.count == 0:
+            self.__dict__.update(copy.deepcopy(other.__dict__))
+            return self
+        self.count += other.count
+        self.tlast = other.tlast
+        if self.wrong_clock_class is not None:
+            return self
+        # `other` was checked from the state set by its first sample: check its
+        # first sample from this digest's state, then account for the rest
+        self._check(*other.first)
+        if self.wrong_clock_class is not None:
+            return self
+        self.transition_count += other.transition_count
+        for (state, dct) in other.clock_class_count.items():
+            self.clock_class_count[state]["count"] += dct["count"]
+            for (new_state, count) in dct["transitions"].items():
+                self.clock_class_count[state]["transitions"][new_state] += count
+        self.state = other.state
+        self.wrong_clock_class = other.wrong_clock_class
+        self.illegal_transition |= other.illegal_transition
+        self.illegal_clock_accuracy |= other.illegal_clock_accuracy
+        self.illegal_offset_scaled_log_variance |= other.illegal_offset_scaled_log_variance
+        return self
+
+
 class ClockStateAnalyzer(Analyzer):
     """Analyze clock state
     """
     id_ = 'phc/gm-settings'
     parser = id_
+    fold_rows = 65536
 
     def __init__(self, config):
         super().__init__(config)
         # minimum test duration for a valid test
         self._duration_min = config.parameter('min-test-duration/s')
         self.transition_count = 0
-        self.clock_class_count = {
-            STATE_FREERUN: copy.deepcopy(BASE_CLOCK_CLASS_COUNT),
-            STATE_LOCKED: copy.deepcopy(BASE_CLOCK_CLASS_COUNT),
-            STATE_HOLDOVER_IN_SPEC: copy.deepcopy(BASE_CLOCK_CLASS_COUNT),
-            STATE_HOLDOVER_OUT_OF_SPEC1: copy.deepcopy(BASE_CLOCK_CLASS_COUNT),
-            STATE_HOLDOVER_OUT_OF_SPEC2: copy.deepcopy(BASE_CLOCK_CLASS_COUNT),
-            STATE_HOLDOVER_OUT_OF_SPEC3: copy.deepcopy(BASE_CLOCK_CLASS_COUNT),
-        }
+        self.clock_class_count = make_clock_class_count()
 
     def prepare(self, rows):
         idx = 0
@@ -130,59 +213,68 @@ class ClockStateAnalyzer(Analyzer):
                 idx += 1
         return super().prepare(rows[idx:])
 
+    def _partial(self, rows):
+        (_, records) = self.prepare(rows)
+        return ClockStateDigest(records)
+
+    def _combine(self, first, second):
+        return ClockStateDigest().merge(first).merge(second)
+
+    def _reduce(self, partial):
+        return partial
+
+    def collection_key(self):
+        # collected data does not depend on configuration
+        return ()
+
     def test(self, data):
-        if len(data) == 0:
+        if data.count == 0:
             return ("error", "no data")
 
-        if data.iloc[-1].timestamp - data.iloc[0].timestamp < self._duration_min:
+        if data.tlast - data.tfirst < self._duration_min:
             return (False, "short test duration")
-        if len(data) - 1 < self._duration_min:
+        if data.count - 1 < self._duration_min:
             return (False, "short test samples")
 
-        state = None
-        illegal_transition = False
-        illegal_clock_accuracy = False
-        illegal_offset_scaled_log_variance = False
-        for index, row in data.iterrows():
-            clock_class = row['clock_class']
-            clock_accuracy = row['clockAccuracy']
-            offset_scaled_log_variance = row['offsetScaledLogVariance']
-
-            if (state is None) and (clock_class in STATE_TRANSITION):
-                state = clock_class
-            else:
-                if clock_class != state:
-                    self.transition_count += 1
-
-                if clock_class not in STATE_TRANSITION:
-                    return (False, f"wrong clock class {clock_class}")
-
-                if is_illegal_transition(state, clock_class):
-                    illegal_transition = True
-
-                self.clock_class_count[state]["transitions"][clock_class] += 1
-                state = clock_class
-                self.clock_class_count[clock_class]["count"] += 1
-
-                if is_illegal_clock_accuracy(state, clock_accuracy):
-                    illegal_clock_accuracy = True
-                if is_illegal_offset_scaled_log_variance(state, offset_scaled_log_variance):
-                    illegal_offset_scaled_log_variance = True
-        if illegal_transition:
+        self.transition_count = data.transition_count
+        self.clock_class_count = copy.deepcopy(data.clock_class_count)
+        if data.wrong_clock_class is not None:
+            return (False, f"wrong clock class {data.wrong_clock_class}")
+        if data.illegal_transition:
             return (False, "illegal state transition")
-        if illegal_clock_accuracy:
+        if data.illegal_clock_accuracy:
             return (False, "illegal clock accuracy")
-        if illegal_offset_scaled_log_variance:
+        if data.illegal_offset_scaled_log_variance:
             return (False, "illegal offset scaled log variance")
         return (True, None)
 
     def explain(self, data):
-        if len(data) == 0:
+        if data.count == 0:
             return {}
 
         return {
-            'timestamp': self._timestamp_from_dec(data.iloc[0].timestamp),
-            'duration': data.iloc[-1].timestamp - data.iloc[0].timestamp,
+            'timestamp': self._timestamp_from_dec(data.tfirst),
+            'duration': data.tlast - data.tfirst,
             'clock_class_count': get_named_clock_class_result(self.clock_class_count),
             'total_transitions': self.transition_count,
         }
+
+    def toheatmap(self):
+        """Return (names, matrix, unallowed) of clock class transitions.
+
+        `names` is a list of clock class names; `matrix[row][col]` counts
+        transitions from the clock class named `names[row]` to that named
+        `names[col]`; `unallowed` is a list of (row, col) cells of illegal
+        transitions. These suit :class:`vse_sync_pp.heatmap.Heatmap`.
+        """
+        self.close()
+        states = tuple(STATE_NAMES)
+        counts = self._data.clock_class_count
+        matrix = [[counts[src]["transitions"][dst] for dst in states] for src in states]
+        unallowed = [
+            (row, col)
+            for (row, src) in enumerate(states)
+            for (col, dst) in enumerate(states)
+            if is_illegal_transition(src, dst)
+        ]
+        return ([STATE_NAMES[state] for state in states], matrix, unallowed)
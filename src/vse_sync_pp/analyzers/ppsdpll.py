@@ -22,8 +22,10 @@ class TimeErrorAnalyzer(TimeErrorAnalyzerBase):
     # 4 = DPLL_HOLDOVER
     locked = frozenset({2, 3})
 
-    def prepare(self, rows):
-        return super().prepare([
+    def _digest(self, rows=()):
+        # samples digested from the transient period of a following shard are
+        # not prepared: convert time error of every digested sample
+        return super()._digest([
             r._replace(terror=float(r.terror)) for r in rows
         ])
 
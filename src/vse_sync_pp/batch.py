@@ -0,0 +1,124 @@
+### SPDX-License-Identifier: GPL-2.0-or-later
+
+"""Analyze log messages from many sources in a pool of processes."""
+
+from argparse import ArgumentParser
+import os
+from collections import namedtuple
+
+from .jobs import (
+    add_workers_argument,
+    failure_reason,
+    manifest_documents,
+    manifest_files,
+    run_pool,
+)
+
+from .analyze import analyze
+from .analyzers import (
+    ANALYZERS,
+    Config,
+)
+
+# a job to analyze data in file `input` using analyzer `analyzer`
+# `config` is a YAML file specifying test requirements and parameters, or None
+# `canonical` is truthy if file `input` contains canonical data
+Job = namedtuple('Job', ('input', 'analyzer', 'config', 'canonical'), defaults=(None, False))
+
+
+def build_jobs(manifest, analyzers=(), config=None, canonical=False, encoding='utf-8'):
+    """Generator yielding :class:`Job` values for analysis jobs in `manifest`.
+
+    If `manifest` is a directory, then yield a job for each analyzer id in
+    `analyzers` for each file in `manifest`, in file name order, with `config`
+    and `canonical` as supplied. Raise :class:`ValueError` if there are no
+    `analyzers` to run.
+
+    Otherwise `manifest` is a YAML file which may contain multiple documents,
+    with each document containing a single object with 'input' and 'analyzer'
+    pairs and, optionally, 'config' and 'canonical' pairs. If not present in a
+    document then the value for 'config' or 'canonical' is as supplied.
+    """
+    if os.path.isdir(manifest):
+        if not analyzers:
+            raise ValueError(f'no analyzers to run over directory {manifest}')
+        for (_, filename) in manifest_files(manifest):
+            for analyzer in analyzers:
+                yield Job(filename, analyzer, config, canonical)
+        return
+    for obj in manifest_documents(manifest, encoding):
+        yield Job(
+            obj['input'],
+            obj['analyzer'],
+            obj.get('config', config),
+            obj.get('canonical', canonical),
+        )
+
+
+def run_job(job, encoding='utf-8'):
+    """Return a dict of the test result and data analysis for `job`.
+
+    The dict also contains the 'input', 'analyzer' and 'config' of `job`. If
+    `job` cannot be run, then the result is "error" and the reason is the
+    exception which prevented it from running.
+    """
+    dct = {
+        'input': job.input,
+        'analyzer': job.analyzer,
+        'config': job.config,
+    }
+    try:
+        config = Config.from_yaml(job.config) if job.config else Config()
+        analyzer = ANALYZERS[job.analyzer](config)
+        with open(job.input, encoding=encoding) as fid:
+            dct.update(analyze(analyzer, fid, job.canonical))
+    # a job which cannot be run must not abort the batch
+    except Exception as exc: # pylint: disable=broad-exception-caught
+        dct.update({
+            'result': "error",
+            'timestamp': None,
+            'duration': None,
+            'reason': failure_reason(exc),
+            'analysis': {},
+        })
+    return dct
+
+
+def main():
+    """Analyze log messages from many sources in a pool of processes.
+
+    Analysis jobs are listed in a YAML manifest file, or are built for each
+    file in a directory. Each job is run by one of a pool of worker processes,
+    so that the cost of starting Python and importing analysis modules is paid
+    once per worker rather than once per job. For each job, print the job
+    input, analyzer and config with the test result and data analysis as JSON,
+    in manifest order.
+    """
+    aparser = ArgumentParser(description=main.__doc__)
+    aparser.add_argument(
+        '--canonical', action='store_true',
+        help="input contains canonical data, unless specified in manifest",
+    )
+    aparser.add_argument(
+        '--config',
+        help="YAML file specifying test requirements and parameters,"
+             " unless specified in manifest",
+    )
+    aparser.add_argument(
+        '--analyzer', choices=tuple(ANALYZERS), nargs='*', default=(),
+        help="analyzers to run over each file when manifest is a directory",
+    )
+    add_workers_argument(aparser)
+    aparser.add_argument(
+        'manifest',
+        help="YAML file specifying analysis jobs, or a directory of input files",
+    )
+    args = aparser.parse_args()
+    if os.path.isdir(args.manifest) and not args.analyzer:
+        aparser.error('--analyzer is required when manifest is a directory')
+    jobs = build_jobs(args.manifest, args.analyzer, args.config, args.canonical)
+    run_pool(run_job, jobs, args.workers)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+### SPDX-License-Identifier: GPL-2.0-or-later
+
+"""Plot data parsed from log messages from many sources in a pool of processes."""
+
+from argparse import ArgumentParser
+import os
+from collections import namedtuple
+
+from .jobs import (
+    add_workers_argument,
+    failure_reason,
+    manifest_documents,
+    manifest_files,
+    run_pool,
+)
+
+from .parsers import PARSERS
+from .plot import plot_file
+
+# a job to plot data parsed by parser `parser` from file `input` to `output`
+# `canonical` is truthy if file `input` contains canonical data
+PlotJob = namedtuple('PlotJob', ('input', 'parser', 'output', 'canonical'), defaults=(False,))
+
+
+def build_jobs(manifest, parser=None, outdir=None, canonical=False, encoding='utf-8'):
+    """Generator yielding :class:`PlotJob` values for plot jobs in `manifest`.
+
+    If `manifest` is a directory, then yield a job plotting data parsed by
+    `parser` from each file in `manifest`, in file name order, to a PNG image
+    file of the same base name in directory `outdir`, with `canonical` as
+    supplied.
+
+    Otherwise `manifest` is a YAML file which may contain multiple documents,
+    with each document containing a single object with 'input', 'parser' and
+    'output' pairs and, optionally, a 'canonical' pair. If not present in a
+    document then the value for 'canonical' is as supplied.
+    """
+    if os.path.isdir(manifest):
+        for (name, filename) in manifest_files(manifest):
+            output = os.path.join(outdir, os.path.splitext(name)[0] + '.png')
+            yield PlotJob(filename, parser, output, canonical)
+        return
+    for obj in manifest_documents(manifest, encoding):
+        yield PlotJob(
+            obj['input'],
+            obj['parser'],
+            obj['output'],
+            obj.get('canonical', canonical),
+        )
+
+
+def run_job(job, **kwargs):
+    """Return a dict of the outcome of plotting `job`.
+
+    The dict contains the 'input', 'parser' and 'output' of `job`, with
+    'result' True if `job` was plotted. Otherwise the result is "error" and
+    the reason is the exception which prevented plotting. `kwargs` are passed
+    to the :class:`vse_sync_pp.plot.Plotter` constructor.
+    """
+    dct = {
+        'input': job.input,
+        'parser': job.parser,
+        'output': job.output,
+        'result': True,
+        'reason': None,
+    }
+    try:
+        plot_file(job.input, job.parser, job.output, job.canonical, **kwargs)
+    # a job which cannot be run must not abort the batch
+    except Exception as exc: # pylint: disable=broad-exception-caught
+        dct.update({
+            'result': "error",
+            'reason': failure_reason(exc),
+        })
+    return dct
+
+
+def main():
+    """Plot data parsed from log messages from many sources in a pool of processes.
+
+    Plot jobs are listed in a YAML manifest file, or are built for each file
+    in a directory. Each job is plotted by one of a pool of worker processes,
+    using a headless renderer. For each job, print the job input, parser and
+    output with the result of plotting as JSON, in manifest order.
+    """
+    aparser = ArgumentParser(description=main.__doc__)
+    aparser.add_argument(
+        '--canonical', action='store_true',
+        help="input contains canonical data, unless specified in manifest",
+    )
+    aparser.add_argument(
+        '--parser', choices=tuple(PARSERS),
+        help="data to parse from each file when manifest is a directory",
+    )
+    aparser.add_argument(
+        '--output-dir', default='.',
+        help="directory for output images when manifest is a directory"
+             " (default: current directory)",
+    )
+    add_workers_argument(aparser)
+    aparser.add_argument(
+        'manifest',
+        help="YAML file specifying plot jobs, or a directory of input files",
+    )
+    args = aparser.parse_args()
+    if os.path.isdir(args.manifest) and args.parser is None:
+        aparser.error('--parser is required when manifest is a directory')
+    jobs = build_jobs(args.manifest, args.parser, args.output_dir, args.canonical)
+    run_pool(run_job, jobs, args.workers)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,213 @@
+### SPDX-License-Identifier: GPL-2.0-or-later
+
+"""Benchmark parsing, sequencing and analysis of synthetic log messages."""
+
+from argparse import ArgumentParser
+import sys
+import time
+import tracemalloc
+from io import StringIO
+
+from .common import print_loj
+
+from .analyze import analyze
+from .analyzers import (
+    ANALYZERS,
+    Config,
+)
+from .generate import (
+    GENERATORS,
+    muxed as generate_muxed,
+)
+from .parsers import PARSERS
+from .sequence import sequenced
+from .shm import (
+    CHUNK,
+    handoff,
+    handoff_blocks,
+)
+from .source import (
+    logged,
+    muxed,
+    readahead_process,
+)
+
+# default numbers of log messages per benchmark
+SIZES = (1000, 10000, 100000)
+
+# analyzers benchmarked end to end, with requirements and parameters allowing
+# each to run every stage of analysis over data generated at any size
+ANALYZER_IDS = (
+    'ts2phc/time-error',
+    'ts2phc/time-deviation',
+    'ts2phc/mtie',
+    'phc/gm-settings',
+)
+CONFIG = Config(None, 'G.8272/PRTC-A', {
+    'transient-period/s': 1,
+    'min-test-duration/s': 1,
+    'time-error-limit/%': 100,
+    'time-deviation-limit/%': 100,
+    'maximum-time-interval-error-limit/%': 100,
+})
+
+
+def text(lines):
+    """Return a string of newline-terminated `lines`"""
+    return ''.join(line + '\n' for line in lines)
+
+
+def measure(func, repeat=3):
+    """Return (seconds, peak) measured calling `func` with no arguments.
+
+    `seconds` is the least elapsed time of `repeat` calls; `peak` is the peak
+    size in bytes of memory blocks traced during a further call.
+    """
+    seconds = None
+    for _ in range(repeat):
+        tstart = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - tstart
+        seconds = elapsed if seconds is None else min(seconds, elapsed)
+    # tracing memory slows execution: do not time this call
+    tracemalloc.start()
+    try:
+        func()
+        (_, peak) = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return (seconds, peak)
+
+
+def count(iterable):
+    """Return the number of items in `iterable`"""
+    return sum(1 for _ in iterable)
+
+
+def bench_parse(size, seed=0):
+    """Generator yielding (name, lines, func) to benchmark each parser"""
+    for (id_, generate) in GENERATORS.items():
+        content = text(generate(size, seed))
+        parser = PARSERS[id_]()
+        yield (id_, size, lambda parser=parser, content=content: count(parser.parse(StringIO(content))))
+
+
+def bench_muxed(size, seed=0):
+    """Generator yielding (name, lines, func) to benchmark multiplexed source"""
+    content = text(generate_muxed(size, seed))
+    parsers = {id_: cls() for (id_, cls) in PARSERS.items()}
+    yield ('muxed', size, lambda: count(muxed(StringIO(content), parsers)))
+
+
+def bench_sequence(size, seed=0):
+    """Generator yielding (name, lines, func) to benchmark sequencing.
+
+    A source for each parser contributes `size` / (number of parsers) lines.
+    """
+    contents = {
+        id_: text(generate(size // len(GENERATORS), seed + idx))
+        for (idx, (id_, generate)) in enumerate(GENERATORS.items())
+    }
+
+    def func():
+        sources = [logged(StringIO(content), PARSERS[id_]()) for (id_, content) in contents.items()]
+        return count(sequenced(sources))
+    yield ('sequence', size // len(GENERATORS) * len(GENERATORS), func)
+
+
+def bench_analyze(size, seed=0):
+    """Generator yielding (name, lines, func) to benchmark analysis end to end"""
+    for id_ in ANALYZER_IDS:
+        cls = ANALYZERS[id_]
+        content = text(GENERATORS[cls.parser](size, seed))
+        yield (id_, size, lambda cls=cls, content=content: analyze(cls(CONFIG), StringIO(content)))
+
+
+def generated(id_, size, seed=0):
+    """Generator yielding (id_, data) parsed from `size` generated log messages"""
+    parser = PARSERS[id_]()
+    for line in GENERATORS[id_](size, seed):
+        data = parser.parse_line(line)
+        if data is not None:
+            yield (id_, data)
+
+
+def bench_handoff(size, seed=0):
+    """Generator yielding (name, lines, func) to benchmark handing off items.
+
+    Log messages are parsed in a background process then handed off pickled,
+    in shared memory as items, or in shared memory as columns.
+    """
+    args = ('ts2phc/time-error', size, seed)
+    yield ('pickled', size, lambda: count(readahead_process(generated, args, size, CHUNK, eager=False)))
+    yield ('shared-memory', size, lambda: count(handoff(generated, args, size)))
+    yield ('shared-memory-columns', size, lambda: sum(
+        len(block) for block in handoff_blocks(generated, args, size)
+    ))
+
+
+BENCHMARKS = {
+    'parse': bench_parse,
+    'muxed': bench_muxed,
+    'sequence': bench_sequence,
+    'analyze': bench_analyze,
+    'handoff': bench_handoff,
+}
+
+
+def run(benchmarks=tuple(BENCHMARKS), sizes=SIZES, repeat=3, seed=0):
+    """Generator yielding a dict of results for each benchmark at each size.
+
+    Each dict contains the 'benchmark' and 'name' benchmarked, the number of
+    log messages processed ('lines'), the least elapsed time ('seconds') and
+    corresponding throughput ('lines_per_second') of `repeat` runs, and the
+    peak size of memory blocks allocated ('peak_bytes').
+    """
+    for benchmark in benchmarks:
+        for size in sizes:
+            for (name, lines, func) in BENCHMARKS[benchmark](size, seed):
+                (seconds, peak) = measure(func, repeat)
+                yield {
+                    'benchmark': benchmark,
+                    'name': name,
+                    'lines': lines,
+                    'seconds': seconds,
+                    'lines_per_second': lines / seconds if seconds else None,
+                    'peak_bytes': peak,
+                }
+
+
+def main():
+    """Benchmark parsing, sequencing and analysis of synthetic log messages.
+
+    Log messages are generated in memory before each benchmark, so benchmarks
+    run offline and measure processing rather than file input. For each
+    benchmark at each size, print the throughput, latency and peak memory
+    allocated as JSON.
+    """
+    aparser = ArgumentParser(description=main.__doc__)
+    aparser.add_argument(
+        '--benchmark', choices=tuple(BENCHMARKS), nargs='*', default=tuple(BENCHMARKS),
+        help="benchmarks to run (default: all)",
+    )
+    aparser.add_argument(
+        '--sizes', type=int, nargs='*', default=SIZES,
+        help=f"numbers of log messages in each benchmark (default: {' '.join(map(str, SIZES))})",
+    )
+    aparser.add_argument(
+        '--repeat', type=int, default=3,
+        help="number of timed runs of each benchmark (default: 3)",
+    )
+    aparser.add_argument(
+        '--seed', type=int, default=0,
+        help="seed for generating log messages (default: 0)",
+    )
+    args = aparser.parse_args()
+    for dct in run(args.benchmark, args.sizes, args.repeat, args.seed):
+        # Python exits with error code 1 on EPIPE
+        if not print_loj(dct):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+### SPDX-License-Identifier: GPL-2.0-or-later
+
+"""A persistent cache of analysis results"""
+
+import os
+import json
+import hashlib
+from contextlib import suppress
+from tempfile import NamedTemporaryFile
+
+from . import __version__
+from .common import JsonEncoder
+
+# default upper bound on the total size of cache entries, in bytes
+MAX_BYTES = 256 * 1024 * 1024
+
+# suffix of cache entry file names
+SUFFIX = '.json'
+
+
+def digest_file(filename, blocksize=1024 * 1024):
+    """Return the hex SHA-256 digest of the content of file `filename`"""
+    sha = hashlib.sha256()
+    with open(filename, 'rb') as fid:
+        while block := fid.read(blocksize):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+class Cache():
+    """A content-addressed cache of JSON values in directory `dirname`.
+
+    Values are stored at keys built from everything they depend on (see
+    :meth:`key`), so stale values are never returned: they are simply never
+    looked up again. When total size of cache entries exceeds `max_bytes`, least
+    recently used entries are evicted.
+    """
+    def __init__(self, dirname, max_bytes=MAX_BYTES):
+        self._dirname = dirname
+        self._max_bytes = max_bytes
+
+    @staticmethod
+    def key(*parts):
+        """Return a key for a value depending on `parts` and package version.
+
+        Each of `parts` must be serializable as JSON.
+        """
+        text = json.dumps([__version__, *parts], cls=JsonEncoder)
+        return hashlib.sha256(text.encode()).hexdigest()
+
+    def _filename(self, key):
+        """Return the file name of the entry at `key`"""
+        return os.path.join(self._dirname, key + SUFFIX)
+
+    def get(self, key):
+        """Return the value at `key`, or None if there is no value at `key`"""
+        filename = self._filename(key)
+        try:
+            with open(filename, encoding='utf-8') as fid:
+                value = json.load(fid)
+        except (FileNotFoundError, ValueError):
+            return None
+        # mark as recently used, unless evicted by another process since read
+        with suppress(FileNotFoundError):
+            os.utime(filename)
+        return value
+
+    def put(self, key, value):
+        """Store `value` at `key`, then evict entries to bound cache size"""
+        os.makedirs(self._dirname, exist_ok=True)
+        # write to a temporary file then rename, so that readers (including
+        # other processes) never see a partially written entry
+        fid = NamedTemporaryFile( # pylint: disable=consider-using-with
+            'w', encoding='utf-8', dir=self._dirname, suffix='.tmp', delete=False,
+        )
+        try:
+            with fid:
+                json.dump(value, fid, cls=JsonEncoder)
+            os.replace(fid.name, self._filename(key))
+        # eviction only counts entries: never leave a temporary file behind
+        except BaseException:
+            os.remove(fid.name)
+            raise
+        self.evict()
+
+    def evict(self):
+        """Remove least recently used entries until within the size bound"""
+        entries = []
+        total = 0
+        with os.scandir(self._dirname) as scan:
+            for entry in scan:
+                if entry.name.endswith(SUFFIX):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+                    total += stat.st_size
+        for (_, size, path) in sorted(entries):
+            if total <= self._max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
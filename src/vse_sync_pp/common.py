@@ -7,7 +7,6 @@ from contextlib import nullcontext
 
 import json
 from decimal import Decimal
-import numpy
 
 
 def open_input(filename, encoding='utf-8', **kwargs):
@@ -28,7 +27,10 @@ class JsonEncoder(json.JSONEncoder):
         """Return a commonly serializable value from `o`"""
         if isinstance(o, Decimal):
             return float(o)
-        if isinstance(o, numpy.ndarray):
+        # only encode arrays if numpy is already imported: commands which do
+        # not otherwise use numpy need not pay the cost of importing it
+        numpy = sys.modules.get('numpy')
+        if numpy is not None and isinstance(o, numpy.ndarray):
             return o.tolist()
         return super().default(o)
 
@@ -52,3 +54,16 @@ def print_loj(val, encoder_cls=JsonEncoder, flush=True):
     except BrokenPipeError:
         sys.stdout = None
         return False
+
+
+def print_line(line, flush=True):
+    """Print string `line` and, optionally, `flush` stdout.
+
+    As :func:`print_loj`, for a line already encoded.
+    """
+    try:
+        print(line, flush=flush)
+        return True
+    except BrokenPipeError:
+        sys.stdout = None
+        return False
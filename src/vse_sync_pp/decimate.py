@@ -0,0 +1,72 @@
+### SPDX-License-Identifier: GPL-2.0-or-later
+
+"""Decimate series of data points for plotting"""
+
+import numpy as np
+
+from .stats import as_array
+
+
+def minmax(x, y, buckets):
+    """Return (x, y) arrays decimated to a min/max envelope of data points.
+
+    The x range of data points (`x`, `y`) is divided into `buckets` intervals
+    of equal width, typically one per pixel column of a plot. The data points
+    with minimum and maximum y value in each interval are kept, so that every
+    extreme value is plotted. At most 2 * `buckets` data points are returned,
+    in their original order.
+
+    Raise :class:`ValueError` if `buckets` is less than 1.
+    """
+    if buckets < 1:
+        raise ValueError(f'buckets must be at least 1, not {buckets}')
+    (x, y) = (as_array(x), as_array(y))
+    if len(x) <= 2 * buckets:
+        return (x, y)
+    (low, high) = (x.min(), x.max())
+    if low == high:
+        idxs = np.zeros(len(x), dtype=np.int64)
+    else:
+        idxs = np.minimum(((x - low) * (buckets / (high - low))).astype(np.int64), buckets - 1)
+    # order by bucket then by y value: the first and last data point of each
+    # bucket have minimum and maximum y value
+    order = np.lexsort((y, idxs))
+    starts = np.flatnonzero(np.diff(idxs[order], prepend=-1))
+    ends = np.append(starts[1:], len(order)) - 1
+    keep = np.unique(np.concatenate((order[starts], order[ends])))
+    return (x[keep], y[keep])
+
+
+def lttb(x, y, threshold):
+    """Return (x, y) arrays decimated by Largest-Triangle-Three-Buckets.
+
+    The first and last of data points (`x`, `y`) are kept. Other data points
+    are divided into `threshold` - 2 buckets of equal count; the data point
+    kept from each bucket forms the largest triangle with the data point kept
+    from the preceding bucket and the average of the following bucket, which
+    preserves the visual shape of the series. At most `threshold` data points
+    are returned, in their original order.
+    """
+    (x, y) = (as_array(x), as_array(y))
+    if threshold < 3 or len(x) <= threshold:
+        return (x, y)
+    edges = np.linspace(1, len(x) - 1, threshold - 1).astype(np.int64)
+    # average of each bucket, followed by the last data point
+    counts = np.diff(edges)
+    xavg = np.append(np.add.reduceat(x[1:-1], edges[:-1] - 1) / counts, x[-1])
+    yavg = np.append(np.add.reduceat(y[1:-1], edges[:-1] - 1) / counts, y[-1])
+    keep = np.empty(threshold, dtype=np.int64)
+    keep[0] = 0
+    keep[-1] = len(x) - 1
+    prev = 0
+    for bucket in range(threshold - 2):
+        (start, end) = (edges[bucket], edges[bucket + 1])
+        (xs, ys) = (x[start:end], y[start:end])
+        # twice the area of triangles (prev, candidate, next bucket average)
+        areas = np.abs(
+            (x[prev] - xavg[bucket + 1]) * (ys - y[prev])
+            - (x[prev] - xs) * (yavg[bucket + 1] - y[prev])
+        )
+        prev = start + int(np.argmax(areas))
+        keep[bucket + 1] = prev
+    return (x[keep], y[keep])
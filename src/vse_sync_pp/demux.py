@@ -5,11 +5,13 @@
 from argparse import ArgumentParser
 import sys
 
-from .common import (
-    open_input,
-    print_loj,
-)
+from .common import print_loj
 
+from .index import (
+    add_range_arguments,
+    in_range,
+    open_range,
+)
 from .parsers import PARSERS
 from .source import muxed
 
@@ -19,9 +21,11 @@ def main():
 
     Demultiplex log messages for the specified parser from the multiplexed
     content in input. For each demultiplexed log message print the canonical
-    data produced by the parser as JSON.
+    data produced by the parser as JSON. If a time range is specified, then
+    only log messages within the range are printed.
     """
     aparser = ArgumentParser(description=main.__doc__)
+    add_range_arguments(aparser)
     aparser.add_argument(
         'input',
         help="input file, or '-' to read from stdin",
@@ -32,8 +36,9 @@ def main():
     )
     args = aparser.parse_args()
     parser = PARSERS[args.parser]()
-    with open_input(args.input) as fid:
-        for (_, data) in muxed(fid, {parser.id_: parser}):
+    with open_range(args.input, 'muxed', parser, args.start, args.index) as fid:
+        values = (data for (_, data) in muxed(fid, {parser.id_: parser}))
+        for data in in_range(values, args.start, args.end):
             # Python exits with error code 1 on EPIPE
             if not print_loj(data):
                 sys.exit(1)
@@ -0,0 +1,277 @@
+### SPDX-License-Identifier: GPL-2.0-or-later
+
+"""Generate synthetic log messages for testing and benchmarking."""
+
+from argparse import ArgumentParser
+import sys
+
+import heapq
+import json
+import math
+import random
+from collections import namedtuple
+from itertools import islice
+
+from .common import JsonEncoder
+from .parsers import PARSERS
+from .analyzers.pmc import (
+    STATE_FREERUN,
+    STATE_LOCKED,
+    STATE_HOLDOVER_IN_SPEC,
+    STATE_HOLDOVER_OUT_OF_SPEC1,
+    CLOCK_ACCURACY_FOR_CLOCK_CLASS,
+    OFFSET_SCALED_LOG_VARIANCE_FOR_CLOCK_CLASS,
+)
+
+# default timestamp of the first generated log message
+START = 1000
+
+# a model of the time error of generated samples
+# `noise` is the standard deviation in ns of white noise in each sample
+# `wander` is the standard deviation in ns of random walk in one second
+# `holdover` is the rate in ns/s of phase drift when not locked
+# `gaps` is the mean number per hour of gaps in samples
+# `gap_duration` is the mean duration in seconds of each gap
+# `losses` is the mean number per hour of losses of lock
+# `loss_duration` is the mean duration in seconds of each loss of lock
+# `warmup` is the duration in seconds of freerun before first lock
+# `in_spec` is the duration in seconds of holdover within specification
+Model = namedtuple('Model', (
+    'noise', 'wander', 'holdover',
+    'gaps', 'gap_duration',
+    'losses', 'loss_duration',
+    'warmup', 'in_spec',
+), defaults=(4, 0, 0, 0, 0, 0, 0, 0, 60))
+
+# the default model: white noise only, always locked
+MODEL = Model()
+
+# clock states of generated samples
+FREERUN = 'freerun'
+LOCKED = 'locked'
+HOLDOVER = 'holdover'
+
+# a generated sample: time error `terror` in ns at `timestamp` with clock
+# `state` entered `elapsed` seconds before
+Sample = namedtuple('Sample', ('timestamp', 'terror', 'state', 'elapsed'))
+
+
+def _expovariate(rng, mean):
+    """Return a random duration with exponential distribution and `mean`"""
+    return rng.expovariate(1 / mean) if mean else 0
+
+
+def _samples(count, seed, rate, start, model):
+    """Generator yielding `count` :class:`Sample` values.
+
+    Samples are generated `rate` samples per second from `start`, except in
+    gaps, with time error and clock state according to `model`. The samples
+    generated are determined by `seed`.
+    """
+    rng = random.Random(seed)
+    period = 1 / rate
+    pgap = model.gaps * period / 3600
+    ploss = model.losses * period / 3600
+    (slot, wander, ramp) = (0, 0.0, 0.0)
+    if model.warmup:
+        (state, since, until) = (FREERUN, start, start + model.warmup)
+    else:
+        (state, since, until) = (LOCKED, start, None)
+    for _ in range(count):
+        skip = 1
+        if pgap and rng.random() < pgap:
+            skip += round(_expovariate(rng, model.gap_duration) * rate)
+            slot += skip - 1
+        timestamp = start + slot * period
+        if state != LOCKED and until <= timestamp:
+            (state, since, ramp) = (LOCKED, until, 0.0)
+        elif state == LOCKED and ploss and rng.random() < ploss:
+            (state, since) = (HOLDOVER, timestamp)
+            until = timestamp + max(period, _expovariate(rng, model.loss_duration))
+        if state != LOCKED:
+            ramp += model.holdover * skip * period
+        if model.wander:
+            wander += rng.gauss(0, model.wander * math.sqrt(skip * period))
+        terror = wander + ramp + rng.gauss(0, model.noise)
+        yield Sample(timestamp, terror, state, timestamp - since)
+        slot += 1
+
+
+def ts2phc(count, seed=0, rate=1, start=START, model=MODEL):
+    """Generator yielding `count` ts2phc log messages"""
+    for sample in _samples(count, seed, rate, start, model):
+        terror = round(sample.terror)
+        state = 's2' if sample.state == LOCKED else 's0'
+        yield (
+            f'ts2phc[{sample.timestamp:.3f}]: [ts2phc.0.config] '
+            f'ens7f1 master offset {terror:>10} {state} freq {-terror:+6}'
+        )
+
+
+def phc2sys(count, seed=0, rate=1, start=START, model=MODEL):
+    """Generator yielding `count` phc2sys log messages"""
+    # path delay is independent of time error: its noise is drawn from a
+    # stream seeded apart from that of time error
+    rng = random.Random(f'{seed}/delay')
+    for sample in _samples(count, seed, rate, start, model):
+        terror = round(sample.terror)
+        state = 's2' if sample.state == LOCKED else 's0'
+        delay = round(rng.gauss(500, 10))
+        yield (
+            f'phc2sys[{sample.timestamp:.3f}]: [ptp4l.0.config] '
+            f'CLOCK_REALTIME phc offset {terror:>9} {state} freq {-terror:+6} delay {delay:>6}'
+        )
+
+
+# DPLL states for clock states: see vse_sync_pp.analyzers.ppsdpll
+DPLL_STATES = {FREERUN: 1, LOCKED: 3, HOLDOVER: 4}
+
+
+def dpll(count, seed=0, rate=1, start=START, model=MODEL):
+    """Generator yielding `count` DPLL CSV samples"""
+    for sample in _samples(count, seed, rate, start, model):
+        state = DPLL_STATES[sample.state]
+        yield f'{sample.timestamp:.3f},{state},{state},{sample.terror:.2f}'
+
+
+# GNSS fix for clock states: see vse_sync_pp.analyzers.gnss
+GNSS_STATES = {FREERUN: 0, LOCKED: 5, HOLDOVER: 0}
+
+
+def gnss(count, seed=0, rate=1, start=START, model=MODEL):
+    """Generator yielding `count` GNSS CSV samples"""
+    for sample in _samples(count, seed, rate, start, model):
+        yield f'{sample.timestamp:.3f},{GNSS_STATES[sample.state]},{round(sample.terror)}'
+
+
+def clock_class(sample, in_spec):
+    """Return the clock class for `sample`.
+
+    Holdover is within specification for `in_spec` seconds after lock is lost.
+    """
+    if sample.state == LOCKED:
+        return STATE_LOCKED
+    if sample.state == FREERUN:
+        return STATE_FREERUN
+    if sample.elapsed < in_spec:
+        return STATE_HOLDOVER_IN_SPEC
+    return STATE_HOLDOVER_OUT_OF_SPEC1
+
+
+def pmc(count, seed=0, rate=1, start=START, model=MODEL):
+    """Generator yielding `count` PMC clock class CSV samples"""
+    for sample in _samples(count, seed, rate, start, model):
+        cls = clock_class(sample, model.in_spec)
+        yield (
+            f'{sample.timestamp:.3f},{cls},'
+            f'{CLOCK_ACCURACY_FOR_CLOCK_CLASS[cls]},{OFFSET_SCALED_LOG_VARIANCE_FOR_CLOCK_CLASS[cls]}'
+        )
+
+
+# generators of log messages for each parser id
+GENERATORS = {
+    'ts2phc/time-error': ts2phc,
+    'phc2sys/time-error': phc2sys,
+    'dpll/time-error': dpll,
+    'gnss/time-error': gnss,
+    'phc/gm-settings': pmc,
+}
+
+
+def _parsed(id_, count, seed, rate, start, model):
+    """Generator yielding (id_, data) for `count` log messages for `id_`"""
+    parser = PARSERS[id_]()
+    for line in GENERATORS[id_](count, seed, rate, start, model):
+        yield (id_, parser.parse_line(line))
+
+
+def muxed(count, seed=0, rate=1, start=START, ids=tuple(GENERATORS), model=MODEL):
+    """Generator yielding `count` lines of multiplexed content.
+
+    Lines contain canonical data for each parser id in `ids`, with `rate`
+    samples per second from each, in timestamp order. Samples with the same
+    timestamp are in the order of `ids`.
+    """
+    sources = [_parsed(id_, count, seed + idx, rate, start, model) for (idx, id_) in enumerate(ids)]
+    merged = heapq.merge(*sources, key=lambda item: item[1].timestamp)
+    for (id_, data) in islice(merged, count):
+        yield json.dumps({'id': id_, 'data': data}, cls=JsonEncoder)
+
+
+def main():
+    """Generate synthetic log messages to stdout.
+
+    Log messages are generated for the id of a supported parser, or as
+    multiplexed content for all supported parsers. Generated time error
+    follows a model of white noise, random walk wander and phase drift in
+    holdover; samples may be missing in gaps and lock may be lost, entering
+    holdover, at random. Output is determined by the seed and written as it is
+    generated, so that arbitrarily large inputs can be generated.
+    """
+    aparser = ArgumentParser(description=main.__doc__)
+    group = aparser.add_mutually_exclusive_group(required=True)
+    group.add_argument(
+        '-n', '--count', type=int,
+        help="number of log messages to generate",
+    )
+    group.add_argument(
+        '-d', '--duration', type=float,
+        help="duration in seconds of log messages to generate"
+             " (gaps do not count toward duration)",
+    )
+    aparser.add_argument(
+        '--seed', type=int, default=0,
+        help="seed for generating log messages (default: 0)",
+    )
+    aparser.add_argument(
+        '--rate', type=float, default=1,
+        help="samples per second (default: 1)",
+    )
+    aparser.add_argument(
+        '--start', type=float, default=START,
+        help=f"timestamp of the first sample (default: {START})",
+    )
+    for (name, help_) in (
+        ('noise', "standard deviation in ns of white noise"),
+        ('wander', "standard deviation in ns of random walk in one second"),
+        ('holdover', "phase drift in ns/s when not locked"),
+        ('gaps', "mean number per hour of gaps in samples"),
+        ('gap-duration', "mean duration in seconds of gaps"),
+        ('losses', "mean number per hour of losses of lock"),
+        ('loss-duration', "mean duration in seconds of losses of lock"),
+        ('warmup', "duration in seconds of freerun before first lock"),
+        ('in-spec', "duration in seconds of holdover within specification"),
+    ):
+        default = getattr(MODEL, name.replace('-', '_'))
+        aparser.add_argument(
+            f'--{name}', type=float, default=default,
+            help=f"{help_} (default: {default})",
+        )
+    aparser.add_argument(
+        'generator', choices=tuple(GENERATORS) + ('muxed',),
+        help="parser id of log messages to generate, or 'muxed' for"
+             " multiplexed content for all parsers",
+    )
+    args = aparser.parse_args()
+    model = Model(**{name: getattr(args, name) for name in Model._fields})
+    count = args.count
+    if count is None:
+        count = round(args.duration * args.rate)
+        if args.generator == 'muxed':
+            count *= len(GENERATORS)
+    if args.generator == 'muxed':
+        lines = muxed(count, args.seed, args.rate, args.start, model=model)
+    else:
+        lines = GENERATORS[args.generator](count, args.seed, args.rate, args.start, model)
+    try:
+        for line in lines:
+            print(line)
+        sys.stdout.flush()
+    # Python exits with error code 1 on EPIPE
+    except BrokenPipeError:
+        sys.stdout = None
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
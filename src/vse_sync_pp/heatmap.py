@@ -3,8 +3,12 @@
 """Heatmap data parsed from log messages from a single source."""
 
 import numpy as np
-import matplotlib.pyplot as plt
-import matplotlib.patches as patches
+from matplotlib.colors import ListedColormap
+
+from .plot import new_figure
+
+# default maximum number of cells annotated with their value
+ANNOTATE_MAX = 400
 
 
 class Heatmap():
@@ -20,9 +24,11 @@ class Heatmap():
     colorbar_label - colorbar label
     xlabel - x axis label
     ylabel - y axis label
+    annotate_max - cells are annotated with their value only if there are no
+                   more than this many cells
     """
     def __init__(self, x_ticks, y_ticks, title, unallowed_cells,
-                 colorbar_label, xlabel, ylabel):
+                 colorbar_label, xlabel, ylabel, annotate_max=ANNOTATE_MAX):
         self._x_ticks = x_ticks
         self._y_ticks = y_ticks
         self._title = title
@@ -30,14 +36,25 @@ class Heatmap():
         self._colorbar_label = colorbar_label
         self._xlabel = xlabel
         self._ylabel = ylabel
+        self._annotate_max = annotate_max
+
+    def _unallowed(self, np_data):
+        """Return a masked array of ones at unallowed cells with a value >= 1"""
+        mask = np.zeros(np_data.shape, dtype=bool)
+        if len(self._unallowed_cells):
+            (rows, cols) = np.array(self._unallowed_cells).reshape(-1, 2).T
+            mask[rows, cols] = True
+        mask &= np_data >= 1
+        return np.ma.masked_array(np.ones(np_data.shape), mask=~mask)
 
     def plot(self, data, filename):
         np_data = np.array(data)
-        fig, ax = plt.subplots()
+        fig = new_figure()
+        ax = fig.subplots()
         im = ax.imshow(np_data, cmap="cividis")
 
         # Add a colorbar for reference
-        cbar = plt.colorbar(im)
+        cbar = fig.colorbar(im, ax=ax)
         cbar.set_label(self._colorbar_label)
 
         # Show all ticks and label them with the respective list entries
@@ -45,21 +62,22 @@ class Heatmap():
         ax.set_yticks(np.arange(len(self._y_ticks)), labels=self._y_ticks)
 
         # Rotate the tick labels and set their alignment.
-        plt.setp(ax.get_xticklabels(), rotation=45, ha="right",
-                 rotation_mode="anchor")
-        plt.xlabel(self._xlabel)
-        plt.ylabel(self._ylabel)
+        for label in ax.get_xticklabels():
+            label.set(rotation=45, ha="right", rotation_mode="anchor")
+        ax.set_xlabel(self._xlabel)
+        ax.set_ylabel(self._ylabel)
+
+        # Color unallowed cells red, as a single image over the heatmap
+        ax.imshow(self._unallowed(np_data), cmap=ListedColormap(["red"]),
+                  vmin=0, vmax=1, interpolation="nearest")
 
-        # Loop over data dimensions and create text annotations.
-        for i in range(len(self._x_ticks)):
-            for j in range(len(self._y_ticks)):
-                ax.text(j, i, np_data[i, j],
+        # Annotate cells with their value, unless too many to read
+        if np_data.size <= self._annotate_max:
+            for (row, col) in np.ndindex(np_data.shape):
+                ax.text(col, row, np_data[row, col],
                         ha="center", va="center", color="white")
 
-        for row, col in self._unallowed_cells:
-            if np_data[row][col] >= 1:
-                rect = patches.Rectangle((col - 0.5, row - 0.5), 1, 1, linewidth=1, edgecolor='none', facecolor='red')
-                ax.add_patch(rect)
         ax.set_title(self._title)
         fig.tight_layout()
-        plt.savefig(filename)
+        fig.savefig(filename)
+        return fig, ax
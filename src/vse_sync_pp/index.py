@@ -0,0 +1,281 @@
+### SPDX-License-Identifier: GPL-2.0-or-later
+
+"""Index log messages by timestamp, to read time ranges of large files."""
+
+from argparse import ArgumentParser
+import io
+import os
+import sys
+
+import json
+from bisect import bisect_left
+from contextlib import contextmanager
+from decimal import Decimal
+
+from .common import (
+    open_input,
+    print_loj,
+)
+
+from .parsers import PARSERS
+from .parsers.parser import parse_timestamp
+from .source import muxed_fields
+
+# kinds of file content: log messages, canonical data or multiplexed content
+KINDS = ('logged', 'canonical', 'muxed')
+
+# suffix of the default index file name of an input file
+SUFFIX = '.idx'
+
+# default number of accepted lines between index checkpoints for each parser
+EVERY = 4096
+
+# size in bytes of a file region scanned rather than bisected
+BLOCK = 64 * 1024
+
+
+def _timestamp(line, kind, parser):
+    """Return the timestamp of `line` accepted by `parser`, or None.
+
+    `line` contains content of `kind`: see :data:`KINDS`.
+    """
+    try:
+        if kind == 'logged':
+            parsed = parser.parse_line(line)
+            return None if parsed is None else parsed.timestamp
+        if kind == 'canonical':
+            parsed = parser.make_parsed(json.loads(line, parse_float=Decimal))
+            return None if parsed is None else parsed.timestamp
+        # only the id and timestamp are decoded
+        fields = muxed_fields(line.rstrip('\r\n'), {parser.id_: parser})
+        return None if fields is None else fields[1]
+    except (ValueError, LookupError, TypeError):
+        return None
+
+
+def _timestamps(fid, kind, parsers, end=None, encoding='utf-8'):
+    """Generator yielding (offset, id_, timestamp) for lines in binary `fid`.
+
+    Lines are read from the current position of `fid`, up to byte offset `end`
+    if not None. For each line, yield the byte offset at which the line starts,
+    and the id and timestamp of each of `parsers` accepting the line.
+    """
+    offset = fid.tell()
+    for raw in fid:
+        if end is not None and end <= offset:
+            return
+        line = raw.decode(encoding)
+        for (id_, parser) in parsers.items():
+            timestamp = _timestamp(line, kind, parser)
+            if timestamp is not None:
+                yield (offset, id_, timestamp)
+        offset += len(raw)
+
+
+def build_index(filename, kind, parsers, every=EVERY, encoding='utf-8'):
+    """Return a dict indexing file `filename` by timestamp.
+
+    `filename` contains content of `kind`: see :data:`KINDS`. `parsers` is a
+    dict of parsers by id. For each parser, a checkpoint is recorded before
+    every `every` lines it accepts: the latest timestamp of lines accepted
+    before the checkpoint and the byte offset of the checkpoint. The index is
+    only valid while the size and modification time of `filename` match those
+    recorded.
+    """
+    checkpoints = {id_: [] for id_ in parsers}
+    counts = {id_: 0 for id_ in parsers}
+    latest = {}
+    stat = os.stat(filename)
+    with open(filename, 'rb') as fid:
+        for (offset, id_, timestamp) in _timestamps(fid, kind, parsers, encoding=encoding):
+            if counts[id_] and counts[id_] % every == 0:
+                checkpoints[id_].append([str(latest[id_]), offset])
+            counts[id_] += 1
+            if id_ not in latest or latest[id_] < timestamp:
+                latest[id_] = timestamp
+    return {
+        'kind': kind,
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'checkpoints': checkpoints,
+    }
+
+
+def index_filename(filename):
+    """Return the default index file name for file `filename`"""
+    return filename + SUFFIX
+
+
+def load_index(filename, kind, index=None):
+    """Return the index of file `filename` from index file `index`, or None.
+
+    If `index` is None, then the default index file name is used. Return None
+    if there is no index file, or if the index is not valid for `filename` or
+    its content of `kind`.
+    """
+    try:
+        with open(index or index_filename(filename), encoding='utf-8') as fid:
+            obj = json.load(fid)
+        stat = os.stat(filename)
+    except (OSError, ValueError):
+        return None
+    if (obj.get('kind'), obj.get('size'), obj.get('mtime_ns')) != (kind, stat.st_size, stat.st_mtime_ns):
+        return None
+    return obj
+
+
+def index_offset(index, id_, start):
+    """Return a byte offset to read lines from, to find timestamp `start`.
+
+    Lines accepted by the parser with id `id_` before the returned offset in
+    the file indexed by `index` have timestamps before `start`. Return None if
+    `index` has no checkpoints for `id_`.
+    """
+    try:
+        checkpoints = index['checkpoints'][id_]
+    except KeyError:
+        return None
+    idx = bisect_left([Decimal(latest) for (latest, _) in checkpoints], start)
+    return checkpoints[idx - 1][1] if idx else 0
+
+
+def bisect_offset(fid, kind, parser, start, encoding='utf-8'):
+    """Return a byte offset to read lines from, to find timestamp `start`.
+
+    Binary search binary file object `fid`, containing content of `kind`, for
+    lines accepted by `parser`. Lines accepted by `parser` must be in ascending
+    timestamp order, then those before the returned offset have timestamps
+    before `start`.
+    """
+    fid.seek(0, os.SEEK_END)
+    (low, high) = (0, fid.tell())
+    parsers = {parser.id_: parser}
+    # invariant: the first line with timestamp at or after `start` begins at or
+    # after `low`, which is the start of a line, and before `high`
+    while BLOCK < high - low:
+        mid = (low + high) // 2
+        # skip to the start of the first line beginning at or after `mid`
+        fid.seek(mid - 1)
+        fid.readline()
+        found = next(_timestamps(fid, kind, parsers, high, encoding), None)
+        if found is None or start <= found[2]:
+            high = mid
+        else:
+            # the found line, and those before it, are before `start`
+            fid.seek(found[0])
+            low = found[0] + len(fid.readline())
+    return low
+
+
+@contextmanager
+def open_range(filename, kind, parser, start=None, index=None, encoding='utf-8'):
+    """Return a context manager for reading lines of `filename` from `start`.
+
+    As :func:`vse_sync_pp.common.open_input`, except that if `start` is not
+    None then lines may be skipped from the start of file `filename` up to the
+    first line accepted by `parser` with timestamp at or after `start`. The
+    position to read from is found using the index in file `index` (see
+    :func:`load_index`) if valid, or else by binary search. `filename`
+    contains content of `kind`: see :data:`KINDS`.
+    """
+    if start is None or filename == '-':
+        with open_input(filename, encoding=encoding) as fid:
+            yield fid
+        return
+    raw = open(filename, 'rb') # pylint: disable=consider-using-with
+    with io.TextIOWrapper(raw, encoding=encoding) as fid:
+        obj = load_index(filename, kind, index)
+        offset = None if obj is None else index_offset(obj, parser.id_, start)
+        if offset is None:
+            offset = bisect_offset(raw, kind, parser, start, encoding)
+        raw.seek(offset)
+        yield fid
+
+
+def _in_range(items, start, end):
+    """Generator yielding parsed `items` with timestamps from `start` to `end`"""
+    for item in items:
+        if end is not None and end < item.timestamp:
+            return
+        if start is None or start <= item.timestamp:
+            yield item
+
+
+def in_range(items, start=None, end=None):
+    """Return an iterable of parsed `items` with timestamps from `start` to `end`.
+
+    Items before `start` are skipped; items are yielded up to the first item
+    after `end`. If `start` or `end` is None, then the range is unbounded at
+    that side.
+    """
+    if start is None and end is None:
+        return items
+    return _in_range(items, start, end)
+
+
+def add_range_arguments(aparser):
+    """Add arguments selecting a time range of input to `aparser`"""
+    aparser.add_argument(
+        '--start', type=parse_timestamp,
+        help="skip data before this timestamp, seeking directly to it",
+    )
+    aparser.add_argument(
+        '--end', type=parse_timestamp,
+        help="stop reading input after this timestamp",
+    )
+    aparser.add_argument(
+        '--index',
+        help=f"index file used to seek to the start (default: input file name with suffix '{SUFFIX}')",
+    )
+
+
+def main():
+    """Index log messages by timestamp, to read time ranges of large files.
+
+    Record checkpoints of byte offset and latest timestamp in input for each
+    specified parser. Tools given an input file and option `--start` seek
+    directly to the start using the index, if valid for the input file. For
+    each parser print the number of checkpoints as JSON.
+    """
+    aparser = ArgumentParser(description=main.__doc__)
+    group = aparser.add_mutually_exclusive_group()
+    group.add_argument(
+        '--canonical', action='store_true',
+        help="input contains canonical data",
+    )
+    group.add_argument(
+        '--muxed', action='store_true',
+        help="input contains multiplexed content",
+    )
+    aparser.add_argument(
+        '--every', type=int, default=EVERY,
+        help=f"lines accepted by a parser between checkpoints (default: {EVERY})",
+    )
+    aparser.add_argument(
+        '-o', '--output',
+        help=f"index file name (default: input file name with suffix '{SUFFIX}')",
+    )
+    aparser.add_argument(
+        'input',
+        help="input file",
+    )
+    aparser.add_argument(
+        'parser', choices=tuple(PARSERS), nargs='+',
+        help="parsers of data in input to index",
+    )
+    args = aparser.parse_args()
+    kind = 'canonical' if args.canonical else 'muxed' if args.muxed else 'logged'
+    if kind == 'canonical' and len(args.parser) != 1:
+        aparser.error('canonical data is indexed for one parser')
+    parsers = {id_: PARSERS[id_]() for id_ in args.parser}
+    index = build_index(args.input, kind, parsers, args.every)
+    with open(args.output or index_filename(args.input), 'w', encoding='utf-8') as fid:
+        json.dump(index, fid)
+    for (id_, checkpoints) in index['checkpoints'].items():
+        # Python exits with error code 1 on EPIPE
+        if not print_loj({'parser': id_, 'checkpoints': len(checkpoints)}):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,351 @@
+### SPDX-License-Identifier: GPL-2.0-or-later
+
+"""Analyze multiplexed content streamed from many nodes as it is collected."""
+
+from argparse import ArgumentParser
+import asyncio
+import sys
+
+import json
+
+from .common import (
+    JsonEncoder,
+    print_loj,
+)
+
+from .analyzers import (
+    ANALYZERS,
+    Config,
+)
+from .parsers import PARSERS
+from .source import muxed_line
+
+# default host of the service's TCP socket
+HOST = '127.0.0.1'
+
+# queries answered by the service: see :meth:`Ingest.query`
+QUERIES = ('results', 'nodes')
+
+# number of lines a producer writes between waiting for the service to read
+BATCH = 256
+
+
+class _Node():
+    """Analyzers of multiplexed content from one node"""
+    def __init__(self, analyzers, configs):
+        # analyzers by parser id, each as (analyzer id, config name, analyzer)
+        self.analyzers = {}
+        for id_ in analyzers:
+            cls = ANALYZERS[id_]
+            for (name, config) in configs.items():
+                self.analyzers.setdefault(cls.parser, []).append((id_, name, cls(config)))
+        self.parsers = {id_: PARSERS[id_]() for id_ in self.analyzers}
+        self.connections = 0
+        self.lines = 0
+        self.rejected = 0
+        self.reason = None
+
+
+def _snapshot(analyzer, partial):
+    """Return a dict of the test result and data analysis of `partial`.
+
+    `partial` is the partial state of data collected by `analyzer`, which is
+    analyzed by a fresh analyzer of the same class and configuration, so that
+    `analyzer` may continue collecting data.
+    """
+    # pylint: disable=protected-access
+    fresh = type(analyzer)(analyzer._config)
+    fresh.merge(partial)
+    return {
+        'result': fresh.result,
+        'timestamp': fresh.timestamp,
+        'duration': fresh.duration,
+        'reason': fresh.reason,
+        'analysis': fresh.analysis,
+    }
+
+
+class Ingest():
+    """Analyze multiplexed content from many nodes as it is collected.
+
+    Each node has its own instance of each analyzer in `analyzers` for each
+    config in `configs`, a dict of :class:`Config` values by name. Lines of
+    multiplexed content from a node are parsed as by
+    :func:`vse_sync_pp.source.muxed` and collected by the node's analyzers
+    using each parser. Current results can be queried at any time without
+    ending collection.
+    """
+    def __init__(self, analyzers, configs):
+        self._analyzers = tuple(analyzers)
+        self._configs = dict(configs)
+        self._nodes = {}
+        # fail early if an analyzer cannot be built from a config
+        _Node(self._analyzers, self._configs)
+
+    def node(self, name):
+        """Return the analyzers of node `name`, added if not yet known"""
+        try:
+            return self._nodes[name]
+        except KeyError:
+            node = self._nodes[name] = _Node(self._analyzers, self._configs)
+            return node
+
+    def collect(self, name, line):
+        """Collect data from `line` of multiplexed content from node `name`.
+
+        A line which cannot be parsed is counted as rejected, rather than
+        raising an exception, so that one bad line does not end collection.
+        """
+        node = self.node(name)
+        node.lines += 1
+        try:
+            item = muxed_line(line, node.parsers)
+        except (ValueError, LookupError, TypeError) as exc:
+            node.rejected += 1
+            node.reason = f'{type(exc).__name__}: {exc}'
+            return
+        if item is not None:
+            (id_, data) = item
+            for (_, _, analyzer) in node.analyzers[id_]:
+                analyzer.collect(data)
+
+    def nodes(self, name=None):
+        """Return a list of dicts of the status of nodes.
+
+        Each dict contains the 'node' name, the number of producer 'connections'
+        open, the number of 'lines' received and 'rejected', and the 'reason'
+        the latest line was rejected. If `name` is not None, then only return
+        the status of node `name`.
+        """
+        return [{
+            'node': key,
+            'connections': node.connections,
+            'lines': node.lines,
+            'rejected': node.rejected,
+            'reason': node.reason,
+        } for (key, node) in self._nodes.items() if name in (None, key)]
+
+    async def results(self, name=None):
+        """Return a list of dicts of the current results of nodes.
+
+        Each dict contains the 'node', 'analyzer' and 'config' name with the
+        test result and data analysis of data collected so far, as printed by
+        :mod:`vse_sync_pp.analyze`. If analysis fails, then the result is
+        "error" and the reason is the exception. If `name` is not None, then
+        only return results for node `name`.
+
+        Analysis runs in a worker thread, so that collection continues.
+        """
+        dcts = []
+        for (key, node) in tuple(self._nodes.items()):
+            if name not in (None, key):
+                continue
+            for analyzers in node.analyzers.values():
+                for (id_, config, analyzer) in analyzers:
+                    dct = {'node': key, 'analyzer': id_, 'config': config}
+                    try:
+                        dct.update(await asyncio.to_thread(_snapshot, analyzer, analyzer.partial()))
+                    # a failed analysis must not stop the service
+                    except Exception as exc: # pylint: disable=broad-exception-caught
+                        dct.update({
+                            'result': "error",
+                            'timestamp': None,
+                            'duration': None,
+                            'reason': f'{type(exc).__name__}: {exc}',
+                            'analysis': {},
+                        })
+                    dcts.append(dct)
+        return dcts
+
+    async def query(self, query, name=None):
+        """Return a list of dicts answering `query` for node `name`.
+
+        `query` is one of :data:`QUERIES`: see :meth:`results` and :meth:`nodes`.
+        Raise :class:`ValueError` if `query` is unknown.
+        """
+        if query == 'results':
+            return await self.results(name)
+        if query == 'nodes':
+            return self.nodes(name)
+        raise ValueError(f'unknown query {query}')
+
+    async def handle(self, reader, writer):
+        """Handle a connection to the service.
+
+        The first line from a client is a JSON object: either a producer's
+        hello, with the 'node' name of the producer; or a query, with the
+        'query' and, optionally, a 'node' name. A producer then sends lines of
+        multiplexed content until it closes the connection. A query is
+        answered with a JSON line for each dict answering the query, then the
+        connection is closed. A client which cannot be understood is sent a
+        JSON object with an 'error' reason.
+        """
+        try:
+            try:
+                hello = json.loads(await reader.readline())
+                if 'query' in hello:
+                    dcts = await self.query(hello['query'], hello.get('node'))
+                else:
+                    await self._produced(hello['node'], reader)
+                    return
+            except (ValueError, LookupError, TypeError) as exc:
+                dcts = ({'error': f'{type(exc).__name__}: {exc}'},)
+            for dct in dcts:
+                writer.write(json.dumps(dct, cls=JsonEncoder).encode() + b'\n')
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _produced(self, name, reader):
+        """Collect lines of multiplexed content from node `name` in `reader`"""
+        node = self.node(str(name))
+        node.connections += 1
+        try:
+            while line := await reader.readline():
+                self.collect(str(name), line.decode())
+        finally:
+            node.connections -= 1
+
+
+async def serve(ingest, host=HOST, port=None, path=None):
+    """Return a list of servers handling connections using `ingest`.
+
+    A server listens on TCP `port` of `host` if `port` is not None, and one
+    listens on Unix socket `path` if `path` is not None.
+    """
+    servers = []
+    if port is not None:
+        servers.append(await asyncio.start_server(ingest.handle, host, port))
+    if path is not None:
+        servers.append(await asyncio.start_unix_server(ingest.handle, path))
+    return servers
+
+
+async def _connect(host=HOST, port=None, path=None):
+    """Return (reader, writer) connected to the service"""
+    if path is not None:
+        return await asyncio.open_unix_connection(path)
+    return await asyncio.open_connection(host, port)
+
+
+async def produce(lines, name, host=HOST, port=None, path=None, batch=BATCH):
+    """Send `lines` of multiplexed content from node `name` to the service.
+
+    The service is at TCP `port` of `host`, or at Unix socket `path` if not
+    None. Lines are sent as they are produced, waiting every `batch` lines for
+    the service to read them. Return the number of lines sent.
+    """
+    (_, writer) = await _connect(host, port, path)
+    count = 0
+    try:
+        writer.write(json.dumps({'node': name}).encode() + b'\n')
+        for line in lines:
+            writer.write(line.rstrip('\r\n').encode() + b'\n')
+            count += 1
+            if count % batch == 0:
+                await writer.drain()
+        await writer.drain()
+    finally:
+        writer.close()
+        await writer.wait_closed()
+    return count
+
+
+async def query(query_, name=None, host=HOST, port=None, path=None):
+    """Return a list of dicts answering `query_` for node `name` from the service.
+
+    See :meth:`Ingest.query`. The service is at TCP `port` of `host`, or at
+    Unix socket `path` if not None.
+    """
+    (reader, writer) = await _connect(host, port, path)
+    try:
+        dct = {'query': query_} if name is None else {'query': query_, 'node': name}
+        writer.write(json.dumps(dct).encode() + b'\n')
+        await writer.drain()
+        return [json.loads(line) for line in (await reader.read()).splitlines()]
+    finally:
+        writer.close()
+        await writer.wait_closed()
+
+
+async def _serve_forever(ingest, host, port, path):
+    """Serve connections using `ingest` until cancelled"""
+    servers = await serve(ingest, host, port, path)
+    await asyncio.gather(*(server.serve_forever() for server in servers))
+
+
+def main():
+    """Analyze multiplexed content streamed from many nodes as it is collected.
+
+    By default, run a service accepting connections on a TCP and/or Unix
+    socket from many producers concurrently. Each producer sends the name of
+    its node then lines of multiplexed content, which are analyzed by each
+    specified analyzer for each config, separately for each node. Current
+    results may be queried at any time.
+
+    With --node, act as a producer sending multiplexed content from stdin to
+    the service. With --query, print the current results or node status from
+    the service as JSON.
+    """
+    aparser = ArgumentParser(description=main.__doc__)
+    aparser.add_argument(
+        '--host', default=HOST,
+        help=f"host of TCP socket (default: {HOST})",
+    )
+    aparser.add_argument(
+        '--port', type=int,
+        help="port of TCP socket",
+    )
+    aparser.add_argument(
+        '--unix', metavar='PATH',
+        help="path of Unix socket",
+    )
+    group = aparser.add_mutually_exclusive_group()
+    group.add_argument(
+        '--node',
+        help="send multiplexed content from stdin to the service as this node",
+    )
+    group.add_argument(
+        '--query', choices=QUERIES,
+        help="print current results or node status from the service",
+    )
+    aparser.add_argument(
+        '--query-node',
+        help="only query this node",
+    )
+    aparser.add_argument(
+        '--config', action='append',
+        help="YAML file specifying test requirements and parameters;"
+             " if given more than once, then test and analyze for each",
+    )
+    aparser.add_argument(
+        '--analyzer', choices=tuple(ANALYZERS), nargs='*', default=(),
+        help="analyzers to run over content from each node, when running the service",
+    )
+    args = aparser.parse_args()
+    if args.port is None and args.unix is None:
+        aparser.error('one of --port or --unix is required')
+    if args.node is not None:
+        asyncio.run(produce(sys.stdin, args.node, args.host, args.port, args.unix))
+    elif args.query is not None:
+        for dct in asyncio.run(query(args.query, args.query_node, args.host, args.port, args.unix)):
+            # Python exits with error code 1 on EPIPE
+            if not print_loj(dct):
+                sys.exit(1)
+    else:
+        if not args.analyzer:
+            aparser.error('--analyzer is required when running the service')
+        if args.config is None:
+            configs = {None: Config()}
+        else:
+            configs = {filename: Config.from_yaml(filename) for filename in args.config}
+        try:
+            asyncio.run(_serve_forever(Ingest(args.analyzer, configs), args.host, args.port, args.unix))
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+### SPDX-License-Identifier: GPL-2.0-or-later
+
+"""Run jobs listed in a manifest in a pool of processes."""
+
+import os
+import sys
+from argparse import ArgumentTypeError
+from multiprocessing import Pool
+
+import yaml
+
+from .common import print_loj
+
+
+def manifest_files(dirname):
+    """Generator yielding (name, filename) pairs for files in `dirname`.
+
+    Pairs are yielded in file name order. Subdirectories are skipped.
+    """
+    for name in sorted(os.listdir(dirname)):
+        filename = os.path.join(dirname, name)
+        if os.path.isfile(filename):
+            yield (name, filename)
+
+
+def manifest_documents(manifest, encoding='utf-8'):
+    """Generator yielding the object in each document of YAML file `manifest`"""
+    with open(manifest, encoding=encoding) as fid:
+        yield from yaml.safe_load_all(fid.read())
+
+
+def failure_reason(exc):
+    """Return the reason for a job failing with exception `exc`"""
+    return f'{type(exc).__name__}: {exc}'
+
+
+def _workers(value):
+    """Return the number of worker processes in string `value`.
+
+    Raise :class:`ArgumentTypeError` if `value` is not a positive integer.
+    """
+    try:
+        workers = int(value)
+    except ValueError:
+        workers = 0
+    if workers < 1:
+        raise ArgumentTypeError(f'must be a positive integer, not {value!r}')
+    return workers
+
+
+def add_workers_argument(aparser):
+    """Add the option setting the number of worker processes to `aparser`"""
+    aparser.add_argument(
+        '-w', '--workers', type=_workers, default=os.cpu_count(),
+        help="number of worker processes (default: number of CPUs)",
+    )
+
+
+def run_pool(func, jobs, workers=None):
+    """Print as JSON the dict returned by `func` for each of `jobs`.
+
+    Each job is run by one of a pool of `workers` processes. Dicts are printed
+    in job order. If standard output is closed, then terminate the pool and
+    exit.
+    """
+    with Pool(workers) as pool:
+        for dct in pool.imap(func, jobs):
+            # Python exits with error code 1 on EPIPE
+            if not print_loj(dct):
+                pool.terminate()
+                sys.exit(1)
@@ -5,25 +5,30 @@
 from argparse import ArgumentParser
 import sys
 
-from .common import (
-    open_input,
-    print_loj,
-)
+from .common import print_loj
 
+from .index import (
+    add_range_arguments,
+    in_range,
+    open_range,
+)
 from .parsers import PARSERS
+from .parsers.parser import relative_timestamp
 
 
 def main():
     """Parse log messages from a single source.
 
     Parse log messages using the specified parser. For each parsed log message
-    print the canonical data produced by the parser as JSON.
+    print the canonical data produced by the parser as JSON. If a time range is
+    specified, then only log messages within the range are printed.
     """
     aparser = ArgumentParser(description=main.__doc__)
     aparser.add_argument(
         '-r', '--relative', action='store_true',
-        help="print timestamps relative to the first line's timestamp",
+        help="print timestamps relative to the first printed line's timestamp",
     )
+    add_range_arguments(aparser)
     aparser.add_argument(
         'input',
         help="input file, or '-' to read from stdin",
@@ -34,8 +39,11 @@ def main():
     )
     args = aparser.parse_args()
     parser = PARSERS[args.parser]()
-    with open_input(args.input) as fid:
-        for data in parser.parse(fid, relative=args.relative):
+    tzero = None
+    with open_range(args.input, 'logged', parser, args.start, args.index) as fid:
+        for data in in_range(parser.parse(fid), args.start, args.end):
+            if args.relative:
+                (tzero, data) = relative_timestamp(data, tzero)
             # Python exits with error code 1 on EPIPE
             if not print_loj(data):
                 sys.exit(1)
@@ -71,6 +71,15 @@ def relative_timestamp(parsed, tzero):
 
 class Parser():
     """A base class providing common parser functionality"""
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # make parsed values picklable, e.g. for transfer between processes:
+        # the namedtuple class is found by qualified name in module of `cls`
+        parsed = cls.__dict__.get('parsed')
+        if parsed is not None:
+            parsed.__module__ = cls.__module__
+            parsed.__qualname__ = f'{cls.__qualname__}.parsed'
+
     def make_parsed(self, elems):
         """Return a namedtuple value from parsed iterable `elems`.
 
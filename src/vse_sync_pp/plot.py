@@ -3,12 +3,28 @@
 """Plot data parsed from log messages from a single source."""
 
 from argparse import ArgumentParser
+import math
 
 import numpy as np
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 from collections import namedtuple
 
-from .common import open_input
+from .decimate import (
+    lttb,
+    minmax,
+)
+from .stats import (
+    BLOCK_SIZE,
+    Histogram,
+    Summary,
+    as_array,
+)
+from .index import (
+    add_range_arguments,
+    in_range,
+    open_range,
+)
 
 from .parsers import PARSERS
 
@@ -16,14 +32,56 @@ from .parsers import PARSERS
 Axis = namedtuple("Axis", ["desc", "attr", "scale", "scale_kwargs"], defaults=[None, None, None, None])
 TIMESERIES = Axis("Time (s)", "timestamp")
 
+# functions decimating data points to plot, taking (x, y, size) arguments
+DECIMATORS = {
+    'minmax': lambda x, y, size: minmax(x, y, size // 2),
+    'lttb': lttb,
+}
+
+# default maximum number of data points to plot in a scatter plot
+MAX_POINTS = 4000
+
+# default maximum number of bins in a histogram: bin width starts at
+# HIST_WIDTH and is doubled until values fall in no more than this many bins
+HIST_BINS = 256
+HIST_WIDTH = 2 ** -10
+
+
+def new_figure(**kwargs):
+    """Return a new figure, constructed with `kwargs`, rendered by Agg.
+
+    The figure is not managed by pyplot: plotting needs no display or GUI
+    backend, and the figure is freed once no longer referenced rather than
+    remaining open until explicitly closed.
+    """
+    fig = Figure(**kwargs)
+    FigureCanvasAgg(fig)
+    return fig
+
 
 class Plotter():
-    """Rudimentary plotter of data values against timestamp"""
-    def __init__(self, x, y):
+    """Rudimentary plotter of data values against timestamp
+
+    If `decimate` is not None, it is a key of :data:`DECIMATORS`: scatter plots
+    are then rendered from at most `max_points` data points decimated from
+    those appended, rather than from every data point appended.
+
+    Histograms and cumulative distributions are plotted from a histogram of y
+    values in at most `hist_bins` bins, counted block by block as data points
+    are appended.
+    """
+    def __init__(self, x, y, decimate='minmax', max_points=MAX_POINTS, hist_bins=HIST_BINS):
         self._x = x
         self._y = y
+        self._decimate = None if decimate is None else DECIMATORS[decimate]
+        self._max_points = max_points
         self._x_data = []
         self._y_data = []
+        # y values not yet counted
+        self._pending = []
+        self._summary = Summary()
+        self._hist_bins = hist_bins
+        self._histogram = Histogram(width=HIST_WIDTH, max_bins=hist_bins)
 
     @staticmethod
     def _extract_attr(axis, data):
@@ -32,29 +90,51 @@ class Plotter():
     def _set_yscale(self, ax):
         if self._y.scale is not None:
             ax.set_yscale(self._y.scale, **(self._y.scale_kwargs or {}))
-        elif any((abs(v) > 10 for v in self._y_data)):
+        elif max(abs(self._summary.min), abs(self._summary.max)) > 10:
             ax.set_yscale("symlog", linthresh=10)
 
     def append(self, data):
         """Append x and y data points extracted from `data`"""
         self._x_data.append(self._extract_attr(self._x, data))
-        self._y_data.append(self._extract_attr(self._y, data))
+        y_value = self._extract_attr(self._y, data)
+        self._y_data.append(y_value)
+        self._pending.append(y_value)
+        if BLOCK_SIZE <= len(self._pending):
+            self._count()
+
+    def _count(self):
+        """Count pending y values into summary and histogram"""
+        if self._pending:
+            values = as_array(self._pending)
+            values = values[~np.isnan(values)]
+            self._summary.update(values)
+            self._histogram.update(values)
+            self._pending = []
 
     def _plot_scatter(self, ax):
+        self._count()
         ax.axhline(0, color='black')
         self._set_yscale(ax)
         if self._x.scale is not None:
             ax.set_xscale(self._x.scale, **(self._x.scale_kwargs or {}))
-        ax.plot(self._x_data, self._y_data, '.')
+        (x_data, y_data) = (self._x_data, self._y_data)
+        if self._decimate is not None and self._max_points < len(x_data):
+            (x_data, y_data) = self._decimate(x_data, y_data, self._max_points)
+        ax.plot(x_data, y_data, '.')
         ax.grid()
         ax.set_title(f'{self._x.desc} vs {self._y.desc}')
 
     def _plot_hist(self, ax):
-        counts, bins = np.histogram(
-            np.array(self._y_data, dtype=float),
-            bins='scott'
-        )
-        ax.hist(bins[:-1], bins, weights=counts)
+        self._count()
+        bins = self._histogram.bins()
+        if bins:
+            # widen bins so that at most `hist_bins` bins span all values
+            width = self._histogram.width
+            span = (bins[-1][0] - bins[0][0]) / width + 1
+            width *= 2 ** max(0, math.ceil(math.log2(span / self._hist_bins)))
+            histogram = Histogram(width=width).merge(self._histogram)
+            (lows, counts) = zip(*histogram.bins())
+            ax.bar(lows, counts, width=histogram.width, align='edge')
         self._set_yscale(ax)
         if self._x.scale is not None:
             ax.set_xscale(self._x.scale, **(self._x.scale_kwargs or {}))
@@ -62,31 +142,107 @@ class Plotter():
 
     def plot(self, filename):
         """Plot data to `filename`"""
-        fig, (ax1, ax2) = plt.subplots(2, constrained_layout=True)
-        fig.set_size_inches(10, 8)
+        fig = new_figure(figsize=(10, 8), layout='constrained')
+        (ax1, ax2) = fig.subplots(2)
         self._plot_scatter(ax1)
         self._plot_hist(ax2)
         ax3 = ax2.twinx()
         ax3.set_ylabel('CDF')
-        ax3.ecdf(np.array(self._y_data, dtype=float), color="black", linewidth=2)
-        plt.savefig(filename)
+        self._plot_cdf(ax3)
+        fig.savefig(filename)
         return fig, (ax1, ax2, ax3)
 
+    def _plot_cdf(self, ax):
+        self._count()
+        bins = self._histogram.bins()
+        if bins:
+            (lows, counts) = zip(*bins)
+            # step up to the cumulative fraction at the upper edge of each bin
+            edges = np.append(lows[0], np.array(lows) + self._histogram.width)
+            cdf = np.append(0, np.cumsum(counts) / self._histogram.count)
+            ax.step(edges, cdf, where='post', color="black", linewidth=2)
+
     def plot_scatter(self, filename):
-        fig, ax = plt.subplots(1, constrained_layout=True)
-        fig.set_size_inches(10, 4)
+        fig = new_figure(figsize=(10, 4), layout='constrained')
+        ax = fig.subplots()
         self._plot_scatter(ax)
-        plt.savefig(filename)
+        fig.savefig(filename)
         return fig, ax
 
     def plot_histogram(self, filename):
-        fig, ax = plt.subplots(1, constrained_layout=True)
-        fig.set_size_inches(10, 4)
+        fig = new_figure(figsize=(10, 4), layout='constrained')
+        ax = fig.subplots()
         self._plot_hist(ax)
-        plt.savefig(filename)
+        fig.savefig(filename)
         return fig, ax
 
 
+class MaskPlotter():
+    """Plotter of a TDEV or MTIE curve against requirement masks.
+
+    The curve and masks are plotted against observation interval in log-log
+    axes. `desc` describes the metric plotted.
+    """
+    def __init__(self, desc, points=512):
+        self._desc = desc
+        self._points = points
+        self._taus = np.array(())
+        self._samples = np.array(())
+        self._masks = []
+
+    def set_curve(self, taus=(), samples=()):
+        """Set the curve of `samples` at observation intervals `taus`"""
+        self._taus = as_array(taus)
+        self._samples = as_array(samples)
+
+    def add_mask(self, label, func):
+        """Add a mask labelled `label`.
+
+        `func` returns a list of the upper limit at each tau in a list of taus;
+        limits may be None. The mask is plotted over the taus of the curve.
+        """
+        self._masks.append((label, func))
+
+    def plot(self, filename):
+        """Plot curve and masks to `filename`"""
+        fig = new_figure(figsize=(10, 6), layout='constrained')
+        ax = fig.subplots()
+        ax.plot(self._taus, self._samples, '.-', label=self._desc)
+        if len(self._taus):
+            taus = np.geomspace(self._taus.min(), self._taus.max(), self._points)
+            for (label, func) in self._masks:
+                limits = [np.nan if limit is None else limit for limit in func(taus)]
+                ax.plot(taus, limits, '--', label=f'{label} mask')
+        ax.set_xscale('log')
+        ax.set_yscale('log')
+        ax.grid(which='both')
+        ax.legend()
+        ax.set_xlabel('Observation interval (s)')
+        ax.set_ylabel(self._desc)
+        ax.set_title(f'{self._desc} vs observation interval')
+        fig.savefig(filename)
+        return fig, ax
+
+
+def plot_file(filename, parser, output, canonical=False, start=None, end=None, index=None, **kwargs):
+    """Plot data parsed by `parser` from file `filename` to `output`.
+
+    `parser` is a parser id. If `filename` is '-' then read from stdin. If
+    `canonical` is truthy, then the input contains canonical data. Only data
+    with timestamps from `start` to `end` is plotted, seeking to `start` using
+    index file `index`: see :func:`vse_sync_pp.index.open_range`. `kwargs` are
+    passed to the :class:`Plotter` constructor.
+    """
+    parser = PARSERS[parser]()
+    plotter = Plotter(TIMESERIES, Axis(parser.y_name, parser.y_name), **kwargs)
+    kind = 'canonical' if canonical else 'logged'
+    with open_range(filename, kind, parser, start, index) as fid:
+        method = parser.canonical if canonical else parser.parse
+        for parsed in in_range(method(fid), start, end):
+            plotter.append(parsed)
+    plotter.plot(output)
+
+
 def main():
     """Plot data parsed from log messages from a single source.
 
@@ -97,6 +253,15 @@ def main():
         '-c', '--canonical', action='store_true',
         help="input contains canonical data",
     )
+    aparser.add_argument(
+        '--decimate', choices=tuple(DECIMATORS) + ('none',), default='minmax',
+        help="method of decimating data points in scatter plot (default: minmax)",
+    )
+    aparser.add_argument(
+        '--max-points', type=int, default=MAX_POINTS,
+        help=f"maximum data points in scatter plot, at least 2 (default: {MAX_POINTS})",
+    )
+    add_range_arguments(aparser)
     aparser.add_argument(
         'input',
         help="input file, or '-' to read from stdin",
@@ -110,13 +275,13 @@ def main():
         help="output image filename",
     )
     args = aparser.parse_args()
-    parser = PARSERS[args.parser]()
-    plotter = Plotter(TIMESERIES, Axis(parser.y_name, parser.y_name))
-    with open_input(args.input) as fid:
-        method = parser.canonical if args.canonical else parser.parse
-        for parsed in method(fid):
-            plotter.append(parsed)
-    plotter.plot(args.output)
+    if args.max_points < 2:
+        aparser.error('--max-points must be at least 2')
+    decimate = None if args.decimate == 'none' else args.decimate
+    plot_file(
+        args.input, args.parser, args.output, args.canonical,
+        start=args.start, end=args.end, index=args.index, decimate=decimate, max_points=args.max_points,
+    )
 
 
 if __name__ == '__main__':
@@ -0,0 +1,197 @@
+### SPDX-License-Identifier: GPL-2.0-or-later
+
+"""Record time, item counts and memory of pipeline stages"""
+
+import time
+import tracemalloc
+from contextlib import (
+    contextmanager,
+    nullcontext,
+)
+
+# the profiler recording stages, if any: see :func:`profiling`
+_ACTIVE = None
+
+
+class _Frame():
+    """A stage entered but not yet exited"""
+    __slots__ = ('name', 'wall', 'cpu', 'current', 'peak', 'child_wall', 'child_cpu')
+
+    def __init__(self, name, wall, cpu, current):
+        self.name = name
+        self.wall = wall
+        self.cpu = cpu
+        self.current = current
+        self.peak = current
+        self.child_wall = 0
+        self.child_cpu = 0
+
+
+class Profiler():
+    """Record wall time, CPU time, item counts and peak memory of stages.
+
+    Stages may nest. Time recorded for a stage excludes time recorded for
+    stages nested within it, so that the times of all stages add up to the
+    time spent in stages. Peak memory of a stage is the peak size of memory
+    blocks allocated while in the stage (including nested stages) above the
+    size allocated on entry. Memory is only traced if `memory` is truthy:
+    tracing memory allocation adds much to the overhead of profiling.
+    """
+    def __init__(self, memory=False):
+        self._memory = memory
+        self._stack = []
+        self._stages = {}
+        self._root = None
+
+    def _enter(self, name):
+        """Enter stage `name`"""
+        current = 0
+        if self._memory:
+            (current, peak) = tracemalloc.get_traced_memory()
+            if self._stack:
+                self._stack[-1].peak = max(self._stack[-1].peak, peak)
+            tracemalloc.reset_peak()
+        if name is not None and name not in self._stages:
+            self._stages[name] = {
+                'calls': 0,
+                'items': 0,
+                'wall_s': 0,
+                'cpu_s': 0,
+                'peak_bytes': 0,
+            }
+        frame = _Frame(name, time.perf_counter(), time.process_time(), current)
+        self._stack.append(frame)
+        return frame
+
+    def _exit(self, items=0):
+        """Exit the innermost stage, having processed `items` items"""
+        frame = self._stack.pop()
+        wall = time.perf_counter() - frame.wall
+        cpu = time.process_time() - frame.cpu
+        if self._memory:
+            frame.peak = max(frame.peak, tracemalloc.get_traced_memory()[1])
+        if self._stack:
+            parent = self._stack[-1]
+            parent.child_wall += wall
+            parent.child_cpu += cpu
+            parent.peak = max(parent.peak, frame.peak)
+        if frame.name is None:
+            return (wall, cpu, frame.peak - frame.current)
+        stats = self._stages[frame.name]
+        stats['calls'] += 1
+        stats['items'] += items
+        stats['wall_s'] += wall - frame.child_wall
+        stats['cpu_s'] += cpu - frame.child_cpu
+        stats['peak_bytes'] = max(stats['peak_bytes'], frame.peak - frame.current)
+        return None
+
+    def start(self):
+        """Start profiling"""
+        if self._memory:
+            tracemalloc.start()
+        self._enter(None)
+
+    def stop(self):
+        """Stop profiling"""
+        self._root = self._exit()
+        if self._memory:
+            tracemalloc.stop()
+
+    @contextmanager
+    def stage(self, name, items=0):
+        """Return a context manager recording stage `name`.
+
+        The stage processes `items` items each time it is entered.
+        """
+        self._enter(name)
+        try:
+            yield
+        finally:
+            self._exit(items)
+
+    def iterate(self, name, iterable):
+        """Generator yielding items from `iterable`, recorded as stage `name`.
+
+        The stage is entered to produce each item, so time spent consuming
+        items is not recorded for stage `name`.
+        """
+        iterator = iter(iterable)
+        while True:
+            self._enter(name)
+            try:
+                item = next(iterator)
+            except StopIteration:
+                self._exit()
+                return
+            except BaseException:
+                self._exit()
+                raise
+            self._exit(1)
+            yield item
+
+    def report(self, ndigits=6):
+        """Return a dict of profile results, with times rounded to `ndigits`.
+
+        The dict contains the total 'wall_s', 'cpu_s' and 'peak_bytes' while
+        profiling, and a dict of 'stages' in order of first entry. Each stage
+        is a dict of the number of 'calls' and 'items' processed, 'wall_s',
+        'cpu_s' and 'peak_bytes'. Peak bytes are omitted if memory is not
+        traced.
+        """
+        (wall, cpu, peak) = self._root
+        report = {
+            'wall_s': round(wall, ndigits),
+            'cpu_s': round(cpu, ndigits),
+            'peak_bytes': peak,
+            'stages': {
+                name: {
+                    **stats,
+                    'wall_s': round(stats['wall_s'], ndigits),
+                    'cpu_s': round(stats['cpu_s'], ndigits),
+                } for (name, stats) in self._stages.items()
+            },
+        }
+        if not self._memory:
+            del report['peak_bytes']
+            for stats in report['stages'].values():
+                del stats['peak_bytes']
+        return report
+
+
+@contextmanager
+def profiling(profiler):
+    """Return a context manager in which stages are recorded by `profiler`.
+
+    If `profiler` is None, then stages are not recorded.
+    """
+    global _ACTIVE # pylint: disable=global-statement
+    if profiler is None:
+        yield None
+        return
+    (previous, _ACTIVE) = (_ACTIVE, profiler)
+    profiler.start()
+    try:
+        yield profiler
+    finally:
+        profiler.stop()
+        _ACTIVE = previous
+
+
+def stage(name, items=0):
+    """Return a context manager recording stage `name` if profiling.
+
+    See :meth:`Profiler.stage`.
+    """
+    if _ACTIVE is None:
+        return nullcontext()
+    return _ACTIVE.stage(name, items)
+
+
+def iterate(name, iterable):
+    """Return an iterable of items from `iterable`, recorded if profiling.
+
+    See :meth:`Profiler.iterate`.
+    """
+    if _ACTIVE is None:
+        return iterable
+    return _ACTIVE.iterate(name, iterable)
@@ -2,16 +2,23 @@
 
 """Requirements specified in ITU-T G.8272/Y.1367"""
 
+from bisect import bisect_left
+from math import isclose
+
+# requirements by name: each requirement is either a value or a dict of
+# functions of tau by range (low, high), applying for low < tau <= high, where
+# low None is unbounded; ranges must be contiguous and functions linear
+
 REQUIREMENTS = {
     'G.8272/PRTC-A': {
         'maximum-time-interval-error-in-locked-mode/ns': {
             (None, 273): lambda t: 0.275 * t + 25,
-            (274, 100000): lambda t: 100
+            (273, 100000): lambda t: 100
         },
         'time-deviation-in-locked-mode/ns': {
             (None, 100): lambda t: 3,
-            (101, 1000): lambda t: 0.03 * t,
-            (1001, 100000): lambda t: 30
+            (100, 1000): lambda t: 0.03 * t,
+            (1000, 100000): lambda t: 30
         },
         'time-error-in-locked-mode/ns': 100,
     },
@@ -22,8 +29,8 @@ REQUIREMENTS = {
         },
         'time-deviation-in-locked-mode/ns': {
             (None, 100): lambda t: 1,
-            (101, 500): lambda t: 0.01 * t,
-            (501, 100000): lambda t: 5
+            (100, 500): lambda t: 0.01 * t,
+            (500, 100000): lambda t: 5
         },
         'time-error-in-locked-mode/ns': 40,
     },
@@ -37,3 +44,78 @@ REQUIREMENTS = {
         }
     },
 }
+
+
+class Mask():
+    """A requirement of functions of tau by range, compiled.
+
+    `ranges` is a dict of functions by range, as in :data:`REQUIREMENTS`.
+    Ranges are sorted into breakpoints, with the slope and intercept of each
+    function, so that a limit is found by binary search. Raise
+    :class:`ValueError` if ranges leave gaps or overlap, or if a function is
+    not linear over its range.
+    """
+    def __init__(self, ranges):
+        ranges = sorted(ranges.items(), key=lambda item: item[0][1])
+        if not ranges:
+            raise ValueError('no ranges')
+        # the lower bound of the first range, or None if unbounded
+        self.low = ranges[0][0][0]
+        # the upper bound of each range
+        self.highs = []
+        self.slopes = []
+        self.intercepts = []
+        for ((low, high), func) in ranges:
+            if self.highs and low != self.highs[-1]:
+                kind = 'overlap' if low is None or low < self.highs[-1] else 'gap'
+                raise ValueError(f'{kind} between ranges at {self.highs[-1]} and {low}')
+            if low is not None and high <= low:
+                raise ValueError(f'empty range ({low}, {high})')
+            # taus are positive: unbounded ranges start from zero
+            start = 0 if low is None else low
+            slope = (func(high) - func(start)) / (high - start)
+            intercept = func(high) - slope * high
+            middle = (start + high) / 2
+            if not isclose(func(middle), slope * middle + intercept, rel_tol=1e-9, abs_tol=1e-9):
+                raise ValueError(f'function not linear over range ({low}, {high})')
+            self.highs.append(high)
+            self.slopes.append(slope)
+            self.intercepts.append(intercept)
+
+    def limit(self, tau):
+        """Return the limit at `tau`, or None if `tau` is outside all ranges"""
+        if self.low is not None and tau <= self.low:
+            return None
+        idx = bisect_left(self.highs, tau)
+        if idx == len(self.highs):
+            return None
+        return self.slopes[idx] * tau + self.intercepts[idx]
+
+
+# compiled requirements by name, built once per process
+_COMPILED = {}
+
+
+def compiled(name):
+    """Return a dict of the requirements at `name`, compiled.
+
+    Requirements which are dicts of functions are compiled into :class:`Mask`
+    values; other values are returned as is. Requirements are compiled once,
+    then shared by every caller. Raise :class:`KeyError` if there are no
+    requirements at `name`; raise :class:`ValueError` if requirements are
+    invalid.
+    """
+    try:
+        return _COMPILED[name]
+    except KeyError:
+        pass
+    dct = {}
+    for (key, value) in REQUIREMENTS[name].items():
+        if isinstance(value, dict):
+            try:
+                value = Mask(value)
+            except ValueError as exc:
+                raise ValueError(f'invalid requirement {key} in {name}: {exc}') from exc
+        dct[key] = value
+    _COMPILED[name] = dct
+    return dct
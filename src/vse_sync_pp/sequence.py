@@ -9,12 +9,22 @@ from sys import stdin
 from collections import namedtuple
 import yaml
 
-from .common import print_loj
+from .common import (
+    print_line,
+    print_loj,
+)
 
 from .parsers import PARSERS
 from .source import (
+    RUN_SIZE,
+    Passthrough,
     logged,
     muxed,
+    muxed_passthrough,
+    readahead,
+    readahead_process,
+    reordered,
+    sorted_externally,
 )
 
 
@@ -30,18 +40,76 @@ def build_emit(available, include=(), exclude=()):
     return ava.intersection(inc or ava).difference(exc)
 
 
-def build_sources(parsers, filename, encoding='utf-8'):
-    """Generator yielding (id_, data) generators for sources in `filename`"""
-    parsers = {id_: cls() for (id_, cls) in parsers.items()}
+def build_source(
+    parsers, source, contains, encoding='utf-8',
+    window=None, count=None,
+    sort=False, run_size=RUN_SIZE, tmpdir=None,
+    passthrough=False,
+):
+    """Return an (id_, data) generator for `source` with content `contains`.
+
+    `source` is a file name or '-' for stdin; `contains` is the id of a parser
+    in `parsers`, a dict of parser classes, or 'muxed' for multiplexed content.
+    If `passthrough` is truthy, then lines of multiplexed content are passed
+    through: see :func:`vse_sync_pp.source.muxed_passthrough`.
+
+    If `sort` is truthy, then log messages are sorted in runs of `run_size`
+    messages spilled to directory `tmpdir`: see
+    :func:`vse_sync_pp.source.sorted_externally`. Otherwise log messages are
+    reordered within `window` seconds or `count` messages: see
+    :func:`vse_sync_pp.source.reordered`.
+    """
+    file = stdin if source == '-' else open(source, encoding=encoding)
+    if contains == 'muxed':
+        reader = muxed_passthrough if passthrough else muxed
+        generator = reader(file, {id_: cls() for (id_, cls) in parsers.items()})
+    else:
+        generator = logged(file, parsers[contains]())
+    if sort:
+        return sorted_externally(generator, run_size, tmpdir)
+    return reordered(generator, window, count)
+
+
+def build_sources(
+    parsers, filename, encoding='utf-8',
+    maxsize=0, processes=False, shared_memory=False,
+    window=None, count=None,
+    sort=False, run_size=RUN_SIZE, tmpdir=None,
+    passthrough=False,
+):
+    """Generator yielding (id_, data) generators for sources in `filename`.
+
+    If `maxsize` is positive, then each source is read ahead by a background
+    thread, or if `processes` is truthy a background process, holding up to
+    about `maxsize` items. (Stdin is always read ahead by a thread.) If
+    `shared_memory` is also truthy, then items are handed off from each
+    process in shared memory rather than pickled: see
+    :func:`vse_sync_pp.shm.handoff`.
+
+    Log messages from each source are sorted if `sort` is truthy, or else
+    reordered within `window` seconds or `count` messages, unless the source
+    specifies 'sort', 'reorder-window/s' or 'reorder-count' values. Lines of
+    multiplexed content are passed through if `passthrough` is truthy. See
+    :func:`build_source`.
+    """
     with open(filename, encoding=encoding) as fid:
         for obj in yaml.safe_load_all(fid.read()):
-            source = obj['source']
-            contains = obj['contains']
-            file = stdin if source == '-' else open(source, encoding=encoding)
-            if contains == 'muxed':
-                yield muxed(file, parsers)
+            args = (
+                parsers, obj['source'], obj['contains'], encoding,
+                obj.get('reorder-window/s', window), obj.get('reorder-count', count),
+                obj.get('sort', sort), run_size, tmpdir,
+                passthrough,
+            )
+            if maxsize <= 0:
+                yield build_source(*args)
+            elif processes and shared_memory and obj['source'] != '-':
+                # numpy is only imported when handing off in shared memory
+                from .shm import handoff # pylint: disable=import-outside-toplevel
+                yield handoff(build_source, args, maxsize)
+            elif processes and obj['source'] != '-':
+                yield readahead_process(build_source, args, maxsize)
             else:
-                yield logged(file, parsers[contains])
+                yield readahead(build_source(*args), maxsize)
 
 
 # tuple of the most recent values generated by source
@@ -61,14 +129,15 @@ def build_head(source):
 def build_heads(sources):
     """Return a list of :class:`Head` values from the first items in `sources`.
 
-    The returned list is sorted by timestamp in ascending order.
+    The returned list is sorted by timestamp in ascending order, then in
+    `sources` order: data need not be comparable.
     """
     heads = []
     for source in sources:
         head = build_head(source)
         if head:
             heads.append(head)
-    return sorted(heads)
+    return sorted(heads, key=lambda head: head.timestamp)
 
 
 def insert_head(heads, head):
@@ -87,6 +156,18 @@ def insert_head(heads, head):
     return heads
 
 
+def sequenced(sources):
+    """Generator yielding (id_, data) from `sources` in timestamp order.
+
+    Each of `sources` generates (id_, data) in ascending timestamp order.
+    """
+    heads = build_heads(sources)
+    while heads:
+        first = heads.pop(0)
+        yield (first.id_, first.data)
+        heads = insert_head(heads, build_head(first.source))
+
+
 def main():
     """Sequence log messages from multiple sources to stdout.
 
@@ -108,7 +189,30 @@ def main():
     timestamp in this set is written to stdout before being replaced by the next
     log message from its source. This process is repeated until all sources are
     empty. (For the avoidance of doubt, log messages within a single source are
-    not sequenced by this tool: they are processed in file order.)
+    not sequenced by this tool: they are processed in file order, unless
+    reordered as follows.)
+
+    Log messages within a source which is slightly out of order can be
+    reordered within a window of `--reorder-window` seconds or of
+    `--reorder-count` messages, using memory bounded by the window. A source
+    may specify its own window with 'reorder-window/s' or 'reorder-count'
+    pairs. Messages later than the window allows are written out of order.
+
+    Log messages within a source which is badly out of order can be sorted with
+    `--sort`, or by a source specifying a 'sort' pair with value true. Sorted
+    runs of `--sort-run` messages are spilled to temporary files then merged,
+    so that sources of any size are sorted in bounded memory. No message from a
+    sorted source is written until the whole source has been read.
+
+    With `--passthrough`, lines of multiplexed content are written exactly as
+    read: only the id and timestamp are decoded, for sequencing, so data is not
+    validated.
+
+    With `--read-ahead`, each source is read and parsed by a background thread
+    (or process, with `--processes`) into a bounded queue, so that a slow
+    source does not stall reading and parsing other sources. With
+    `--shared-memory`, processes hand off parsed messages as typed columns in
+    shared memory rather than pickling them.
     """
     aparser = ArgumentParser(description=main.__doc__)
     aparser.add_argument(
@@ -119,22 +223,69 @@ def main():
         '--exclude', choices=PARSERS, nargs='*', default=(),
         help='never output messages for these parsers (overriding)',
     )
+    aparser.add_argument(
+        '--read-ahead', type=int, default=0, metavar='ITEMS',
+        help='read ahead up to about this many messages from each source'
+             ' in the background (default: 0, no read ahead)',
+    )
+    aparser.add_argument(
+        '--processes', action='store_true',
+        help='read ahead in background processes rather than threads,'
+             ' to parse sources in parallel',
+    )
+    aparser.add_argument(
+        '--shared-memory', action='store_true',
+        help='hand off messages read ahead by processes in shared memory,'
+             ' rather than pickled (implies --processes)',
+    )
+    aparser.add_argument(
+        '--reorder-window', type=float, metavar='SECONDS',
+        help='reorder messages within each source up to this many seconds late',
+    )
+    aparser.add_argument(
+        '--reorder-count', type=int, metavar='ITEMS',
+        help='reorder messages within each source up to this many messages late',
+    )
+    aparser.add_argument(
+        '--sort', action='store_true',
+        help='sort messages within each source, spilling to temporary files',
+    )
+    aparser.add_argument(
+        '--sort-run', type=int, default=RUN_SIZE, metavar='ITEMS',
+        help=f'messages sorted in memory at a time (default: {RUN_SIZE})',
+    )
+    aparser.add_argument(
+        '--tmpdir',
+        help='directory for temporary files when sorting'
+             ' (default: the system temporary directory)',
+    )
+    aparser.add_argument(
+        '--passthrough', action='store_true',
+        help='write lines of multiplexed content as read, without parsing data',
+    )
     aparser.add_argument(
         'sources',
         help='YAML file specifying sources of log messages',
     )
     args = aparser.parse_args()
     emit = build_emit(PARSERS, args.include, args.exclude)
-    sources = tuple(build_sources(PARSERS, args.sources))
-    heads = build_heads(sources)
-    while heads:
-        first = heads.pop(0)
-        if first.id_ in emit:
-            obj = {'id': first.id_, 'data': first.data}
+    sources = tuple(build_sources(
+        PARSERS, args.sources,
+        maxsize=args.read_ahead, processes=args.processes or args.shared_memory,
+        shared_memory=args.shared_memory,
+        window=args.reorder_window, count=args.reorder_count,
+        sort=args.sort, run_size=args.sort_run, tmpdir=args.tmpdir,
+        passthrough=args.passthrough,
+    ))
+    for (id_, data) in sequenced(sources):
+        if id_ in emit:
+            if isinstance(data, Passthrough):
+                printed = print_line(data.line)
+            else:
+                printed = print_loj({'id': id_, 'data': data})
             # Python exits with error code 1 on EPIPE
-            if not print_loj(obj):
+            if not printed:
                 sys.exit(1)
-        heads = insert_head(heads, build_head(first.source))
 
 
 if __name__ == '__main__':
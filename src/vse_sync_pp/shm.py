@@ -0,0 +1,358 @@
+### SPDX-License-Identifier: GPL-2.0-or-later
+
+"""Hand off parsed data between processes in shared memory."""
+
+import multiprocessing
+from collections import namedtuple
+from decimal import Decimal
+from multiprocessing import (
+    resource_tracker,
+    shared_memory,
+)
+
+import numpy as np
+
+from .source import (
+    _finish_process,
+    _put,
+)
+
+# default number of items handed off in each block of shared memory
+CHUNK = 4096
+
+# alignment in bytes of each column in a block
+ALIGN = 8
+
+# int64 range: integers outside it are handed off as objects
+INT64 = (-2 ** 63, 2 ** 63)
+
+# a column of values of one field, of `kind`:
+#   'int' values are int64 `arrays[0]`;
+#   'float' values are float64 `arrays[0]`;
+#   'decimal' values are int64 significands `arrays[0]` times ten to the power
+#             of int8 exponents `arrays[1]`;
+#   'str' values are `extra`[code] for int32 codes `arrays[0]`;
+#   'object' values are `extra`, not in shared memory.
+# `arrays` is a tuple of (dtype, offset) of arrays in the block
+Column = namedtuple('Column', ('kind', 'arrays', 'extra'))
+
+# a descriptor of a block of shared memory named `name`, containing `size`
+# items of (id_, data) in the order of int8 codes at offset 0: code `idx`
+# selects the next data in `columns`[idx], of namedtuple class `types`[idx],
+# for id `ids`[idx]
+Chunk = namedtuple('Chunk', ('name', 'size', 'ids', 'types', 'columns'))
+
+
+def _decimals(values):
+    """Return (significands, exponents) arrays of Decimal `values`, or None.
+
+    Return None if any value cannot be represented in int64 significand and
+    int8 exponent, or is negative zero: an int64 significand has no sign of
+    zero.
+    """
+    if any(value.is_zero() and value.is_signed() for value in values):
+        return None
+    exponents = [value.as_tuple().exponent for value in values]
+    # non-finite values have string exponents
+    if not all(isinstance(exp, int) and -128 <= exp < 128 for exp in exponents):
+        return None
+    significands = [int(value.scaleb(-exp)) for (value, exp) in zip(values, exponents)]
+    if not INT64[0] <= min(significands) <= max(significands) < INT64[1]:
+        return None
+    return (np.array(significands, dtype=np.int64), np.array(exponents, dtype=np.int8))
+
+
+def _encode(values):
+    """Return (kind, arrays, extra) encoding `values` as a :class:`Column`.
+
+    `arrays` is a tuple of numpy arrays to be copied to shared memory.
+    """
+    types = {type(value) for value in values}
+    if types == {int}:
+        if INT64[0] <= min(values) and max(values) < INT64[1]:
+            return ('int', (np.array(values, dtype=np.int64),), None)
+    elif types == {float}:
+        return ('float', (np.array(values, dtype=np.float64),), None)
+    elif types == {Decimal}:
+        arrays = _decimals(values)
+        if arrays is not None:
+            return ('decimal', arrays, None)
+    elif types == {str}:
+        categories = {}
+        codes = np.array([categories.setdefault(value, len(categories)) for value in values], dtype=np.int32)
+        return ('str', (codes,), tuple(categories))
+    return ('object', (), tuple(values))
+
+
+def encode(items):
+    """Return a :class:`Chunk` of `items` copied to a new block of shared memory.
+
+    `items` is a sequence of (id_, data) where data are namedtuples. Ownership
+    of the block passes to whoever calls :meth:`Block.close` for the chunk.
+    """
+    ids = {}
+    rows = []
+    for (id_, data) in items:
+        code = ids.setdefault(id_, len(ids))
+        if code == len(rows):
+            rows.append([])
+        rows[code].append(data)
+    if 127 < len(ids):
+        raise ValueError(f'too many ids in a chunk: {len(ids)}')
+    codes = np.array([ids[id_] for (id_, _) in items], dtype=np.int8)
+    # lay out the arrays of each column after the codes
+    (placed, columns) = ([(codes, 0)], [])
+    size = codes.nbytes
+    for data in rows:
+        fields = []
+        for values in zip(*data):
+            (kind, arrays, extra) = _encode(values)
+            spec = []
+            for arr in arrays:
+                size += -size % ALIGN
+                spec.append((arr.dtype.str, size))
+                placed.append((arr, size))
+                size += arr.nbytes
+            fields.append(Column(kind, tuple(spec), extra))
+        columns.append(tuple(fields))
+    block = shared_memory.SharedMemory(create=True, size=max(1, size))
+    try:
+        dst = np.ndarray((size,), dtype=np.uint8, buffer=block.buf)
+        for (arr, offset) in placed:
+            dst[offset:offset + arr.nbytes] = arr.view(np.uint8)
+        # the buffer cannot be released while viewed
+        del dst
+    finally:
+        block.close()
+    return Chunk(
+        block.name, len(codes), tuple(ids),
+        tuple(type(data[0]) for data in rows), tuple(columns),
+    )
+
+
+class Block():
+    """A block of shared memory containing the items of `chunk`, mapped.
+
+    Columns of data are numpy arrays mapping the block directly: they are not
+    copied. Arrays returned by :meth:`columns` must not be used after the
+    block is closed. Closing the block releases the shared memory.
+    """
+    def __init__(self, chunk):
+        self.chunk = chunk
+        self._block = shared_memory.SharedMemory(name=chunk.name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        return self.chunk.size
+
+    def close(self):
+        """Release the shared memory of this block, and unmap it"""
+        if self._block is not None:
+            (block, self._block) = (self._block, None)
+            block.unlink()
+            # raises BufferError if arrays viewing the block remain
+            block.close()
+
+    def _array(self, dtype, offset, count):
+        """Return a view of `count` values of `dtype` at `offset` in the block"""
+        return np.ndarray((count,), dtype=np.dtype(dtype), buffer=self._block.buf, offset=offset)
+
+    def codes(self):
+        """Return an array of the code of each item, selecting its id"""
+        return self._array(np.int8, 0, self.chunk.size)
+
+    def count(self, id_):
+        """Return the number of items for `id_` in this block"""
+        try:
+            idx = self.chunk.ids.index(id_)
+        except ValueError:
+            return 0
+        return int(np.count_nonzero(self.codes() == idx))
+
+    def kinds(self, id_):
+        """Return a dict of the kind of column of each field of data for `id_`.
+
+        Return an empty dict if the block contains no data for `id_`.
+        """
+        try:
+            idx = self.chunk.ids.index(id_)
+        except ValueError:
+            return {}
+        return {
+            name: column.kind
+            for (name, column) in zip(self.chunk.types[idx]._fields, self.chunk.columns[idx])
+        }
+
+    def columns(self, id_):
+        """Return a dict of the column of each field of data for `id_`.
+
+        Columns of kind 'int' and 'float' are arrays; 'decimal' columns are
+        (significands, exponents) arrays; 'str' columns are (codes, categories);
+        'object' columns are tuples of values. Return an empty dict if the
+        block contains no data for `id_`.
+        """
+        count = self.count(id_)
+        if count == 0:
+            return {}
+        idx = self.chunk.ids.index(id_)
+        dct = {}
+        for (name, column) in zip(self.chunk.types[idx]._fields, self.chunk.columns[idx]):
+            arrays = tuple(self._array(dtype, offset, count) for (dtype, offset) in column.arrays)
+            if column.kind in ('int', 'float'):
+                dct[name] = arrays[0]
+            elif column.kind == 'decimal':
+                dct[name] = arrays
+            elif column.kind == 'str':
+                dct[name] = (arrays[0], column.extra)
+            else:
+                dct[name] = column.extra
+        return dct
+
+    def rows(self, id_, start=0, stop=None):
+        """Return a list of data for `id_`, from index `start` up to `stop`.
+
+        Data are namedtuples equal to those encoded: values are copied out of
+        the block.
+        """
+        if self.count(id_) == 0:
+            return []
+        idx = self.chunk.ids.index(id_)
+        span = slice(start, stop)
+        fields = []
+        for (values, column) in zip(self.columns(id_).values(), self.chunk.columns[idx]):
+            if column.kind in ('int', 'float'):
+                fields.append(values[span].tolist())
+            elif column.kind == 'decimal':
+                fields.append([
+                    Decimal(significand).scaleb(exponent)
+                    for (significand, exponent) in zip(values[0][span].tolist(), values[1][span].tolist())
+                ])
+            elif column.kind == 'str':
+                categories = values[1]
+                fields.append([categories[code] for code in values[0][span].tolist()])
+            else:
+                fields.append(values[span])
+        cls = self.chunk.types[idx]
+        return [cls._make(row) for row in zip(*fields)]
+
+    def items(self):
+        """Return a list of (id_, data) for the items in this block.
+
+        Data are namedtuples equal to those encoded: values are copied out of
+        the block.
+        """
+        ids = self.chunk.ids
+        rows = [iter(self.rows(id_)) for id_ in ids]
+        return [(ids[code], next(rows[code])) for code in self.codes().tolist()]
+
+
+def as_float(column):
+    """Return a float64 array of the values of an 'int', 'float' or 'decimal' column"""
+    if isinstance(column, tuple):
+        (significands, exponents) = column
+        # dividing by an exact power of ten rounds as float(Decimal) does
+        scale = np.power(10.0, np.abs(exponents.astype(np.int64)))
+        return np.where(exponents < 0, significands / scale, significands * scale)
+    return column.astype(np.float64)
+
+
+def _handoff(factory, args, values, stop, chunk):
+    """Put chunks of items from the source returned by `factory`(*`args`).
+
+    As :func:`vse_sync_pp.source._produce_from`, except that items are put in
+    shared memory and a :class:`Chunk` describing them is put to `values`.
+    Chunks are only put once full, or at the end of the source: each chunk
+    costs a block of shared memory, so small chunks are not put eagerly. If
+    items cannot be encoded, then the exception is put in place of further
+    chunks.
+    """
+    def put(items):
+        try:
+            desc = encode(items)
+        except Exception as exc: # pylint: disable=broad-exception-caught
+            _put(values, exc, stop)
+            return False
+        if not _put(values, desc, stop):
+            # the consumer will never release this block
+            Block(desc).close()
+            return False
+        return True
+    items = []
+    try:
+        for item in factory(*args):
+            items.append(item)
+            if chunk <= len(items):
+                if not put(items):
+                    return
+                items = []
+    except Exception as exc: # pylint: disable=broad-exception-caught
+        if items and not put(items):
+            return
+        _put(values, exc, stop)
+        return
+    if items and not put(items):
+        return
+    _put(values, None, stop)
+
+
+def _release(values):
+    """Release the blocks of chunks left in queue `values`"""
+    while True:
+        try:
+            value = values.get(timeout=0.1)
+        except Exception: # pylint: disable=broad-exception-caught
+            return
+        if isinstance(value, Chunk):
+            Block(value).close()
+
+
+def handoff_blocks(factory, args, maxsize, chunk=CHUNK):
+    """Return a generator yielding :class:`Block` values of items of a source.
+
+    The source is returned by calling `factory` with `args` in a background
+    process, as for :func:`vse_sync_pp.source.readahead_process`. Rather than
+    pickling items, the process copies chunks of up to `chunk` items into
+    shared memory as typed columns, which are mapped by the consumer without
+    copying. Up to about `maxsize` items are held in shared memory. Each block
+    is closed once the next block is requested, so that it may be consumed
+    directly: callers keeping data from a block must copy it.
+    """
+    values = multiprocessing.Queue(max(1, maxsize // chunk))
+    stop = multiprocessing.Event()
+    # the producer shares this process's resource tracker, which then unlinks
+    # blocks left by either process if both exit without releasing them
+    resource_tracker.ensure_running()
+    producer = multiprocessing.Process(
+        target=_handoff, args=(factory, args, values, stop, chunk), daemon=True,
+    )
+    producer.start()
+
+    try:
+        while True:
+            value = values.get()
+            if value is None:
+                return
+            if isinstance(value, Exception):
+                raise value
+            with Block(value) as block:
+                yield block
+    finally:
+        stop.set()
+        _finish_process(producer)
+        _release(values)
+
+
+def handoff(factory, args, maxsize, chunk=CHUNK):
+    """Return a generator yielding the items of a source, handed off.
+
+    As :func:`vse_sync_pp.source.readahead_process`, except that items are
+    handed off in shared memory: see :func:`handoff_blocks`. Items are
+    namedtuples equal to those produced.
+    """
+    for block in handoff_blocks(factory, args, maxsize, chunk):
+        yield from block.items()
@@ -2,8 +2,37 @@
 
 """Log message sources."""
 
+import os
+import heapq
 import json
+import multiprocessing
+import pickle
+import queue
+import re
+import threading
+from contextlib import suppress
 from decimal import Decimal
+from collections import namedtuple
+from itertools import islice
+from tempfile import (
+    NamedTemporaryFile,
+    TemporaryDirectory,
+)
+
+from .parsers.parser import (
+    parse_decimal,
+    parse_timestamp,
+)
+
+# number of items transferred from a read ahead producer at a time
+BATCH = 256
+
+# default number of items sorted in memory by :func:`sorted_externally`
+RUN_SIZE = 1000000
+# default number of sorted runs merged at a time by :func:`sorted_externally`
+FAN_IN = 64
+# number of items pickled at a time in a sorted run
+CHUNK = 1024
 
 
 def logged(file, parser):
@@ -46,16 +75,404 @@ def muxed(file, parsers):
         if line == '':
             file.close()
             return
-        obj = json.loads(line.rstrip(), parse_float=Decimal)
-        id_ = obj['id']
+        item = muxed_line(line, parsers)
+        if item is not None:
+            yield item
+
+
+def muxed_line(line, parsers):
+    """Return (id_, data) for a `line` of multiplexed content, or None.
+
+    As :func:`muxed`, for a single line: return None if there is no parser for
+    the value at 'id' in `parsers`.
+    """
+    obj = json.loads(line.rstrip(), parse_float=Decimal)
+    id_ = obj['id']
+    try:
+        parser = parsers[id_]
+    except KeyError:
+        return None
+    if isinstance(obj['data'], dict):
+        data = tuple(obj['data'][name] for name in parser.elems)
+    else:
+        data = obj['data']
+    return (id_, parser.make_parsed(data))
+
+
+def reordered(source, window=None, count=None):
+    """Generator yielding (id_, data) from `source` reordered by timestamp.
+
+    `source` generates (id_, data) in ascending timestamp order, except for
+    bounded disorder. Items are held in a min-heap by timestamp until an item
+    at least `window` seconds later than a held item has been generated, or
+    until more than `count` items are held, then the earliest held item is
+    yielded. If both `window` and `count` are None, then items are yielded in
+    `source` order. Items with equal timestamps are yielded in `source` order.
+
+    An item later than these bounds allow is yielded as soon as it is
+    generated, out of order.
+    """
+    if window is None and count is None:
+        yield from source
+        return
+    if window is not None:
+        window = Decimal(str(window))
+    heap = []
+    latest = None
+    for (seq, (id_, data)) in enumerate(source):
+        timestamp = data.timestamp
+        heapq.heappush(heap, (timestamp, seq, id_, data))
+        if latest is None or latest < timestamp:
+            latest = timestamp
+        while heap and (
+            (count is not None and count < len(heap))
+            or (window is not None and heap[0][0] <= latest - window)
+        ):
+            yield heapq.heappop(heap)[2:]
+    while heap:
+        yield heapq.heappop(heap)[2:]
+
+
+# JSON whitespace
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+# a JSON string
+_STRING = re.compile(r'"(?:[^"\\]|\\.)*"')
+# a JSON number or literal
+_SCALAR = re.compile(r'[^,:\[\]{}\s]+')
+# tokens changing nesting depth: strings are matched so that brackets within
+# strings are skipped
+_NESTING = re.compile(r'"(?:[^"\\]|\\.)*"|[\[\]{}]')
+
+# the common layout of a line of multiplexed content: an id without escapes,
+# then data with the timestamp as its first element or member
+_LEADING = re.compile(
+    r'\s*\{\s*"id"\s*:\s*"([^"\\]*)"\s*,\s*"data"\s*:\s*'
+    r'(?:(\[)|\{\s*"timestamp"\s*:)\s*("(?:[^"\\]|\\.)*"|[^,:\[\]{}\s]+)'
+)
+
+
+def _skip(text, pos):
+    """Return the end of the JSON value starting at `pos` in `text`.
+
+    The value is scanned, not decoded: nested values are only matched.
+    """
+    char = text[pos:pos + 1]
+    if char in ('[', '{'):
+        depth = 0
+        for match in _NESTING.finditer(text, pos):
+            token = match.group()[0]
+            if token in '[{':
+                depth += 1
+            elif token in ']}':
+                depth -= 1
+                if depth == 0:
+                    return match.end()
+        raise ValueError(f'unterminated value at {pos}')
+    match = (_STRING if char == '"' else _SCALAR).match(text, pos)
+    if match is None:
+        raise ValueError(f'expected value at {pos}')
+    return match.end()
+
+
+def _expect(text, pos, chars):
+    """Return (char, position after it) for one of `chars` at `pos` in `text`"""
+    pos = _WHITESPACE.match(text, pos).end()
+    char = text[pos:pos + 1]
+    if not char or char not in chars:
+        raise ValueError(f'expected one of {chars!r} at {pos}')
+    return (char, pos + 1)
+
+
+def _members(text, pos):
+    """Generator yielding (key, start, end) for members of a JSON object.
+
+    The object starts at `pos` in `text`; `start` and `end` delimit the value
+    of each member, which is not decoded.
+    """
+    (_, pos) = _expect(text, pos, '{')
+    if _expect(text, pos, '}"')[0] == '}':
+        return
+    while True:
+        pos = _WHITESPACE.match(text, pos).end()
+        match = _STRING.match(text, pos)
+        if match is None:
+            raise ValueError(f'expected key at {pos}')
+        (_, pos) = _expect(text, match.end(), ':')
+        start = _WHITESPACE.match(text, pos).end()
+        end = _skip(text, start)
+        yield (json.loads(match.group()), start, end)
+        (char, pos) = _expect(text, end, ',}')
+        if char == '}':
+            return
+
+
+def _elements(text, pos):
+    """Generator yielding (start, end) for elements of a JSON array.
+
+    The array starts at `pos` in `text`; elements are not decoded.
+    """
+    (_, pos) = _expect(text, pos, '[')
+    if text[_WHITESPACE.match(text, pos).end():].startswith(']'):
+        return
+    while True:
+        start = _WHITESPACE.match(text, pos).end()
+        end = _skip(text, start)
+        yield (start, end)
+        (char, pos) = _expect(text, end, ',]')
+        if char == ']':
+            return
+
+
+def _timestamp_token(token):
+    """Return the timestamp in JSON `token`, a string or a number"""
+    if token.startswith('"'):
+        return parse_timestamp(json.loads(token))
+    # a number is a relative timestamp, converted exactly
+    return parse_decimal(token)
+
+
+def muxed_fields(line, parsers):
+    """Return (id_, timestamp) from a `line` of multiplexed content, or None.
+
+    Return None if there is no parser in `parsers` for the id in `line`. Only
+    the id and the timestamp within data are decoded: other values in `line`
+    are scanned, to find these, but neither decoded nor validated.
+    """
+    match = _LEADING.match(line)
+    if match is not None:
+        (id_, array, timestamp) = match.groups()
+        if id_ not in parsers:
+            return None
+        if array is None or parsers[id_].elems.index('timestamp') == 0:
+            return (id_, _timestamp_token(timestamp))
+    (id_, data) = (None, None)
+    for (key, start, end) in _members(line, 0):
+        if key == 'id':
+            id_ = json.loads(line[start:end])
+            if id_ not in parsers:
+                return None
+        elif key == 'data':
+            data = start
+        if id_ is not None and data is not None:
+            break
+    else:
+        raise KeyError('id' if id_ is None else 'data')
+    if line[data] == '{':
+        spans = (span for (key, *span) in _members(line, data) if key == 'timestamp')
+    else:
+        idx = parsers[id_].elems.index('timestamp')
+        spans = islice(_elements(line, data), idx, None)
+    try:
+        (start, end) = next(spans)
+    except StopIteration as exc:
+        raise KeyError('timestamp') from exc
+    return (id_, _timestamp_token(line[start:end]))
+
+
+# a line of multiplexed content passed through without parsing its data
+# `timestamp` is parsed, for sequencing; `line` is the line as read
+Passthrough = namedtuple('Passthrough', ('timestamp', 'line'))
+
+
+def muxed_passthrough(file, parsers):
+    """Generator yielding (id_, data) for multiplexed content in `file`.
+
+    As :func:`muxed`, except that `data` is a :class:`Passthrough` value with
+    the timestamp from the value at 'data' and the line, without line ending,
+    as read from `file`. Only the id and timestamp are decoded: see
+    :func:`muxed_fields`.
+
+    `file` is closed just before returning.
+    """
+    while True:
+        line = file.readline()
+        if line == '':
+            file.close()
+            return
+        line = line.rstrip('\r\n')
+        fields = muxed_fields(line, parsers)
+        if fields is not None:
+            yield (fields[0], Passthrough(fields[1], line))
+
+
+def _timestamp(item):
+    """Return the timestamp of (id_, data) `item`"""
+    return item[1].timestamp
+
+
+def _spill(items, dirname):
+    """Write `items` to a new file in directory `dirname`, return its name"""
+    iterator = iter(items)
+    with NamedTemporaryFile('wb', dir=dirname, suffix='.run', delete=False) as fid:
+        while chunk := list(islice(iterator, CHUNK)):
+            pickle.dump(chunk, fid, pickle.HIGHEST_PROTOCOL)
+    return fid.name
+
+
+def _unspill(filename):
+    """Generator yielding items written to file `filename` by :func:`_spill`.
+
+    File `filename` is removed just before returning, unless already removed
+    with its directory.
+    """
+    try:
+        with open(filename, 'rb') as fid:
+            while True:
+                try:
+                    chunk = pickle.load(fid)
+                except EOFError:
+                    return
+                yield from chunk
+    finally:
+        with suppress(FileNotFoundError):
+            os.remove(filename)
+
+
+def sorted_externally(source, run_size=RUN_SIZE, dirname=None, fan_in=FAN_IN):
+    """Generator yielding (id_, data) from `source` sorted by timestamp.
+
+    Items from `source`, in any order, are sorted in memory in runs of up to
+    `run_size` items. If `source` has more items, then each sorted run is
+    written to a temporary file in directory `dirname` (or the default
+    temporary directory) and runs are merged, `fan_in` at a time, until all
+    are merged. Items with equal timestamps are yielded in `source` order.
+    Items must be picklable. Temporary files are removed once read.
+    """
+    with TemporaryDirectory(dir=dirname) as tmpdir:
+        runs = []
+        items = []
+        for item in source:
+            items.append(item)
+            if run_size <= len(items):
+                items.sort(key=_timestamp)
+                runs.append(_spill(items, tmpdir))
+                items = []
+        items.sort(key=_timestamp)
+        if not runs:
+            yield from items
+            return
+        if items:
+            runs.append(_spill(items, tmpdir))
+        items = None
+        while fan_in < len(runs):
+            runs = [
+                _spill(heapq.merge(*map(_unspill, runs[idx:idx + fan_in]), key=_timestamp), tmpdir)
+                for idx in range(0, len(runs), fan_in)
+            ]
+        yield from heapq.merge(*map(_unspill, runs), key=_timestamp)
+
+
+def _put(values, value, stop):
+    """Put `value` to queue `values` unless event `stop` is set.
+
+    Return True if `value` was put.
+    """
+    while not stop.is_set():
         try:
-            parser = parsers[id_]
-        except KeyError:
+            values.put(value, timeout=0.1)
+            return True
+        except queue.Full:
             pass
-        else:
-            if isinstance(obj['data'], dict):
-                data = tuple(obj['data'][name] for name in parser.elems)
-            else:
-                data = obj['data']
-            parsed = parser.make_parsed(data)
-            yield (id_, parsed)
+    return False
+
+
+def _produce(source, values, stop, batch, eager=True):
+    """Put batches of items from `source` to queue `values` until `stop`.
+
+    A batch is put once it contains `batch` items or, if `eager`, when `values`
+    is empty, so that items are not held back from a waiting consumer. The end
+    of `source` is marked by None; an exception raised by `source` is put in
+    place of further batches.
+    """
+    items = []
+    try:
+        for item in source:
+            items.append(item)
+            if batch <= len(items) or (eager and values.empty()):
+                if not _put(values, items, stop):
+                    return
+                items = []
+    except Exception as exc: # pylint: disable=broad-exception-caught
+        if items and not _put(values, items, stop):
+            return
+        _put(values, exc, stop)
+        return
+    if items and not _put(values, items, stop):
+        return
+    _put(values, None, stop)
+
+
+def _produce_from(factory, args, values, stop, batch, eager=True):
+    """Put batches of items from the source returned by `factory`(*`args`)"""
+    try:
+        source = factory(*args)
+    except Exception as exc: # pylint: disable=broad-exception-caught
+        _put(values, exc, stop)
+        return
+    _produce(source, values, stop, batch, eager)
+    if stop.is_set():
+        # do not wait to flush items the consumer will never get
+        values.cancel_join_thread()
+
+
+def _consume(values, stop, finish=None):
+    """Generator yielding items from batches in queue `values`.
+
+    Set `stop`, then call `finish` (if not None), before returning.
+    """
+    try:
+        while True:
+            value = values.get()
+            if value is None:
+                return
+            if isinstance(value, Exception):
+                raise value
+            yield from value
+    finally:
+        stop.set()
+        if finish is not None:
+            finish()
+
+
+def _finish_process(process, timeout=1):
+    """Wait up to `timeout` seconds for `process` to exit, then terminate it"""
+    process.join(timeout)
+    if process.is_alive():
+        process.terminate()
+        process.join()
+
+
+def readahead(source, maxsize, batch=BATCH):
+    """Return a generator yielding the items of `source`, read ahead.
+
+    A background thread pulls items from `source`, a generator such as those
+    returned by :func:`logged` and :func:`muxed`, so that reading and parsing
+    overlaps with consuming items and with reading other sources. Up to about
+    `maxsize` items are held in a queue, in batches of up to `batch` items.
+    Exceptions raised by `source` are raised by the returned generator.
+    """
+    values = queue.Queue(max(1, maxsize // batch))
+    stop = threading.Event()
+    producer = threading.Thread(target=_produce, args=(source, values, stop, batch), daemon=True)
+    producer.start()
+    # the producer may be blocked reading `source`: it is a daemon thread so
+    # need not be waited for, and stops after putting at most one more batch
+    return _consume(values, stop)
+
+
+def readahead_process(factory, args, maxsize, batch=BATCH, eager=True):
+    """Return a generator yielding the items of a source, read ahead.
+
+    As :func:`readahead`, except that the source is returned by calling
+    `factory` with `args` in a background process, so that parsing runs in
+    parallel with other sources. `factory`, `args` and items of the source
+    must be picklable. If `eager` is falsy, then only full batches of items
+    are put (except the last): pickling many small batches is costly.
+    """
+    values = multiprocessing.Queue(max(1, maxsize // batch))
+    stop = multiprocessing.Event()
+    producer = multiprocessing.Process(
+        target=_produce_from, args=(factory, args, values, stop, batch, eager), daemon=True,
+    )
+    producer.start()
+    return _consume(values, stop, lambda: _finish_process(producer))
@@ -0,0 +1,307 @@
+### SPDX-License-Identifier: GPL-2.0-or-later
+
+"""Statistics of sample values"""
+
+import math
+
+import numpy as np
+
+# number of values reduced at a time: small enough for a block of float64
+# values to stay in cache while every statistic is accumulated from it
+BLOCK_SIZE = 16384
+
+# default upper bound on the number of occupied bins in a histogram
+MAX_BINS = 4096
+
+
+def as_array(values):
+    """Return `values` as a contiguous one-dimensional float64 array.
+
+    `values` may be any sequence or array accepted by numpy, including a
+    :class:`pandas.Series` of integer, float or :class:`Decimal` values.
+    """
+    return np.ascontiguousarray(values, dtype=np.float64).reshape(-1)
+
+
+def _native(values, idx):
+    """Return the value at position `idx` of `values` as a native Python value"""
+    value = values.iloc[idx] if hasattr(values, 'iloc') else values[idx]
+    try:
+        return value.item()
+    except AttributeError:
+        return value
+
+
+class Summary():
+    """Summary statistics of sample values, accumulated in a single pass.
+
+    Values are reduced block by block: each block is loaded once and reduced to
+    count, minimum, maximum, mean and sum of squared deviations from the mean,
+    which are then combined with those of preceding blocks. Summaries of
+    disjoint values may be combined in the same way using :meth:`merge`.
+
+    The minimum and maximum are the sample values themselves, as native Python
+    values: integer samples have integer extremes and range.
+    """
+    def __init__(self, values=()):
+        self.count = 0
+        self.min = math.nan
+        self.max = math.nan
+        self.mean = math.nan
+        # sum of squared deviations from the mean
+        self.m2 = 0.0
+        self.update(values)
+
+    def _combine(self, count, min_, max_, mean, m2):
+        """Combine statistics of other values into this summary"""
+        if count == 0:
+            return
+        if self.count == 0:
+            (self.count, self.min, self.max, self.mean, self.m2) = (count, min_, max_, mean, m2)
+            return
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += m2 + delta * delta * self.count * count / total
+        self.min = min(self.min, min_)
+        self.max = max(self.max, max_)
+        self.count = total
+
+    def update(self, values):
+        """Accumulate statistics of `values` into this summary"""
+        arr = as_array(values)
+        for idx in range(0, len(arr), BLOCK_SIZE):
+            block = arr[idx:idx + BLOCK_SIZE]
+            mean = block.sum() / len(block)
+            dev = block - mean
+            self._combine(
+                len(block),
+                _native(values, idx + int(block.argmin())), _native(values, idx + int(block.argmax())),
+                float(mean), float(np.dot(dev, dev)),
+            )
+        return self
+
+    def merge(self, other):
+        """Combine statistics of `other`, a :class:`Summary`, into this summary"""
+        self._combine(other.count, other.min, other.max, other.mean, other.m2)
+        return self
+
+    @property
+    def range(self):
+        """The difference between maximum and minimum values"""
+        return self.max - self.min
+
+    def variance(self, ddof=1):
+        """Return the variance, normalized by count - `ddof`"""
+        if self.count <= ddof:
+            return math.nan
+        return self.m2 / (self.count - ddof)
+
+    def stddev(self, ddof=1):
+        """Return the standard deviation, normalized by count - `ddof`"""
+        return math.sqrt(self.variance(ddof))
+
+
+class Histogram():
+    """Histogram of sample values in fixed-width bins, in bounded memory.
+
+    Bin `idx` counts values in the interval [idx * width, (idx + 1) * width).
+    Only occupied bins are stored: if more than `max_bins` bins are occupied,
+    then bin width is doubled (merging adjacent bins) until no more than
+    `max_bins` bins are occupied. Histograms of disjoint values may be combined
+    using :meth:`merge`.
+
+    Percentiles are computed from the lower edges of bins: they are exact for
+    integer values in bins of unit width, otherwise accurate to one bin width.
+    """
+    def __init__(self, values=(), width=1, max_bins=MAX_BINS):
+        self.width = width
+        self.max_bins = max_bins
+        self.count = 0
+        self._bins = {}
+        self.update(values)
+
+    @staticmethod
+    def _coarsen(bins, factor):
+        """Return a dict of `bins` with indices for `factor` times bin width"""
+        coarse = {}
+        for (idx, count) in bins.items():
+            coarse[idx // factor] = coarse.get(idx // factor, 0) + count
+        return coarse
+
+    def _add(self, bins):
+        """Add counts in `bins`, a dict of counts for this histogram's width"""
+        for (idx, count) in bins.items():
+            self._bins[idx] = self._bins.get(idx, 0) + count
+            self.count += count
+        while len(self._bins) > self.max_bins:
+            self._bins = self._coarsen(self._bins, 2)
+            self.width *= 2
+
+    def update(self, values):
+        """Count `values` into this histogram"""
+        arr = as_array(values)
+        if len(arr):
+            (idxs, counts) = np.unique(
+                np.floor(arr / self.width).astype(np.int64),
+                return_counts=True,
+            )
+            self._add(dict(zip(idxs.tolist(), counts.tolist())))
+        return self
+
+    def merge(self, other):
+        """Combine counts in `other`, a :class:`Histogram`, into this histogram.
+
+        Raise :class:`ValueError` if bin widths differ other than by a power of
+        two multiple.
+        """
+        (wide, narrow) = sorted((self.width, other.width), reverse=True)
+        factor = wide / narrow
+        if factor != 2 ** int(math.log2(factor)):
+            raise ValueError(f'incompatible bin widths {self.width}, {other.width}')
+        factor = int(factor)
+        if self.width < wide:
+            self._bins = self._coarsen(self._bins, factor)
+            self.width = wide
+            self._add({})
+        self._add(other._bins if other.width == wide else self._coarsen(other._bins, factor))
+        return self
+
+    def bins(self):
+        """Return a list of (low, count) pairs for occupied bins.
+
+        `low` is the lower edge of a bin; pairs are in ascending `low` order.
+        """
+        return [(idx * self.width, self._bins[idx]) for idx in sorted(self._bins)]
+
+    def percentiles(self, pcts, absolute=False):
+        """Return a list of the percentiles in `pcts` of counted values.
+
+        Each percentile in `pcts` is a number in the range [0, 100]. Percentiles
+        are interpolated linearly between nearest ranks. If `absolute` then
+        return percentiles of the absolute values counted.
+        """
+        if self.count == 0:
+            return [math.nan] * len(pcts)
+        idxs = np.array(sorted(self._bins), dtype=np.int64)
+        counts = np.array([self._bins[idx] for idx in idxs.tolist()])
+        values = idxs * self.width
+        if absolute:
+            values = np.abs(values)
+            order = np.argsort(values, kind='stable')
+            (values, counts) = (values[order], counts[order])
+        cum = np.cumsum(counts)
+        ranks = np.asarray(pcts, dtype=np.float64) / 100 * (self.count - 1)
+        low = values[np.searchsorted(cum, np.floor(ranks), side='right')]
+        high = values[np.searchsorted(cum, np.ceil(ranks), side='right')]
+        return [float(val) for val in low + (ranks - np.floor(ranks)) * (high - low)]
+
+
+def _windows(index, count, min_, max_, total, flagged):
+    """Return a tuple of arrays of windows reduced from per-sample or per-window arrays.
+
+    Arrays are (index, count, min, max, total, flagged) of windows in
+    ascending index order.
+    """
+    if np.any(index[1:] < index[:-1]):
+        order = np.argsort(index, kind='stable')
+        (index, count, min_, max_, total, flagged) = (
+            arr[order] for arr in (index, count, min_, max_, total, flagged)
+        )
+    # the first element of each window
+    starts = np.flatnonzero(np.diff(index, prepend=index[0] - 1))
+    return (
+        index[starts],
+        np.add.reduceat(count, starts),
+        np.minimum.reduceat(min_, starts),
+        np.maximum.reduceat(max_, starts),
+        np.add.reduceat(total, starts),
+        np.add.reduceat(flagged, starts),
+    )
+
+
+class Windows():
+    """Summary statistics of sample values in fixed-width time windows.
+
+    Window `idx` summarizes values with timestamps in the interval
+    [idx * width, (idx + 1) * width): the count, minimum, maximum and sum of
+    values, and the count of flagged values. Only occupied windows are stored.
+    Values are reduced to windows a block at a time, in a single vectorized
+    pass. Windows of disjoint values may be combined using :meth:`merge`.
+
+    Windows are stored in runs of ascending index. Windows of values following
+    those already summarized only combine with the last window stored, so the
+    cost of summarizing values does not grow with the number of windows.
+    """
+    def __init__(self, timestamps=(), values=(), width=1, flags=None):
+        self.width = width
+        # runs of windows, each a tuple of arrays as returned by _windows,
+        # in ascending index order: runs are never modified once stored
+        self._runs = []
+        self.update(timestamps, values, flags)
+
+    def _add(self, run):
+        """Add `run`, a tuple of arrays of windows, to this summary's windows"""
+        if len(run[0]) == 0:
+            return
+        if self._runs:
+            last = self._runs[-1]
+            if run[0][0] < last[0][-1]:
+                # windows out of order: reduce all windows again
+                self._runs = [_windows(*(np.concatenate(arrs) for arrs in zip(*self._runs, run)))]
+                return
+            if run[0][0] == last[0][-1]:
+                # combine the last window stored with the first window of `run`
+                head = _windows(*(np.concatenate((prev[-1:], arr[:1])) for (prev, arr) in zip(last, run)))
+                run = tuple(np.concatenate((first, arr[1:])) for (first, arr) in zip(head, run))
+                if len(last[0]) == 1:
+                    self._runs.pop()
+                else:
+                    self._runs[-1] = tuple(arr[:-1] for arr in last)
+        self._runs.append(run)
+
+    def update(self, timestamps, values, flags=None):
+        """Summarize `values` at `timestamps` into this summary's windows.
+
+        If not None, `flags` is a sequence of truthy values for `values` to
+        count as flagged.
+        """
+        arr = as_array(values)
+        for idx in range(0, len(arr), BLOCK_SIZE):
+            block = arr[idx:idx + BLOCK_SIZE]
+            index = np.floor(as_array(timestamps[idx:idx + BLOCK_SIZE]) / self.width).astype(np.int64)
+            if flags is None:
+                flagged = np.zeros(len(block), dtype=np.int64)
+            else:
+                flagged = np.asarray(flags[idx:idx + BLOCK_SIZE], dtype=bool).astype(np.int64)
+            if len(block):
+                self._add(_windows(index, np.ones(len(block), dtype=np.int64), block, block, block, flagged))
+        return self
+
+    def merge(self, other):
+        """Combine windows of `other`, a :class:`Windows`, into this summary.
+
+        Raise :class:`ValueError` if window widths differ.
+        """
+        if other.width != self.width:
+            raise ValueError(f'incompatible window widths {self.width}, {other.width}')
+        for run in other._runs:
+            self._add(run)
+        return self
+
+    def windows(self):
+        """Return a list of (low, count, min, max, mean, flagged) for windows.
+
+        `low` is the lower edge of a window; tuples are in ascending `low` order.
+        """
+        if not self._runs:
+            return []
+        (index, count, min_, max_, total, flagged) = (np.concatenate(arrs) for arrs in zip(*self._runs))
+        return list(zip(
+            (index * self.width).tolist(),
+            count.tolist(),
+            min_.tolist(),
+            max_.tolist(),
+            (total / np.maximum(count, 1)).tolist(),
+            flagged.tolist(),
+        ))
@@ -2,15 +2,20 @@
 
 """Test cases for vse_sync_pp.analyzers"""
 
+import pickle
 from unittest import TestCase
 from os.path import join as joinpath
 from os.path import dirname
 
 from nose2.tools import params
 
+import allantools
+import numpy as np
+
 from vse_sync_pp.analyzers.analyzer import (
     Config,
     CollectionIsClosed,
+    calculate_tdev,
 )
 
 from .. import make_fqname
@@ -75,6 +80,10 @@ class TestConfig(TestCase):
         config = Config(requirements='G.8272/PRTC-A')
         key = 'time-error-in-locked-mode/ns'
         self.assertEqual(config.requirement(key), 100)
+        # compiled requirements are shared by configs
+        key = 'time-deviation-in-locked-mode/ns'
+        self.assertIs(config.requirement(key), Config(requirements='G.8272/PRTC-A').requirement(key))
+        self.assertEqual(config.requirement(key).limit(150), 4.5)
 
     def test_parameter_errors(self):
         """Test vse_sync_pp.analyzers.analyzer.Config.parameter errors"""
@@ -116,6 +125,35 @@ class TestConfig(TestCase):
         config = Config(parameters={'xxyyz': 'success'})
         self.assertEqual(config.parameter('xxyyz'), 'success')
 
+    def test_parameter_default(self):
+        """Test vse_sync_pp.analyzers.analyzer.Config.parameter default"""
+        config = Config()
+        self.assertEqual(config.parameter('foo', 'bar'), 'bar')
+        self.assertIsNone(config.parameter('foo', None))
+        config = Config(parameters={'xxyyz': 'success'})
+        self.assertEqual(config.parameter('xxyyz', 'failure'), 'success')
+        self.assertEqual(config.parameter('quux', ()), ())
+
+    @params(
+        (None, 0, "parameter foo must be positive, not 0"),
+        (None, -1.5, "parameter foo must be positive, not -1.5"),
+        ('bar', 'baz', "parameter foo must be positive, not 'baz' in config file bar"),
+    )
+    def test_positive_parameter_errors(self, filename, value, reason):
+        """Test vse_sync_pp.analyzers.analyzer.Config.positive_parameter errors"""
+        config = Config(filename, parameters={'foo': value})
+        with self.assertRaises(ValueError) as ctx:
+            config.positive_parameter('foo')
+        self.assertEqual(str(ctx.exception), reason)
+
+    def test_positive_parameter_success(self):
+        """Test vse_sync_pp.analyzers.analyzer.Config.positive_parameter success"""
+        config = Config(parameters={'foo': 0.5})
+        self.assertEqual(config.positive_parameter('foo'), 0.5)
+        self.assertIsNone(config.positive_parameter('bar', None))
+        with self.assertRaises(KeyError):
+            config.positive_parameter('bar')
+
     def test_yaml(self):
         """Test vse_sync_pp.analyzers.analyzer.Config.from_yaml"""
         filename = joinpath(dirname(__file__), 'config.yaml')
@@ -128,6 +166,48 @@ class TestConfig(TestCase):
         self.assertEqual(config.parameter('baz'), 8)
 
 
+class TestCalculateTdev(TestCase):
+    """Tests for vse_sync_pp.analyzers.analyzer.calculate_tdev"""
+    # observation intervals used by time deviation analyzers
+    taus = np.concatenate((
+        [1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 20, 30, 40, 50, 60, 70, 80, 90],
+        [100, 200, 300, 400, 500, 600, 700, 800, 900, 1000, 2000, 3000],
+        [4000, 5000, 6000, 7000, 8000, 9000, 10000],
+        np.arange(15000, 100000, 5000),
+    ))
+
+    @params(
+        (8, 1, 0),
+        (100, 1, 1),
+        (3001, 1, 2),
+        (20000, 1, 3),
+        (5000, 8, 4),
+        (4000, 16, 5),
+    )
+    def test_allantools(self, size, rate, seed):
+        """Test vse_sync_pp.analyzers.analyzer.calculate_tdev matches allantools"""
+        rng = np.random.default_rng(seed)
+        # white phase noise on a random walk in phase, with an offset
+        phase = 100 + rng.normal(0, 5, size) + np.cumsum(rng.normal(0, 0.5, size))
+        (taus, samples) = calculate_tdev(phase, rate, self.taus)
+        (etaus, esamples, _, _) = allantools.tdev(phase, rate=rate, data_type="phase", taus=self.taus)
+        self.assertEqual(len(taus), len(etaus))
+        np.testing.assert_allclose(taus, etaus)
+        np.testing.assert_allclose(samples, esamples, rtol=1e-9)
+
+    def test_constant(self):
+        """Test vse_sync_pp.analyzers.analyzer.calculate_tdev of constant phase"""
+        (taus, samples) = calculate_tdev(np.full(10, 7.5), 1, self.taus)
+        self.assertEqual(taus.tolist(), [1, 2, 3])
+        self.assertEqual(samples.tolist(), [0, 0, 0])
+
+    def test_short(self):
+        """Test vse_sync_pp.analyzers.analyzer.calculate_tdev of too few samples"""
+        (taus, samples) = calculate_tdev(np.arange(3.0), 1, self.taus)
+        self.assertEqual(len(taus), 0)
+        self.assertEqual(len(samples), 0)
+
+
 class AnalyzerTestBuilder(type):
     """Build tests for vse_sync_pp.analyzers
 
@@ -155,6 +235,10 @@ class AnalyzerTestBuilder(type):
                 constructor, fqname,
                 dct['expect'],
             ),
+            'test_merge': cls.make_test_merge(
+                constructor, fqname,
+                dct['expect'],
+            ),
         })
         return super().__new__(cls, name, bases, dct)
 
@@ -208,3 +292,31 @@ class AnalyzerTestBuilder(type):
             self.assertEqual(analyzer.analysis, analysis)
         method.__doc__ = f'Test {fqname} analyzer test result and analysis'
         return method
+
+    @staticmethod
+    def make_test_merge(constructor, fqname, expect):
+        """Make a function testing analyzer result and analysis from shards"""
+        @params(*expect)
+        def method(self, dct):
+            """Test analyzer result and analysis from merged shards"""
+            config = Config(None, dct['requirements'], dct['parameters'])
+            rows = dct['rows']
+            for splits in ((0,), (1,), (len(rows) // 2,), (len(rows) - 1,), (1, len(rows) // 2)):
+                bounds = (0,) + splits + (len(rows),)
+                partials = []
+                for (start, end) in zip(bounds, bounds[1:]):
+                    shard = constructor(config)
+                    shard.collect(*rows[start:end])
+                    partials.append(pickle.loads(pickle.dumps(shard.partial())))
+                analyzer = constructor(config)
+                for partial in partials:
+                    analyzer.merge(partial)
+                self.assertEqual(analyzer.result, dct['result'])
+                self.assertEqual(analyzer.reason, dct['reason'])
+                self.assertEqual(analyzer.timestamp, dct['timestamp'])
+                self.assertEqual(analyzer.duration, dct['duration'])
+                self.assertEqual(analyzer.analysis, dct['analysis'])
+                with self.assertRaises(CollectionIsClosed):
+                    analyzer.partial()
+        method.__doc__ = f'Test {fqname} analyzer result and analysis from merged shards'
+        return method
@@ -6,6 +6,7 @@ from unittest import TestCase
 from collections import namedtuple
 from decimal import Decimal
 
+from vse_sync_pp.analyzers.analyzer import Config
 from vse_sync_pp.analyzers.pmc import ClockStateAnalyzer
 
 from .test_analyzer import AnalyzerTestBuilder
@@ -2533,3 +2534,27 @@ class TestClockStateAnalyzer(TestCase, metaclass=AnalyzerTestBuilder):
             }
         },
     )
+
+
+class TestClockStateHeatmap(TestCase):
+    """Test cases for vse_sync_pp.analyzers.pmc.ClockStateAnalyzer.toheatmap"""
+    def test_toheatmap(self):
+        """Test vse_sync_pp.analyzers.pmc.ClockStateAnalyzer.toheatmap"""
+        analyzer = ClockStateAnalyzer(Config(None, None, {'min-test-duration/s': 1}))
+        for (idx, clock_class) in enumerate((248, 6, 6, 7, 6, 248)):
+            analyzer.collect(CLOCK_CLASS(Decimal(idx), clock_class, '0xFE', '0xFFFF'))
+        # testing and explaining data must not affect transition counts
+        self.assertEqual(analyzer.reason, "illegal state transition")
+        self.assertEqual(analyzer.analysis['total_transitions'], 4)
+        (names, matrix, unallowed) = analyzer.toheatmap()
+        self.assertEqual(names[:3], ['FREERUN', 'LOCKED', 'HOLDOVER_IN_SPEC'])
+        self.assertEqual(len(names), 6)
+        self.assertEqual(matrix[0][:3], [0, 1, 0])
+        self.assertEqual(matrix[1][:3], [1, 1, 1])
+        self.assertEqual(matrix[2][:3], [0, 1, 0])
+        self.assertEqual(sum(map(sum, matrix)), 5)
+        # FREERUN may only transition to FREERUN or LOCKED
+        self.assertEqual([col for (row, col) in unallowed if row == 0], [2, 3, 4, 5])
+        # LOCKED may only transition to LOCKED or HOLDOVER_IN_SPEC
+        self.assertIn((1, 0), unallowed)
+        self.assertNotIn((1, 2), unallowed)
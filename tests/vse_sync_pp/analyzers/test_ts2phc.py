@@ -4,9 +4,17 @@
 
 from unittest import TestCase
 from collections import namedtuple
+from datetime import (
+    datetime,
+    timezone,
+)
 from decimal import Decimal
 import math
+import time
+
+from nose2.tools import params
 
+from vse_sync_pp.analyzers.analyzer import Config
 from vse_sync_pp.analyzers.ts2phc import (
     TimeErrorAnalyzer,
     TimeDeviationAnalyzer,
@@ -248,9 +256,134 @@ class TestTimeErrorAnalyzer(TestCase, metaclass=AnalyzerTestBuilder):
                 },
             },
         },
+        {
+            'requirements': 'G.8272/PRTC-A',
+            'parameters': {
+                'time-error-limit/%': 100,
+                'transient-period/s': 1,
+                'min-test-duration/s': 4,
+                'time-error-percentiles': [50, 75, 100],
+                'time-error-histogram-bin/ns': 2,
+            },
+            'rows': (
+                TERR(Decimal(0), 0, 's2'),
+                TERR(Decimal(1), -4, 's2'),
+                TERR(Decimal(2), 2, 's2'),
+                TERR(Decimal(3), 0, 's2'),
+                TERR(Decimal(4), -2, 's2'),
+                TERR(Decimal(5), 4, 's2'),
+            ),
+            'result': True,
+            'reason': None,
+            'timestamp': Decimal(1),
+            'duration': Decimal(4),
+            'analysis': {
+                'terror': {
+                    'units': 'ns',
+                    'min': -4,
+                    'max': 4,
+                    'range': 8,
+                    'mean': 0,
+                    'stddev': round(math.sqrt(10), 3),
+                    'variance': 10,
+                    'abs_percentiles': {
+                        'p50': 2,
+                        'p75': 4,
+                        'p100': 4,
+                    },
+                    'histogram': {
+                        'width': 2,
+                        'bins': [[-4, 1], [-2, 1], [0, 1], [2, 1], [4, 1]],
+                    },
+                },
+            },
+        },
+        {
+            'requirements': 'G.8272/PRTC-A',
+            'parameters': {
+                'time-error-limit/%': 4,
+                'transient-period/s': 1,
+                'min-test-duration/s': 4,
+                'time-error-window/s': 2,
+            },
+            'rows': (
+                TERR(Decimal(0), 0, 's2'),
+                TERR(Decimal(1), -4, 's2'),
+                TERR(Decimal(2), 2, 's2'),
+                TERR(Decimal(3), 0, 's0'),
+                TERR(Decimal(4), -2, 's2'),
+                TERR(Decimal(5), 4, 's2'),
+                TERR(Decimal(6), 1, 's2'),
+                TERR(Decimal(7), 3, 's2'),
+            ),
+            'result': False,
+            'reason': "loss of lock",
+            'timestamp': Decimal(1),
+            'duration': Decimal(6),
+            'analysis': {
+                'terror': {
+                    'units': 'ns',
+                    'min': -4,
+                    'max': 4,
+                    'range': 8,
+                    'mean': round(4 / 7, 3),
+                    'stddev': round(math.sqrt(334 / 42), 3),
+                    'variance': round(334 / 42, 3),
+                },
+                'windows': {
+                    'width': 2,
+                    'units': 'ns',
+                    'columns': ['timestamp', 'count', 'min', 'max', 'mean', 'locked', 'result'],
+                    'rows': [
+                        [0, 1, -4, -4, -4, True, False],
+                        [2, 2, 0, 2, 1, False, False],
+                        [4, 2, -2, 4, 1, True, False],
+                        [6, 2, 1, 3, 2, True, True],
+                    ],
+                },
+            },
+        },
     )
 
 
+class TestTimeErrorParameters(TestCase):
+    """Test cases for optional parameters of vse_sync_pp.analyzers.ts2phc.TimeErrorAnalyzer"""
+    @staticmethod
+    def config(window, **parameters):
+        """Return a config explaining time error windows of `window` seconds"""
+        return Config(None, 'G.8272/PRTC-A', {
+            'time-error-limit/%': 100,
+            'transient-period/s': 1,
+            'min-test-duration/s': 4,
+            'time-error-window/s': window,
+            **parameters,
+        })
+
+    def test_absolute(self):
+        """Test windows of absolute timestamps are formatted as the analysis timestamp"""
+        start = int(time.time()) // 10 * 10
+        analyzer = TimeErrorAnalyzer(self.config(10))
+        analyzer.collect(*(TERR(Decimal(start + idx), 0, 's2') for idx in range(30)))
+        self.assertEqual(
+            [row[0] for row in analyzer.analysis['windows']['rows']],
+            [datetime.fromtimestamp(start + low, tz=timezone.utc).isoformat() for low in (0, 10, 20)],
+        )
+        self.assertEqual(analyzer.timestamp, datetime.fromtimestamp(start + 1, tz=timezone.utc).isoformat())
+
+    @params(0, -2)
+    def test_window_error(self, window):
+        """Test a non-positive window is rejected when the analyzer is built"""
+        with self.assertRaises(ValueError):
+            TimeErrorAnalyzer(self.config(window))
+
+    @params(0, -1)
+    def test_histogram_error(self, width):
+        """Test a non-positive histogram bin width is rejected when the analyzer is built"""
+        with self.assertRaises(ValueError) as ctx:
+            TimeErrorAnalyzer(self.config(10, **{'time-error-histogram-bin/ns': width}))
+        self.assertEqual(str(ctx.exception), f'parameter time-error-histogram-bin/ns must be positive, not {width}')
+
+
 class TestMaxTimeIntervalErrorAnalyzer(TestCase, metaclass=AnalyzerTestBuilder):
     """Test cases for vse_sync_pp.analyzers.ts2phc.MaxTimeIntervalErrorAnalyzer"""
     constructor = MaxTimeIntervalErrorAnalyzer
@@ -3,6 +3,7 @@
 """Test cases for vse_sync_pp.parsers"""
 
 import json
+import pickle
 from io import StringIO
 
 from unittest import TestCase
@@ -106,6 +107,9 @@ class ParserTestBuilder(type):
             """Test parser makes parsed"""
             parser = constructor()
             self.assertEqual(parser.make_parsed(expect), expect)
+            # parsed values can be transferred between processes
+            parsed = parser.make_parsed(expect)
+            self.assertEqual(pickle.loads(pickle.dumps(parsed)), parsed)
             with self.assertRaises(ValueError):
                 parser.make_parsed(expect[:-1])
         method.__doc__ = f'Test {fqname} make parsed'
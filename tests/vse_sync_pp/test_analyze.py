@@ -0,0 +1,256 @@
+### SPDX-License-Identifier: GPL-2.0-or-later
+
+"""Test cases for vse_sync_pp.analyze"""
+
+import os
+from io import StringIO
+from json import dumps
+from tempfile import TemporaryDirectory
+
+from unittest import TestCase
+from nose2.tools import params
+
+from vse_sync_pp.analyze import (
+    analyze,
+    analyze_cached,
+    analyze_handoff,
+    analyze_profiles,
+    plot_curves,
+)
+from vse_sync_pp.analyzers import (
+    ANALYZERS,
+    Config,
+)
+from vse_sync_pp.generate import (
+    GENERATORS,
+    Model,
+)
+from vse_sync_pp.parsers import PARSERS
+from vse_sync_pp.shm import (
+    Block,
+    encode,
+)
+from vse_sync_pp.common import JsonEncoder
+from vse_sync_pp.cache import (
+    Cache,
+    digest_file,
+)
+from vse_sync_pp.profiling import (
+    Profiler,
+    profiling,
+)
+
+PARAMETERS = {
+    'transient-period/s': 1,
+    'min-test-duration/s': 10,
+    'time-error-limit/%': 100,
+    'time-deviation-limit/%': 100,
+}
+
+# canonical ts2phc time error, with time deviation between the
+# PRTC-B and PRTC-A masks
+INPUT = ''.join(
+    f'[{idx}, "ens7f1", {(-1) ** idx * 12 + 3 * (idx % 3)}, "s2"]\n' for idx in range(40)
+)
+
+
+def make_analyzers(id_, *requirements):
+    """Return a list of analyzers with `id_` for each of `requirements`"""
+    return [ANALYZERS[id_](Config(None, reqs, PARAMETERS)) for reqs in requirements]
+
+
+class TestAnalyzeProfiles(TestCase):
+    """Test cases for vse_sync_pp.analyze.analyze_profiles"""
+    def test_profiles(self):
+        """Test vse_sync_pp.analyze.analyze_profiles tests each profile"""
+        requirements = ('G.8272/PRTC-A', 'G.8272/PRTC-B')
+        analyzers = make_analyzers('ts2phc/time-deviation', *requirements)
+        dcts = analyze_profiles(analyzers, StringIO(INPUT), True)
+        self.assertEqual([dct['result'] for dct in dcts], [True, False])
+        self.assertEqual(dcts[1]['reason'], "unacceptable time deviation")
+        # data is collected and time deviation computed once for both profiles
+        self.assertIs(analyzers[0]._data, analyzers[1]._data)
+        self.assertIs(analyzers[0]._samples, analyzers[1]._samples)
+        # each profile has the same outcome as when analyzed alone
+        for (reqs, dct) in zip(requirements, dcts):
+            (analyzer,) = make_analyzers('ts2phc/time-deviation', reqs)
+            self.assertEqual(analyze(analyzer, StringIO(INPUT), True), dct)
+
+    @params(
+        ({}, {}, True),
+        ({'time-error-window/s': 10}, {'time-error-window/s': 10}, True),
+        ({'time-error-window/s': 10}, {'time-error-window/s': 20}, False),
+        ({'transient-period/s': 1}, {'transient-period/s': 2}, False),
+    )
+    def test_collect_once(self, first, second, shared):
+        """Test vse_sync_pp.analyze.analyze_profiles collects data once per collection key"""
+        parameters = (dict(PARAMETERS, **first), dict(PARAMETERS, **second))
+        configs = [Config(None, reqs, params) for (reqs, params) in zip(('G.8272/PRTC-A', 'G.8272/PRTC-B'), parameters)]
+        analyzers = [ANALYZERS['ts2phc/time-error'](config) for config in configs]
+        dcts = analyze_profiles(analyzers, StringIO(INPUT), True)
+        self.assertEqual(analyzers[0]._data is analyzers[1]._data, shared)
+        # each profile has the same outcome as when analyzed alone
+        for (config, dct) in zip(configs, dcts):
+            analyzer = ANALYZERS['ts2phc/time-error'](config)
+            self.assertEqual(analyze(analyzer, StringIO(INPUT), True), dct)
+
+    def test_int_extremes(self):
+        """Test vse_sync_pp.analyze.analyze_profiles keeps integer time error extremes"""
+        (analyzer,) = make_analyzers('ts2phc/time-error', 'G.8272/PRTC-A')
+        terror = analyze(analyzer, StringIO(INPUT), True)['analysis']['terror']
+        self.assertEqual({type(terror[key]) for key in ('min', 'max', 'range')}, {int})
+
+    def test_parsers(self):
+        """Test vse_sync_pp.analyze.analyze_profiles rejects differing parsers"""
+        analyzers = (
+            make_analyzers('ts2phc/time-error', 'G.8272/PRTC-A')
+            + make_analyzers('phc2sys/time-error', 'G.8272/PRTC-A')
+        )
+        with self.assertRaises(ValueError):
+            analyze_profiles(analyzers, StringIO(INPUT), True)
+
+    def test_profiling(self):
+        """Test vse_sync_pp.analyze.analyze_profiles records stages if profiling"""
+        analyzers = make_analyzers('ts2phc/time-deviation', 'G.8272/PRTC-A', 'G.8272/PRTC-B')
+        profiler = Profiler()
+        with profiling(profiler):
+            analyze_profiles(analyzers, StringIO(INPUT), True)
+        stages = profiler.report()['stages']
+        self.assertEqual(
+            list(stages),
+            ['parse', 'read', 'collect', 'close', 'test', 'tdev', 'rate', 'lpf', 'explain'],
+        )
+        for name in ('read', 'parse', 'collect'):
+            self.assertEqual(stages[name]['items'], 40)
+        # data is closed once and curves computed once; each analyzer tests its data
+        self.assertEqual([stages[name]['calls'] for name in ('close', 'test', 'lpf', 'tdev')], [1, 2, 1, 1])
+
+
+# parameters exercising every part of time error analysis
+HANDOFF_PARAMETERS = {
+    'transient-period/s': 10,
+    'min-test-duration/s': 10,
+    'time-error-limit/%': 100,
+    'time-deviation-limit/%': 100,
+    'time-error-percentiles': [50, 99],
+    'time-error-histogram-bin/ns': 2,
+    'time-error-window/s': 60,
+}
+
+
+class TestAnalyzeHandoff(TestCase):
+    """Test cases for vse_sync_pp.analyze.analyze_handoff"""
+    @params(
+        ('ts2phc/time-error', 'ts2phc/time-deviation'),
+        ('phc2sys/time-error',),
+        ('ppsdpll/time-error',),
+        ('gnss/time-error',),
+    )
+    def test_handoff(self, *ids):
+        """Test vse_sync_pp.analyze.analyze_handoff analyzes as analyze_profiles"""
+        parser = ANALYZERS[ids[0]].parser
+        model = Model(losses=20, loss_duration=30)
+        with TemporaryDirectory() as dirname:
+            filename = os.path.join(dirname, 'input.log')
+            with open(filename, 'w', encoding='utf-8') as fid:
+                fid.write(''.join(line + '\n' for line in GENERATORS[parser](9000, seed=4, model=model)))
+            for id_ in ids:
+                analyzers = [ANALYZERS[id_](Config(None, 'G.8272/PRTC-A', HANDOFF_PARAMETERS))]
+                dcts = analyze_handoff(analyzers, filename)
+                analyzers = [ANALYZERS[id_](Config(None, 'G.8272/PRTC-A', HANDOFF_PARAMETERS))]
+                with open(filename, encoding='utf-8') as fid:
+                    expect = analyze_profiles(analyzers, fid)
+                # output is identical, including the types of values
+                self.assertEqual(dumps(dcts, cls=JsonEncoder), dumps(expect, cls=JsonEncoder))
+
+    @params(1, 7, 50)
+    def test_collect_block(self, size):
+        """Test time error analyzers collect blocks spanning the transient period"""
+        parser = PARSERS['ts2phc/time-error']()
+        items = [('ts2phc', parser.parse_line(line)) for line in GENERATORS['ts2phc/time-error'](100)]
+        config = Config(None, 'G.8272/PRTC-A', HANDOFF_PARAMETERS)
+        analyzer = ANALYZERS['ts2phc/time-error'](config)
+        for idx in range(0, len(items), size):
+            with Block(encode(items[idx:idx + size])) as block:
+                analyzer.collect_block(block, 'ts2phc')
+        expect = ANALYZERS['ts2phc/time-error'](config)
+        expect.collect(*(data for (_, data) in items))
+        self.assertEqual(analyzer.partial().head, expect.partial().head)
+        self.assertEqual(
+            (analyzer.result, analyzer.reason, analyzer.timestamp, analyzer.duration, analyzer.analysis),
+            (expect.result, expect.reason, expect.timestamp, expect.duration, expect.analysis),
+        )
+
+
+class TestAnalyzeCached(TestCase):
+    """Test cases for vse_sync_pp.analyze.analyze_cached"""
+    def test_cached(self):
+        """Test vse_sync_pp.analyze.analyze_cached reuses cached values"""
+        with TemporaryDirectory() as dirname:
+            filename = os.path.join(dirname, 'input.json')
+            with open(filename, 'w', encoding='utf-8') as fid:
+                fid.write(INPUT)
+            cache = Cache(os.path.join(dirname, 'cache'))
+            analyzers = make_analyzers('ts2phc/time-deviation', 'G.8272/PRTC-A')
+            (dct,) = analyze_cached(cache, filename, analyzers, ['A'], True)
+            self.assertEqual(dct['result'], True)
+            # cached result is returned without analysis
+            analyzers = make_analyzers('ts2phc/time-deviation', 'G.8272/PRTC-A')
+            self.assertEqual(analyze_cached(cache, filename, analyzers, ['A'], True), [dct])
+            self.assertIsNone(analyzers[0]._data)
+            # time deviation is restored for a different config
+            analyzers = make_analyzers('ts2phc/time-deviation', 'G.8272/PRTC-B')
+            (dct,) = analyze_cached(cache, filename, analyzers, ['B'], True)
+            self.assertEqual(dct['result'], False)
+            self.assertIsNone(analyzers[0]._lpf_signal)
+            # changed input is analyzed afresh
+            with open(filename, 'a', encoding='utf-8') as fid:
+                fid.write('[40, "ens7f1", 1000, "s2"]\n')
+            analyzers = make_analyzers('ts2phc/time-deviation', 'G.8272/PRTC-A')
+            (dct,) = analyze_cached(cache, filename, analyzers, ['A'], True)
+            self.assertEqual(dct['result'], False)
+
+    def test_curves(self):
+        """Test vse_sync_pp.analyze.analyze_cached analyzes again for missing curves"""
+        with TemporaryDirectory() as dirname:
+            filename = os.path.join(dirname, 'input.json')
+            with open(filename, 'w', encoding='utf-8') as fid:
+                fid.write(INPUT)
+            cache = Cache(os.path.join(dirname, 'cache'))
+            analyzers = make_analyzers('ts2phc/time-deviation', 'G.8272/PRTC-A')
+            (dct,) = analyze_cached(cache, filename, analyzers, ['A'], True)
+            # cached values hold no curve for the transient period of an
+            # analyzer, or cannot be restored at all
+            key = cache.key('computed', digest_file(filename), 'ts2phc/time-deviation', True)
+            for computed in ([['tdev', 99, [1], [2]]], [], [['tdev']]):
+                cache.put(key, computed)
+                analyzers = make_analyzers('ts2phc/time-deviation', 'G.8272/PRTC-A')
+                self.assertEqual(analyze_cached(cache, filename, analyzers, ['A'], True, True), [dct])
+                self.assertTrue(analyzers[0].has_curve())
+                with TemporaryDirectory() as plotdir:
+                    plot_curves(analyzers, ['A'], os.path.join(plotdir, 'tdev.png'))
+            # the curve is now cached
+            analyzers = make_analyzers('ts2phc/time-deviation', 'G.8272/PRTC-A')
+            self.assertEqual(analyze_cached(cache, filename, analyzers, ['A'], True, True), [dct])
+            self.assertIsNone(analyzers[0]._data)
+            self.assertTrue(analyzers[0].has_curve())
+
+
+class TestPlotCurves(TestCase):
+    """Test cases for vse_sync_pp.analyze.plot_curves"""
+    def test_plot(self):
+        """Test vse_sync_pp.analyze.plot_curves plots curve and masks"""
+        requirements = ('G.8272/PRTC-A', 'G.8272/PRTC-B')
+        analyzers = make_analyzers('ts2phc/time-deviation', *requirements)
+        analyze_profiles(analyzers, StringIO(INPUT), True)
+        with TemporaryDirectory() as dirname:
+            filename = os.path.join(dirname, 'tdev.png')
+            (_, ax) = plot_curves(analyzers, requirements, filename)
+            self.assertTrue(os.path.isfile(filename))
+        (curve, mask_a, mask_b) = ax.lines
+        self.assertEqual(list(curve.get_xdata()), list(analyzers[0]._taus))
+        self.assertEqual(mask_a.get_label(), 'G.8272/PRTC-A mask')
+        # PRTC-B mask is a third of PRTC-A mask for taus up to 100 s
+        self.assertAlmostEqual(mask_a.get_ydata()[0], 3 * mask_b.get_ydata()[0])
+        self.assertEqual(ax.get_xscale(), 'log')
+        self.assertEqual(ax.get_yscale(), 'log')
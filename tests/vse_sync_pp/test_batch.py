@@ -0,0 +1,110 @@
+### SPDX-License-Identifier: GPL-2.0-or-later
+
+"""Test cases for vse_sync_pp.batch"""
+
+import os
+from tempfile import TemporaryDirectory
+
+from unittest import TestCase
+
+from vse_sync_pp.batch import (
+    Job,
+    build_jobs,
+    run_job,
+)
+
+CONFIG = '''\
+requirements: G.8272/PRTC-A
+parameters:
+  transient-period/s: 1
+  min-test-duration/s: 4
+  time-error-limit/%: 100
+'''
+
+
+def write(dirname, name, content):
+    """Write `content` to file `name` in `dirname` and return its path"""
+    filename = os.path.join(dirname, name)
+    with open(filename, 'w', encoding='utf-8') as fid:
+        fid.write(content)
+    return filename
+
+
+class TestBuildJobs(TestCase):
+    """Test cases for vse_sync_pp.batch.build_jobs"""
+    def test_manifest(self):
+        """Test vse_sync_pp.batch.build_jobs from a manifest"""
+        with TemporaryDirectory() as dirname:
+            manifest = write(dirname, 'manifest.yaml', '\n'.join((
+                '---',
+                'input: foo.log',
+                'analyzer: ts2phc/time-error',
+                '---',
+                'input: bar.json',
+                'analyzer: phc2sys/time-error',
+                'config: bar.yaml',
+                'canonical: true',
+            )))
+            self.assertEqual(
+                list(build_jobs(manifest, config='baz.yaml')),
+                [
+                    Job('foo.log', 'ts2phc/time-error', 'baz.yaml', False),
+                    Job('bar.json', 'phc2sys/time-error', 'bar.yaml', True),
+                ],
+            )
+
+    def test_directory(self):
+        """Test vse_sync_pp.batch.build_jobs from a directory"""
+        with TemporaryDirectory() as dirname:
+            foo = write(dirname, 'foo.log', '')
+            bar = write(dirname, 'bar.log', '')
+            os.mkdir(os.path.join(dirname, 'baz'))
+            analyzers = ('ts2phc/time-error', 'ts2phc/mtie')
+            self.assertEqual(
+                list(build_jobs(dirname, analyzers, 'quux.yaml')),
+                [
+                    Job(bar, 'ts2phc/time-error', 'quux.yaml', False),
+                    Job(bar, 'ts2phc/mtie', 'quux.yaml', False),
+                    Job(foo, 'ts2phc/time-error', 'quux.yaml', False),
+                    Job(foo, 'ts2phc/mtie', 'quux.yaml', False),
+                ],
+            )
+
+    def test_directory_no_analyzers(self):
+        """Test vse_sync_pp.batch.build_jobs rejects a directory without analyzers"""
+        with TemporaryDirectory() as dirname:
+            write(dirname, 'foo.log', '')
+            with self.assertRaises(ValueError):
+                list(build_jobs(dirname))
+
+
+class TestRunJob(TestCase):
+    """Test cases for vse_sync_pp.batch.run_job"""
+    def test_success(self):
+        """Test vse_sync_pp.batch.run_job analyzes input"""
+        with TemporaryDirectory() as dirname:
+            config = write(dirname, 'config.yaml', CONFIG)
+            filename = write(dirname, 'input.json', ''.join(
+                f'[{idx}, "ens7f1", 0, "s2"]\n' for idx in range(6)
+            ))
+            dct = run_job(Job(filename, 'ts2phc/time-error', config, True))
+            self.assertEqual(dct['input'], filename)
+            self.assertEqual(dct['analyzer'], 'ts2phc/time-error')
+            self.assertEqual(dct['config'], config)
+            self.assertEqual(dct['result'], True)
+            self.assertIsNone(dct['reason'])
+            self.assertEqual(dct['timestamp'], 1)
+            self.assertEqual(dct['duration'], 4)
+            self.assertEqual(dct['analysis']['terror']['max'], 0)
+
+    def test_error(self):
+        """Test vse_sync_pp.batch.run_job reports job errors"""
+        with TemporaryDirectory() as dirname:
+            filename = os.path.join(dirname, 'missing.log')
+            dct = run_job(Job(filename, 'ts2phc/time-error'))
+            self.assertEqual(dct['result'], "error")
+            self.assertTrue(dct['reason'].startswith('KeyError'))
+            config = write(dirname, 'config.yaml', CONFIG)
+            dct = run_job(Job(filename, 'ts2phc/time-error', config))
+            self.assertEqual(dct['result'], "error")
+            self.assertTrue(dct['reason'].startswith('FileNotFoundError'))
@@ -0,0 +1,79 @@
+### SPDX-License-Identifier: GPL-2.0-or-later
+
+"""Test cases for vse_sync_pp.batchplot"""
+
+import os
+from tempfile import TemporaryDirectory
+
+from unittest import TestCase
+
+from vse_sync_pp.batchplot import (
+    PlotJob,
+    build_jobs,
+    run_job,
+)
+
+from .test_batch import write
+
+
+class TestBuildJobs(TestCase):
+    """Test cases for vse_sync_pp.batchplot.build_jobs"""
+    def test_manifest(self):
+        """Test vse_sync_pp.batchplot.build_jobs from a manifest"""
+        with TemporaryDirectory() as dirname:
+            manifest = write(dirname, 'manifest.yaml', '\n'.join((
+                '---',
+                'input: foo.log',
+                'parser: ts2phc/time-error',
+                'output: foo.png',
+                '---',
+                'input: bar.json',
+                'parser: phc2sys/time-error',
+                'output: bar.png',
+                'canonical: true',
+            )))
+            self.assertEqual(
+                list(build_jobs(manifest)),
+                [
+                    PlotJob('foo.log', 'ts2phc/time-error', 'foo.png', False),
+                    PlotJob('bar.json', 'phc2sys/time-error', 'bar.png', True),
+                ],
+            )
+
+    def test_directory(self):
+        """Test vse_sync_pp.batchplot.build_jobs from a directory"""
+        with TemporaryDirectory() as dirname:
+            foo = write(dirname, 'foo.log', '')
+            bar = write(dirname, 'bar.json', '')
+            os.mkdir(os.path.join(dirname, 'baz'))
+            self.assertEqual(
+                list(build_jobs(dirname, 'ts2phc/time-error', 'out', True)),
+                [
+                    PlotJob(bar, 'ts2phc/time-error', os.path.join('out', 'bar.png'), True),
+                    PlotJob(foo, 'ts2phc/time-error', os.path.join('out', 'foo.png'), True),
+                ],
+            )
+
+
+class TestRunJob(TestCase):
+    """Test cases for vse_sync_pp.batchplot.run_job"""
+    def test_success(self):
+        """Test vse_sync_pp.batchplot.run_job plots input"""
+        with TemporaryDirectory() as dirname:
+            filename = write(dirname, 'input.json', ''.join(
+                f'[{idx}, "ens7f1", {idx % 3}, "s2"]\n' for idx in range(6)
+            ))
+            output = os.path.join(dirname, 'input.png')
+            dct = run_job(PlotJob(filename, 'ts2phc/time-error', output, True))
+            self.assertEqual(dct['result'], True)
+            self.assertIsNone(dct['reason'])
+            self.assertEqual(dct['output'], output)
+            self.assertTrue(os.path.getsize(output))
+
+    def test_error(self):
+        """Test vse_sync_pp.batchplot.run_job reports job errors"""
+        with TemporaryDirectory() as dirname:
+            filename = os.path.join(dirname, 'missing.log')
+            dct = run_job(PlotJob(filename, 'ts2phc/time-error', os.path.join(dirname, 'x.png')))
+            self.assertEqual(dct['result'], "error")
+            self.assertTrue(dct['reason'].startswith('FileNotFoundError'))
@@ -0,0 +1,23 @@
+### SPDX-License-Identifier: GPL-2.0-or-later
+
+"""Test cases for vse_sync_pp.benchmark"""
+
+from unittest import TestCase
+
+from vse_sync_pp.benchmark import (
+    BENCHMARKS,
+    run,
+)
+
+
+class TestRun(TestCase):
+    """Test cases for vse_sync_pp.benchmark.run"""
+    def test_run(self):
+        """Test vse_sync_pp.benchmark.run runs every benchmark"""
+        results = list(run(sizes=(25,), repeat=1))
+        self.assertEqual({dct['benchmark'] for dct in results}, set(BENCHMARKS))
+        for dct in results:
+            self.assertEqual(dct['lines'], 25)
+            self.assertGreater(dct['seconds'], 0)
+            self.assertGreater(dct['lines_per_second'], 0)
+            self.assertGreater(dct['peak_bytes'], 0)
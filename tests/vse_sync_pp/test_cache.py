@@ -0,0 +1,90 @@
+### SPDX-License-Identifier: GPL-2.0-or-later
+
+"""Test cases for vse_sync_pp.cache"""
+
+import os
+import time
+from tempfile import TemporaryDirectory
+
+from unittest import TestCase
+from unittest.mock import patch
+
+from vse_sync_pp.cache import (
+    Cache,
+    digest_file,
+)
+
+
+class TestDigestFile(TestCase):
+    """Test cases for vse_sync_pp.cache.digest_file"""
+    def test_digest(self):
+        """Test vse_sync_pp.cache.digest_file digests file content"""
+        with TemporaryDirectory() as dirname:
+            filename = os.path.join(dirname, 'foo')
+            with open(filename, 'wb') as fid:
+                fid.write(b'abc')
+            self.assertEqual(
+                digest_file(filename, blocksize=2),
+                'ba7816bf8f01cfea414140de5dae2223b00361a396177a9cb410ff61f20015ad',
+            )
+
+
+class TestCache(TestCase):
+    """Test cases for vse_sync_pp.cache.Cache"""
+    def test_key(self):
+        """Test vse_sync_pp.cache.Cache.key depends on all parts"""
+        self.assertEqual(Cache.key('foo', 1), Cache.key('foo', 1))
+        self.assertNotEqual(Cache.key('foo', 1), Cache.key('foo', 2))
+        self.assertNotEqual(Cache.key('foo', 1), Cache.key('foo', 1, None))
+
+    def test_get_put(self):
+        """Test vse_sync_pp.cache.Cache values are stored and returned"""
+        with TemporaryDirectory() as dirname:
+            cache = Cache(os.path.join(dirname, 'cache'))
+            key = cache.key('foo')
+            self.assertIsNone(cache.get(key))
+            cache.put(key, {'bar': [1, 2.5, None]})
+            self.assertEqual(cache.get(key), {'bar': [1, 2.5, None]})
+            self.assertEqual(Cache(os.path.join(dirname, 'cache')).get(key), {'bar': [1, 2.5, None]})
+
+    def test_get_evicted(self):
+        """Test vse_sync_pp.cache.Cache returns a value evicted once read"""
+        with TemporaryDirectory() as dirname:
+            cache = Cache(dirname)
+            key = cache.key('foo')
+            cache.put(key, 'bar')
+            # another process evicts the entry between reading and marking it
+            with patch('vse_sync_pp.cache.os.utime', side_effect=FileNotFoundError):
+                self.assertEqual(cache.get(key), 'bar')
+
+    def test_put_error(self):
+        """Test vse_sync_pp.cache.Cache removes temporary files if values cannot be stored"""
+        with TemporaryDirectory() as dirname:
+            cache = Cache(dirname)
+            with self.assertRaises(TypeError):
+                cache.put(cache.key('foo'), object())
+            self.assertEqual(os.listdir(dirname), [])
+            # an entry which cannot be replaced
+            key = cache.key('bar')
+            os.mkdir(os.path.join(dirname, key + '.json'))
+            os.mkdir(os.path.join(dirname, key + '.json', 'baz'))
+            with self.assertRaises(OSError):
+                cache.put(key, 'quux')
+            self.assertEqual(os.listdir(dirname), [key + '.json'])
+
+    def test_evict(self):
+        """Test vse_sync_pp.cache.Cache evicts least recently used values"""
+        with TemporaryDirectory() as dirname:
+            # room for two entries of this size
+            cache = Cache(dirname, max_bytes=2 * len('"xxxxxxxx"'))
+            keys = [cache.key(idx) for idx in range(3)]
+            cache.put(keys[0], 'xxxxxxxx')
+            cache.put(keys[1], 'xxxxxxxx')
+            # use first entry more recently than second
+            now = time.time()
+            os.utime(os.path.join(dirname, keys[1] + '.json'), (now - 10, now - 10))
+            self.assertEqual(cache.get(keys[0]), 'xxxxxxxx')
+            cache.put(keys[2], 'xxxxxxxx')
+            self.assertEqual(cache.get(keys[0]), 'xxxxxxxx')
+            self.assertIsNone(cache.get(keys[1]))
+            self.assertEqual(cache.get(keys[2]), 'xxxxxxxx')
@@ -19,6 +19,14 @@ class TestJsonEncoder(TestCase):
             '123.456',
         )
 
+    def test_ndarray(self):
+        """Test vse_sync_pp.common.JsonEncoder encodes numpy.ndarray"""
+        import numpy # pylint: disable=import-outside-toplevel
+        self.assertEqual(
+            json.dumps(numpy.array([1, 2, 3]), cls=JsonEncoder),
+            '[1, 2, 3]',
+        )
+
     def test_error(self):
         """Test vse_sync_pp.common.JsonEncoder rejects instance"""
         with self.assertRaises(TypeError):
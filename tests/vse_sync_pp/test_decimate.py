@@ -0,0 +1,81 @@
+### SPDX-License-Identifier: GPL-2.0-or-later
+
+"""Test cases for vse_sync_pp.decimate"""
+
+from unittest import TestCase
+from nose2.tools import params
+
+import numpy as np
+
+from vse_sync_pp.decimate import (
+    lttb,
+    minmax,
+)
+
+
+def make_series(size, seed=0):
+    """Return (x, y) arrays of `size` random walk data points"""
+    rng = np.random.default_rng(seed)
+    return (np.arange(size, dtype=float), np.cumsum(rng.normal(size=size)))
+
+
+class TestMinmax(TestCase):
+    """Test cases for vse_sync_pp.decimate.minmax"""
+    def test_small(self):
+        """Test vse_sync_pp.decimate.minmax keeps few data points"""
+        (x, y) = minmax([1, 2, 3], [4, 5, 6], 2)
+        self.assertEqual(x.tolist(), [1, 2, 3])
+        self.assertEqual(y.tolist(), [4, 5, 6])
+
+    def test_envelope(self):
+        """Test vse_sync_pp.decimate.minmax keeps extremes of each bucket"""
+        (x, y) = make_series(10000)
+        (dx, dy) = minmax(x, y, 100)
+        self.assertLessEqual(len(dx), 200)
+        self.assertTrue(np.all(np.diff(dx) > 0))
+        for (low, high) in zip(np.arange(0, 10000, 100), np.arange(100, 10100, 100)):
+            mask = (low <= x) & (x < high)
+            dmask = (low <= dx) & (dx < high)
+            self.assertEqual(dy[dmask].min(), y[mask].min())
+            self.assertEqual(dy[dmask].max(), y[mask].max())
+
+    def test_constant_x(self):
+        """Test vse_sync_pp.decimate.minmax of data points with equal x"""
+        (x, y) = minmax([5] * 10, [3, 1, 4, 1, 5, 9, 2, 6, 5, 3], 2)
+        self.assertEqual(x.tolist(), [5, 5])
+        self.assertEqual(y.tolist(), [1, 9])
+
+    @params(0, -1)
+    def test_buckets(self, buckets):
+        """Test vse_sync_pp.decimate.minmax rejects fewer than one bucket"""
+        with self.assertRaises(ValueError):
+            minmax([1, 2, 3], [4, 5, 6], buckets)
+
+
+class TestLttb(TestCase):
+    """Test cases for vse_sync_pp.decimate.lttb"""
+    def test_small(self):
+        """Test vse_sync_pp.decimate.lttb keeps few data points"""
+        (x, y) = lttb([1, 2, 3], [4, 5, 6], 3)
+        self.assertEqual(x.tolist(), [1, 2, 3])
+        self.assertEqual(y.tolist(), [4, 5, 6])
+
+    def test_threshold(self):
+        """Test vse_sync_pp.decimate.lttb keeps threshold data points"""
+        (x, y) = make_series(10000)
+        (dx, dy) = lttb(x, y, 500)
+        self.assertEqual(len(dx), 500)
+        self.assertEqual((dx[0], dy[0]), (x[0], y[0]))
+        self.assertEqual((dx[-1], dy[-1]), (x[-1], y[-1]))
+        self.assertTrue(np.all(np.diff(dx) > 0))
+        # kept data points are data points
+        self.assertTrue(np.array_equal(y[dx.astype(int)], dy))
+
+    def test_spike(self):
+        """Test vse_sync_pp.decimate.lttb keeps an isolated spike"""
+        x = np.arange(1000, dtype=float)
+        y = np.zeros(1000)
+        y[567] = 100
+        (dx, dy) = lttb(x, y, 10)
+        self.assertIn(567, dx.tolist())
+        self.assertEqual(dy.max(), 100)
@@ -0,0 +1,99 @@
+### SPDX-License-Identifier: GPL-2.0-or-later
+
+"""Test cases for vse_sync_pp.generate"""
+
+from io import StringIO
+from statistics import correlation
+
+from unittest import TestCase
+from nose2.tools import params
+
+from vse_sync_pp.generate import (
+    GENERATORS,
+    Model,
+    muxed as generate_muxed,
+)
+from vse_sync_pp.analyzers.pmc import (
+    STATE_TRANSITION,
+    is_illegal_clock_accuracy,
+    is_illegal_offset_scaled_log_variance,
+    is_illegal_transition,
+)
+from vse_sync_pp.parsers import PARSERS
+from vse_sync_pp.source import muxed
+
+
+class TestGenerators(TestCase):
+    """Test cases for vse_sync_pp.generate generators"""
+    @params(*GENERATORS)
+    def test_parsed(self, id_):
+        """Test vse_sync_pp.generate generates lines accepted by parser"""
+        lines = list(GENERATORS[id_](50, seed=1, rate=2))
+        parsed = [PARSERS[id_]().parse_line(line) for line in lines]
+        self.assertEqual(len(parsed), 50)
+        self.assertNotIn(None, parsed)
+        self.assertEqual([float(data.timestamp) for data in parsed[:3]], [1000, 1000.5, 1001])
+
+    @params(*GENERATORS)
+    def test_seeded(self, id_):
+        """Test vse_sync_pp.generate generates lines determined by seed"""
+        generate = GENERATORS[id_]
+        self.assertEqual(list(generate(20, seed=1)), list(generate(20, seed=1)))
+
+    @params(*GENERATORS)
+    def test_model(self, id_):
+        """Test vse_sync_pp.generate generates lines with impairments"""
+        model = Model(wander=1, holdover=5, gaps=60, gap_duration=30, losses=30, loss_duration=120, warmup=10)
+        lines = list(GENERATORS[id_](2000, seed=2, model=model))
+        self.assertEqual(lines, list(GENERATORS[id_](2000, seed=2, model=model)))
+        parsed = [PARSERS[id_]().parse_line(line) for line in lines]
+        self.assertNotIn(None, parsed)
+        timestamps = [float(data.timestamp) for data in parsed]
+        steps = {b - a for (a, b) in zip(timestamps, timestamps[1:])}
+        self.assertEqual(min(steps), 1)
+        self.assertGreater(max(steps), 1)
+        # lock is lost and regained
+        states = {data.clock_class if id_ == 'phc/gm-settings' else data.state for data in parsed}
+        self.assertGreater(len(states), 1)
+
+    def test_delay(self):
+        """Test vse_sync_pp.generate phc2sys path delay is independent of offset"""
+        parser = PARSERS['phc2sys/time-error']()
+        parsed = [parser.parse_line(line) for line in GENERATORS['phc2sys/time-error'](500, seed=3)]
+        terrors = [data.terror for data in parsed]
+        delays = [data.delay for data in parsed]
+        self.assertLess(abs(correlation(terrors, delays)), 0.5)
+
+    def test_holdover(self):
+        """Test vse_sync_pp.generate generates legal clock class sequences"""
+        model = Model(losses=20, loss_duration=300, warmup=10, in_spec=60)
+        parser = PARSERS['phc/gm-settings']()
+        parsed = [parser.parse_line(line) for line in GENERATORS['phc/gm-settings'](5000, seed=3, model=model)]
+        classes = [data.clock_class for data in parsed]
+        self.assertEqual(set(classes), set(STATE_TRANSITION) - {150, 160})
+        for (prev, data) in zip(parsed, parsed[1:]):
+            self.assertFalse(is_illegal_transition(prev.clock_class, data.clock_class))
+            self.assertFalse(is_illegal_clock_accuracy(data.clock_class, data.clockAccuracy))
+            self.assertFalse(is_illegal_offset_scaled_log_variance(data.clock_class, data.offsetScaledLogVariance))
+
+    def test_rate(self):
+        """Test vse_sync_pp.generate generates lines at high rate"""
+        parser = PARSERS['dpll/time-error']()
+        parsed = [parser.parse_line(line) for line in GENERATORS['dpll/time-error'](33, rate=16)]
+        self.assertEqual(float(parsed[-1].timestamp), 1002)
+
+    def test_muxed(self):
+        """Test vse_sync_pp.generate.muxed generates multiplexed content"""
+        content = '\n'.join(generate_muxed(20, seed=1))
+        parsers = {id_: cls() for (id_, cls) in PARSERS.items()}
+        ids = [id_ for (id_, _) in muxed(StringIO(content), parsers)]
+        self.assertEqual(ids, list(GENERATORS) * 4)
+
+    def test_muxed_ordered(self):
+        """Test vse_sync_pp.generate.muxed generates content in timestamp order"""
+        model = Model(gaps=120, gap_duration=20)
+        content = '\n'.join(generate_muxed(1000, seed=1, model=model))
+        parsers = {id_: cls() for (id_, cls) in PARSERS.items()}
+        timestamps = [data.timestamp for (_, data) in muxed(StringIO(content), parsers)]
+        self.assertEqual(len(timestamps), 1000)
+        self.assertEqual(timestamps, sorted(timestamps))
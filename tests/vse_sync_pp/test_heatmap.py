@@ -0,0 +1,41 @@
+### SPDX-License-Identifier: GPL-2.0-or-later
+
+"""Test cases for vse_sync_pp.heatmap"""
+
+import os
+from tempfile import TemporaryDirectory
+
+from unittest import TestCase
+
+import numpy as np
+import matplotlib.pyplot as plt
+
+from vse_sync_pp.heatmap import Heatmap
+
+
+class TestHeatmap(TestCase):
+    """Test cases for vse_sync_pp.heatmap.Heatmap"""
+    def plot(self, heatmap, data):
+        """Return (fig, ax) from `heatmap` plot of `data` to a temporary file"""
+        with TemporaryDirectory() as dirname:
+            return heatmap.plot(data, os.path.join(dirname, 'heatmap.png'))
+
+    def test_small(self):
+        """Test vse_sync_pp.heatmap.Heatmap annotates and colors small grids"""
+        heatmap = Heatmap(('a', 'b'), ('c', 'd'), 'foo', ([0, 1], [1, 1]), 'bar', 'x', 'y')
+        (_, ax) = self.plot(heatmap, [[0, 2], [3, 0]])
+        self.assertEqual([text.get_text() for text in ax.texts], ['0', '2', '3', '0'])
+        (_, overlay) = ax.images
+        # only unallowed cells with a value of at least 1 are colored
+        self.assertEqual(overlay.get_array().mask.tolist(), [[True, False], [True, True]])
+        # figures are not left open in pyplot
+        self.assertEqual(plt.get_fignums(), [])
+
+    def test_large(self):
+        """Test vse_sync_pp.heatmap.Heatmap does not annotate large grids"""
+        heatmap = Heatmap(range(30), range(30), 'foo', [(0, 0)], 'bar', 'x', 'y', annotate_max=100)
+        (_, ax) = self.plot(heatmap, np.ones((30, 30), dtype=int))
+        self.assertEqual(len(ax.texts), 0)
+        self.assertEqual(len(ax.patches), 0)
+        # figures are not left open in pyplot
+        self.assertEqual(plt.get_fignums(), [])
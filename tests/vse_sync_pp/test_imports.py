@@ -0,0 +1,55 @@
+### SPDX-License-Identifier: GPL-2.0-or-later
+
+"""Test cases for import cost of vse_sync_pp command line tools"""
+
+import os
+import subprocess
+import sys
+
+from unittest import TestCase
+from nose2.tools import params
+
+import vse_sync_pp
+
+# modules which are slow to import
+HEAVY = ('numpy', 'pandas', 'scipy', 'allantools', 'matplotlib')
+
+
+def importtime(module):
+    """Return a dict of cumulative import time in microseconds for `module`.
+
+    Import `module` in a fresh Python interpreter using `python -X importtime`
+    and return the cumulative import time of each module imported, by name.
+    """
+    # import vse_sync_pp from where this process imports it
+    env = dict(os.environ, PYTHONPATH=os.path.dirname(os.path.dirname(vse_sync_pp.__file__)))
+    proc = subprocess.run(
+        (sys.executable, '-X', 'importtime', '-c', f'import {module}'),
+        env=env, capture_output=True, text=True, check=True,
+    )
+    times = {}
+    for line in proc.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        (_, cumulative, name) = line.split(':', 1)[1].split('|')
+        try:
+            times[name.strip()] = int(cumulative)
+        except ValueError:
+            pass
+    return times
+
+
+class TestImportTime(TestCase):
+    """Test cases for import cost of vse_sync_pp command line tools"""
+    @params(
+        ('vse_sync_pp.parse', HEAVY),
+        ('vse_sync_pp.demux', HEAVY),
+        ('vse_sync_pp.sequence', HEAVY),
+        ('vse_sync_pp.analyze', ('pandas', 'scipy', 'allantools', 'matplotlib')),
+        ('vse_sync_pp.batch', ('pandas', 'scipy', 'allantools', 'matplotlib')),
+    )
+    def test_lazy(self, module, heavy):
+        """Test command line tools do not import unused heavy modules"""
+        times = importtime(module)
+        self.assertIn(module, times)
+        packages = frozenset(name.split('.')[0] for name in times)
+        self.assertEqual([name for name in heavy if name in packages], [])
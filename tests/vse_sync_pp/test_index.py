@@ -0,0 +1,168 @@
+### SPDX-License-Identifier: GPL-2.0-or-later
+
+"""Test cases for vse_sync_pp.index"""
+
+import json
+import os
+from decimal import Decimal
+from io import StringIO
+from tempfile import TemporaryDirectory
+
+from unittest import TestCase
+from nose2.tools import params
+
+from vse_sync_pp.common import JsonEncoder
+from vse_sync_pp.generate import (
+    muxed,
+    ts2phc,
+)
+from vse_sync_pp.index import (
+    BLOCK,
+    bisect_offset,
+    build_index,
+    in_range,
+    index_filename,
+    index_offset,
+    load_index,
+    open_range,
+)
+from vse_sync_pp.parsers.ts2phc import TimeErrorParser
+from vse_sync_pp.source import muxed as source_muxed
+
+# lines in each input, spanning more than one block of bisection
+COUNT = 3000
+
+
+def write(dirname, kind):
+    """Return the name of a file written in `dirname` with content of `kind`"""
+    if kind == 'muxed':
+        lines = muxed(COUNT)
+    else:
+        lines = ts2phc(COUNT)
+        if kind == 'canonical':
+            parser = TimeErrorParser()
+            lines = (json.dumps(parser.parse_line(line), cls=JsonEncoder) for line in lines)
+    filename = os.path.join(dirname, kind)
+    with open(filename, 'w', encoding='utf-8') as fid:
+        fid.write(''.join(line + '\n' for line in lines))
+    return filename
+
+
+def read(fid, kind):
+    """Return a list of data parsed by ts2phc time error parser from `fid`"""
+    parser = TimeErrorParser()
+    if kind == 'muxed':
+        return [data for (_, data) in source_muxed(fid, {parser.id_: parser})]
+    if kind == 'canonical':
+        return list(parser.canonical(fid))
+    return list(parser.parse(fid))
+
+
+class TestIndex(TestCase):
+    """Test cases for vse_sync_pp.index"""
+    def test_in_range(self):
+        """Test vse_sync_pp.index.in_range selects a time range"""
+        items = list(TimeErrorParser().parse(StringIO(''.join(line + '\n' for line in ts2phc(10)))))
+        self.assertIs(in_range(items), items)
+        self.assertEqual(list(in_range(items, Decimal(1003))), items[3:])
+        self.assertEqual(list(in_range(items, end=Decimal(1003))), items[:4])
+        self.assertEqual(list(in_range(items, Decimal('1002.5'), Decimal('1005.5'))), items[3:6])
+        self.assertEqual(list(in_range(items, Decimal(1020))), [])
+
+    @params('logged', 'canonical', 'muxed')
+    def test_build_index(self, kind):
+        """Test vse_sync_pp.index.build_index records checkpoints per parser"""
+        with TemporaryDirectory() as tmpdir:
+            filename = write(tmpdir, kind)
+            parser = TimeErrorParser()
+            index = build_index(filename, kind, {parser.id_: parser}, every=100)
+            self.assertEqual(index['kind'], kind)
+            self.assertEqual(index['size'], os.path.getsize(filename))
+            checkpoints = index['checkpoints'][parser.id_]
+            # muxed content contains ts2phc data for one line in five
+            total = COUNT // 5 if kind == 'muxed' else COUNT
+            self.assertEqual(len(checkpoints), (total - 1) // 100)
+            with open(filename, encoding='utf-8') as fid:
+                items = read(fid, kind)
+            with open(filename, 'rb') as fid:
+                for (idx, (latest, offset)) in enumerate(checkpoints, 1):
+                    self.assertEqual(Decimal(latest), items[idx * 100 - 1].timestamp)
+                    fid.seek(offset)
+                    self.assertEqual(read(StringIO(fid.read().decode()), kind), items[idx * 100:])
+
+    def test_load_index(self):
+        """Test vse_sync_pp.index.load_index rejects missing or stale indexes"""
+        with TemporaryDirectory() as tmpdir:
+            filename = write(tmpdir, 'logged')
+            self.assertIsNone(load_index(filename, 'logged'))
+            parser = TimeErrorParser()
+            index = build_index(filename, 'logged', {parser.id_: parser})
+            with open(index_filename(filename), 'w', encoding='utf-8') as fid:
+                json.dump(index, fid)
+            self.assertEqual(load_index(filename, 'logged'), index)
+            self.assertIsNone(load_index(filename, 'canonical'))
+            with open(filename, 'a', encoding='utf-8') as fid:
+                fid.write('\n')
+            self.assertIsNone(load_index(filename, 'logged'))
+
+    @params(
+        (Decimal(900),),
+        (Decimal(1000),),
+        (Decimal('1234.5'),),
+        (Decimal(2999),),
+        (Decimal(3500),),
+    )
+    def test_index_offset(self, start):
+        """Test vse_sync_pp.index.index_offset skips lines before start"""
+        with TemporaryDirectory() as tmpdir:
+            filename = write(tmpdir, 'logged')
+            parser = TimeErrorParser()
+            index = build_index(filename, 'logged', {parser.id_: parser}, every=100)
+            self.assertIsNone(index_offset(index, 'unknown', start))
+            offset = index_offset(index, parser.id_, start)
+            with open(filename, 'rb') as fid:
+                skipped = read(StringIO(fid.read(offset).decode()), 'logged')
+                items = read(StringIO(fid.read().decode()), 'logged')
+            self.assertTrue(all(item.timestamp < start for item in skipped))
+            self.assertLessEqual(len(items) - len(list(in_range(items, start))), 100)
+
+    @params('logged', 'canonical', 'muxed')
+    def test_bisect_offset(self, kind):
+        """Test vse_sync_pp.index.bisect_offset skips lines before start"""
+        with TemporaryDirectory() as tmpdir:
+            filename = write(tmpdir, kind)
+            with open(filename, 'rb') as fid:
+                lines = fid.readlines()
+                for start in (Decimal(900), Decimal(1000), Decimal('1345.5'), Decimal('2345.5'), Decimal(5000)):
+                    # the offset of the first line with timestamp at or after start
+                    target = 0
+                    for line in lines:
+                        if any(start <= item.timestamp for item in read(StringIO(line.decode()), kind)):
+                            break
+                        target += len(line)
+                    offset = bisect_offset(fid, kind, TimeErrorParser(), start)
+                    self.assertLessEqual(offset, target)
+                    # no more than one block is left to be scanned
+                    self.assertLessEqual(target - offset, BLOCK)
+
+    @params(
+        ('logged', False),
+        ('logged', True),
+        ('canonical', False),
+        ('canonical', True),
+        ('muxed', False),
+        ('muxed', True),
+    )
+    def test_open_range(self, kind, indexed):
+        """Test vse_sync_pp.index.open_range reads from start"""
+        with TemporaryDirectory() as tmpdir:
+            filename = write(tmpdir, kind)
+            parser = TimeErrorParser()
+            if indexed:
+                with open(index_filename(filename), 'w', encoding='utf-8') as fid:
+                    json.dump(build_index(filename, kind, {parser.id_: parser}, every=10), fid)
+            with open(filename, encoding='utf-8') as fid:
+                expect = list(in_range(read(fid, kind), Decimal(1500), Decimal(1600)))
+            with open_range(filename, kind, parser, Decimal(1500)) as fid:
+                self.assertEqual(list(in_range(read(fid, kind), Decimal(1500), Decimal(1600))), expect)
+            self.assertEqual(len(expect), 100 if kind == 'muxed' else 101)
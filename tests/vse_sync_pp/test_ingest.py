@@ -0,0 +1,130 @@
+### SPDX-License-Identifier: GPL-2.0-or-later
+
+"""Test cases for vse_sync_pp.ingest"""
+
+import asyncio
+import json
+import os
+from io import StringIO
+from tempfile import TemporaryDirectory
+
+from unittest import TestCase
+
+from vse_sync_pp.analyze import analyze
+from vse_sync_pp.analyzers import (
+    ANALYZERS,
+    Config,
+)
+from vse_sync_pp.common import JsonEncoder
+from vse_sync_pp.generate import muxed
+from vse_sync_pp.ingest import (
+    Ingest,
+    produce,
+    query,
+    serve,
+)
+
+CONFIG = Config(None, 'G.8272/PRTC-A', {
+    'transient-period/s': 1,
+    'min-test-duration/s': 4,
+    'time-error-limit/%': 100,
+})
+
+ANALYZER_IDS = ('ts2phc/time-error', 'phc/gm-settings')
+
+
+def expected(lines, analyzer):
+    """Return a dict of the result of `analyzer` analyzing muxed `lines`"""
+    cls = ANALYZERS[analyzer]
+    canonical = ''.join(
+        json.dumps(obj['data'], cls=JsonEncoder) + '\n'
+        for obj in map(json.loads, lines) if obj['id'] == cls.parser
+    )
+    return json.loads(json.dumps(analyze(cls(CONFIG), StringIO(canonical), canonical=True), cls=JsonEncoder))
+
+
+async def ingest_nodes(nodes, **kwargs):
+    """Return (results, status) from serving producers of `nodes`.
+
+    `nodes` is a dict of lines of multiplexed content by node name: a producer
+    for each node sends lines concurrently.
+    """
+    ingest = Ingest(ANALYZER_IDS, {'prtca': CONFIG})
+    (server,) = await serve(ingest, **kwargs)
+    if 'port' in kwargs:
+        kwargs['port'] = server.sockets[0].getsockname()[1]
+    async with server:
+        counts = await asyncio.gather(*(
+            produce(lines, name, batch=7, **kwargs) for (name, lines) in nodes.items()
+        ))
+        assert counts == [len(lines) for lines in nodes.values()]
+        # producers have closed their connections: wait for the service to
+        # read to the end of each
+        done = {name: (len(lines), 0) for (name, lines) in nodes.items()}
+        while done != {
+            status['node']: (status['lines'], status['connections'])
+            for status in await query('nodes', **kwargs)
+        }:
+            await asyncio.sleep(0.01)
+        return (await query('results', **kwargs), await query('nodes', **kwargs))
+
+
+class TestIngest(TestCase):
+    """Test cases for vse_sync_pp.ingest"""
+    def test_unix(self):
+        """Test vse_sync_pp.ingest analyzes nodes separately over a Unix socket"""
+        nodes = {
+            'alpha': list(muxed(100, seed=1)),
+            'beta': list(muxed(60, seed=2)),
+        }
+        with TemporaryDirectory() as tmpdir:
+            (results, status) = asyncio.run(ingest_nodes(nodes, path=os.path.join(tmpdir, 'sock')))
+        self.assertEqual(len(results), 4)
+        for dct in results:
+            self.assertEqual(dct['config'], 'prtca')
+            self.assertEqual(
+                {key: val for (key, val) in dct.items() if key not in ('node', 'analyzer', 'config')},
+                expected(nodes[dct['node']], dct['analyzer']),
+            )
+        self.assertEqual(status, [
+            {'node': 'alpha', 'connections': 0, 'lines': 100, 'rejected': 0, 'reason': None},
+            {'node': 'beta', 'connections': 0, 'lines': 60, 'rejected': 0, 'reason': None},
+        ])
+
+    def test_tcp(self):
+        """Test vse_sync_pp.ingest rejects bad lines over a TCP socket"""
+        lines = list(muxed(50))
+        lines.insert(10, 'not json')
+        lines.insert(20, '{"data": []}')
+        (results, status) = asyncio.run(ingest_nodes({'gamma': lines}, port=0))
+        self.assertEqual(status[0]['lines'], 52)
+        self.assertEqual(status[0]['rejected'], 2)
+        self.assertEqual(status[0]['reason'], "KeyError: 'id'")
+        self.assertEqual(len(results), 2)
+        self.assertEqual(results[0]['analyzer'], 'ts2phc/time-error')
+        self.assertEqual(results[0]['result'], True)
+        self.assertEqual(results[1]['analyzer'], 'phc/gm-settings')
+
+    def test_no_data(self):
+        """Test vse_sync_pp.ingest results before data and bad queries"""
+        async def run(path):
+            ingest = Ingest(ANALYZER_IDS, {None: CONFIG})
+            (server,) = await serve(ingest, path=path)
+            async with server:
+                self.assertEqual(await query('results', path=path), [])
+                self.assertEqual(await query('bogus', path=path), [{'error': 'ValueError: unknown query bogus'}])
+                await produce((), 'delta', path=path)
+                while not await query('nodes', path=path):
+                    await asyncio.sleep(0.01)
+                return await query('results', 'delta', path=path)
+        with TemporaryDirectory() as tmpdir:
+            results = asyncio.run(run(os.path.join(tmpdir, 'sock')))
+        self.assertEqual([(dct['node'], dct['result'], dct['reason']) for dct in results], [
+            ('delta', "error", "no data"),
+            ('delta', "error", "no data"),
+        ])
+
+    def test_bad_config(self):
+        """Test vse_sync_pp.ingest fails early for an unusable config"""
+        with self.assertRaises(KeyError):
+            Ingest(ANALYZER_IDS, {None: Config()})
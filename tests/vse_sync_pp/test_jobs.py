@@ -0,0 +1,70 @@
+### SPDX-License-Identifier: GPL-2.0-or-later
+
+"""Test cases for vse_sync_pp.jobs"""
+
+import os
+from argparse import ArgumentParser
+from contextlib import redirect_stderr
+from io import StringIO
+from tempfile import TemporaryDirectory
+
+from unittest import TestCase
+from nose2.tools import params
+
+from vse_sync_pp.jobs import (
+    add_workers_argument,
+    failure_reason,
+    manifest_documents,
+    manifest_files,
+)
+
+from .test_batch import write
+
+
+class TestManifest(TestCase):
+    """Test cases for vse_sync_pp.jobs manifests"""
+    def test_files(self):
+        """Test vse_sync_pp.jobs.manifest_files yields files in name order"""
+        with TemporaryDirectory() as dirname:
+            foo = write(dirname, 'foo.log', '')
+            bar = write(dirname, 'bar.log', '')
+            os.mkdir(os.path.join(dirname, 'baz'))
+            self.assertEqual(
+                list(manifest_files(dirname)),
+                [('bar.log', bar), ('foo.log', foo)],
+            )
+
+    def test_documents(self):
+        """Test vse_sync_pp.jobs.manifest_documents yields each document"""
+        with TemporaryDirectory() as dirname:
+            manifest = write(dirname, 'manifest.yaml', '---\na: 1\n---\nb: 2\n')
+            self.assertEqual(list(manifest_documents(manifest)), [{'a': 1}, {'b': 2}])
+
+
+class TestFailureReason(TestCase):
+    """Test cases for vse_sync_pp.jobs.failure_reason"""
+    def test_reason(self):
+        """Test vse_sync_pp.jobs.failure_reason names the exception type"""
+        self.assertEqual(failure_reason(KeyError('foo')), "KeyError: 'foo'")
+
+
+class TestWorkersArgument(TestCase):
+    """Test cases for vse_sync_pp.jobs.add_workers_argument"""
+    def parse(self, *args):
+        """Return the number of workers parsed from command line `args`"""
+        aparser = ArgumentParser()
+        add_workers_argument(aparser)
+        return aparser.parse_args(args).workers
+
+    def test_workers(self):
+        """Test vse_sync_pp.jobs.add_workers_argument parses a positive number"""
+        self.assertEqual(self.parse('--workers', '3'), 3)
+        self.assertEqual(self.parse(), os.cpu_count())
+
+    @params('0', '-2', 'many')
+    def test_invalid(self, value):
+        """Test vse_sync_pp.jobs.add_workers_argument rejects other than a positive number"""
+        with redirect_stderr(StringIO()) as stderr:
+            with self.assertRaises(SystemExit):
+                self.parse('--workers', value)
+        self.assertIn('must be a positive integer', stderr.getvalue())
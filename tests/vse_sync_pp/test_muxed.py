@@ -1,6 +1,6 @@
 ### SPDX-License-Identifier: GPL-2.0-or-later
 
-"""Test cases for vse_sync_pp.source.muxed"""
+"""Test cases for vse_sync_pp.source.muxed and muxed_passthrough"""
 
 import json
 from collections import namedtuple
@@ -8,9 +8,14 @@ from decimal import Decimal
 from io import StringIO
 from itertools import zip_longest
 from unittest import TestCase
+from nose2.tools import params
 
 from vse_sync_pp.parsers import PARSERS
-from vse_sync_pp.source import muxed
+from vse_sync_pp.source import (
+    muxed,
+    muxed_fields,
+    muxed_passthrough,
+)
 
 CaseValue = namedtuple("CaseValue", "input,expected")
 NO_PARSER = CaseValue(
@@ -94,3 +99,76 @@ class TestMuxed(TestCase):
         arrays and json objects
         """
         self._test(DPLL_DICT, GNSS_LIST)
+
+
+class TestMuxedPassthrough(TestCase):
+    def _test(self, *cases):
+        lines = [json.dumps(c.input) for c in cases]
+        file = StringIO("".join(line + "\n" for line in lines))
+        parsers = {id_: cls() for (id_, cls) in PARSERS.items()}
+        expected = [
+            (c.expected[0], (c.expected[1][0], line))
+            for (c, line) in zip(cases, lines) if c.expected is not None
+        ]
+        for actual, expected in zip_longest(muxed_passthrough(file, parsers), expected):
+            self.assertEqual(actual, expected)
+
+    def test_filter(self):
+        """Check that lines with no parser are ignored"""
+        self._test(NO_PARSER, DPLL_LIST, GNSS_LIST)
+
+    def test_mixed(self):
+        """Check that lines with json arrays and objects are passed through,
+        with timestamps parsed
+        """
+        self._test(DPLL_DICT, GNSS_LIST, DPLL_LIST, GNSS_DICT)
+
+    def test_unchanged(self):
+        """Check that lines are passed through unchanged, without validation"""
+        line = '{"data": [1.50, "not", "validated"],  "id": "dpll/time-error"}'
+        file = StringIO(line + "\r\n")
+        ((id_, data),) = muxed_passthrough(file, {"dpll/time-error": PARSERS["dpll/time-error"]()})
+        self.assertEqual(id_, "dpll/time-error")
+        self.assertEqual(data.timestamp, Decimal("1.50"))
+        self.assertEqual(data.line, line)
+
+
+class TestMuxedFields(TestCase):
+    """Test cases for vse_sync_pp.source.muxed_fields"""
+    PARSERS = {id_: cls() for (id_, cls) in PARSERS.items()}
+
+    @params(
+        ('{"id": "dpll/time-error", "data": [1.50, 3, 3, 0.1]}', ("dpll/time-error", Decimal("1.50"))),
+        (
+            '{"id":"gnss/time-error","data":{"state":5,"timestamp":"2.25","terror":1}}',
+            ("gnss/time-error", Decimal("2.25")),
+        ),
+        ('{"data": [7, "ens7f1", 1, "s2"], "id": "ts2phc/time-error"}', ("ts2phc/time-error", Decimal(7))),
+        (
+            '{"other": {"x": ["]", "}"]}, "id": "gnss/time-error", "data": [3e1, 0, 0]}',
+            ("gnss/time-error", Decimal(30)),
+        ),
+        ('{"id": "dpll/time-\\u0065rror", "data": [1, {"[": "\\"}, 3, 4]}', ("dpll/time-error", Decimal(1))),
+        (
+            '{"id": "gnss/time-error", "data": ["2023-09-18T14:34:20.5Z", 5, 0]}',
+            ("gnss/time-error", Decimal("1695047660.5")),
+        ),
+        ('{"id": "im-not-a-parser", "data": not json', None),
+    )
+    def test_fields(self, line, expect):
+        """Check that the id and timestamp are decoded from a line"""
+        self.assertEqual(muxed_fields(line, self.PARSERS), expect)
+
+    @params(
+        ('{"data": [1, 2, 3]}', KeyError),
+        ('{"id": "gnss/time-error"}', KeyError),
+        ('{"id": "gnss/time-error", "data": {"state": 5}}', KeyError),
+        ('{"id": "gnss/time-error", "data": [', ValueError),
+        ('{"id": "gnss/time-error" "data": [1]}', ValueError),
+        ('["gnss/time-error", [1]]', ValueError),
+        ('{"id": "gnss/time-error", "data": [true]}', ValueError),
+    )
+    def test_errors(self, line, exc):
+        """Check that lines without an id or timestamp are rejected"""
+        with self.assertRaises(exc):
+            muxed_fields(line, self.PARSERS)
@@ -0,0 +1,42 @@
+### SPDX-License-Identifier: GPL-2.0-or-later
+
+"""Test cases for vse_sync_pp.plot"""
+
+import os
+from collections import namedtuple
+from tempfile import TemporaryDirectory
+
+from unittest import TestCase
+
+import matplotlib.pyplot as plt
+
+from vse_sync_pp.plot import (
+    Axis,
+    Plotter,
+    TIMESERIES,
+)
+
+Row = namedtuple('Row', ('timestamp', 'terror'))
+
+
+class TestPlotter(TestCase):
+    """Test cases for vse_sync_pp.plot.Plotter"""
+    def test_plot(self):
+        """Test vse_sync_pp.plot.Plotter plots decimated and counted data"""
+        plotter = Plotter(TIMESERIES, Axis('Time Error (ns)', 'terror'), max_points=100, hist_bins=8)
+        for idx in range(100000):
+            plotter.append(Row(idx, (idx * 7) % 23 - 11))
+        with TemporaryDirectory() as dirname:
+            (_, (ax1, ax2, ax3)) = plotter.plot(os.path.join(dirname, 'plot.png'))
+        # scatter plot is decimated, keeping extremes
+        (xdata, ydata) = ax1.lines[-1].get_data()
+        self.assertLessEqual(len(xdata), 100)
+        self.assertEqual((min(ydata), max(ydata)), (-11, 11))
+        # histogram counts every value, in no more than 8 bins
+        self.assertLessEqual(len(ax2.patches), 8)
+        self.assertEqual(sum(patch.get_height() for patch in ax2.patches), 100000)
+        (_, cdf) = ax3.lines[-1].get_data()
+        self.assertEqual(cdf[0], 0)
+        self.assertAlmostEqual(cdf[-1], 1)
+        # figures are not left open in pyplot
+        self.assertEqual(plt.get_fignums(), [])
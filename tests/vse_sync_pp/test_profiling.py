@@ -0,0 +1,84 @@
+### SPDX-License-Identifier: GPL-2.0-or-later
+
+"""Test cases for vse_sync_pp.profiling"""
+
+import time
+import tracemalloc
+
+from unittest import TestCase
+from nose2.tools import params
+
+from vse_sync_pp.profiling import (
+    Profiler,
+    iterate,
+    profiling,
+    stage,
+)
+
+
+class TestProfiler(TestCase):
+    """Test cases for vse_sync_pp.profiling.Profiler"""
+    @params(True, False)
+    def test_nested(self, memory):
+        """Test vse_sync_pp.profiling.Profiler excludes nested stage time"""
+        profiler = Profiler(memory)
+        with profiling(profiler):
+            with stage('outer', 2):
+                time.sleep(0.02)
+                with stage('inner'):
+                    blocks = [bytearray(1000) for _ in range(1000)]
+                    time.sleep(0.05)
+                del blocks
+        report = profiler.report()
+        self.assertEqual(list(report['stages']), ['outer', 'inner'])
+        (outer, inner) = report['stages'].values()
+        self.assertEqual((outer['calls'], outer['items']), (1, 2))
+        self.assertEqual((inner['calls'], inner['items']), (1, 0))
+        self.assertGreaterEqual(inner['wall_s'], 0.05)
+        self.assertGreaterEqual(outer['wall_s'], 0.02)
+        self.assertLess(outer['wall_s'], 0.05)
+        self.assertGreaterEqual(report['wall_s'], outer['wall_s'] + inner['wall_s'])
+        if memory:
+            self.assertGreater(inner['peak_bytes'], 1000000)
+            self.assertGreaterEqual(outer['peak_bytes'], inner['peak_bytes'])
+            self.assertGreaterEqual(report['peak_bytes'], outer['peak_bytes'])
+        else:
+            self.assertNotIn('peak_bytes', outer)
+            self.assertNotIn('peak_bytes', report)
+
+    def test_memory_default(self):
+        """Test vse_sync_pp.profiling.Profiler does not trace memory by default"""
+        profiler = Profiler()
+        with profiling(profiler):
+            self.assertFalse(tracemalloc.is_tracing())
+            with stage('stage'):
+                blocks = [bytearray(1000) for _ in range(1000)]
+            del blocks
+        report = profiler.report()
+        self.assertNotIn('peak_bytes', report)
+        self.assertEqual(list(report['stages']['stage']), ['calls', 'items', 'wall_s', 'cpu_s'])
+
+    def test_iterate(self):
+        """Test vse_sync_pp.profiling.Profiler records items iterated"""
+        profiler = Profiler()
+        with profiling(profiler):
+            items = list(iterate('numbers', range(5)))
+            with stage('repeat'):
+                list(iterate('numbers', range(3)))
+        self.assertEqual(items, [0, 1, 2, 3, 4])
+        numbers = profiler.report()['stages']['numbers']
+        self.assertEqual((numbers['calls'], numbers['items']), (10, 8))
+
+    def test_inactive(self):
+        """Test vse_sync_pp.profiling records nothing when not profiling"""
+        items = range(3)
+        with profiling(None) as profiler:
+            self.assertIsNone(profiler)
+            self.assertIs(iterate('numbers', items), items)
+            with stage('stage'):
+                pass
+        profiler = Profiler()
+        with profiling(profiler):
+            pass
+        self.assertEqual(profiler.report()['stages'], {})
+        self.assertIs(iterate('numbers', items), items)
@@ -0,0 +1,86 @@
+### SPDX-License-Identifier: GPL-2.0-or-later
+
+"""Test cases for vse_sync_pp.source.readahead"""
+
+import threading
+import time
+
+from unittest import TestCase
+from nose2.tools import params
+
+from vse_sync_pp.source import (
+    readahead,
+    readahead_process,
+)
+
+
+def numbers(count, fail=False):
+    """Generator yielding `count` numbers then, if `fail`, raising"""
+    yield from range(count)
+    if fail:
+        raise ValueError(count)
+
+
+class TestReadahead(TestCase):
+    """Test cases for vse_sync_pp.source.readahead"""
+    @params(
+        (0, 1, 1),
+        (1000, 10, 3),
+        (1000, 1000, 256),
+        (5, 1000, 2),
+    )
+    def test_items(self, count, maxsize, batch):
+        """Test vse_sync_pp.source.readahead yields all items in order"""
+        self.assertEqual(list(readahead(numbers(count), maxsize, batch)), list(range(count)))
+
+    def test_raise(self):
+        """Test vse_sync_pp.source.readahead raises source exceptions after items"""
+        items = []
+        with self.assertRaises(ValueError):
+            for item in readahead(numbers(10, True), 4, 2):
+                items.append(item)
+        self.assertEqual(items, list(range(10)))
+
+    def test_ahead(self):
+        """Test vse_sync_pp.source.readahead reads ahead of consumer"""
+        produced = []
+
+        def source():
+            for item in range(100):
+                produced.append(item)
+                yield item
+        items = readahead(source(), 10, 5)
+        self.assertEqual(next(items), 0)
+        time.sleep(0.1)
+        # bounded by queue size, batch in hand and batch being filled
+        self.assertGreater(len(produced), 10)
+        self.assertLess(len(produced), 30)
+
+    def test_close(self):
+        """Test vse_sync_pp.source.readahead stops producer when closed"""
+        before = set(threading.enumerate())
+        items = readahead(numbers(100000), 10, 5)
+        next(items)
+        producers = set(threading.enumerate()) - before
+        self.assertEqual(len(producers), 1)
+        items.close()
+        time.sleep(0.3)
+        self.assertFalse(producers.pop().is_alive())
+
+
+class TestReadaheadProcess(TestCase):
+    """Test cases for vse_sync_pp.source.readahead_process"""
+    def test_items(self):
+        """Test vse_sync_pp.source.readahead_process yields all items in order"""
+        self.assertEqual(list(readahead_process(numbers, (1000,), 100, 7)), list(range(1000)))
+
+    def test_raise(self):
+        """Test vse_sync_pp.source.readahead_process raises source exceptions"""
+        with self.assertRaises(ValueError):
+            list(readahead_process(numbers, (10, True), 100))
+
+    def test_close(self):
+        """Test vse_sync_pp.source.readahead_process stops producer when closed"""
+        items = readahead_process(numbers, (1000000,), 10, 5)
+        next(items)
+        items.close()
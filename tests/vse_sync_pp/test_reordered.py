@@ -0,0 +1,63 @@
+### SPDX-License-Identifier: GPL-2.0-or-later
+
+"""Test cases for vse_sync_pp.source.reordered"""
+
+from collections import namedtuple
+from decimal import Decimal
+
+from unittest import TestCase
+from nose2.tools import params
+
+from vse_sync_pp.source import reordered
+
+Parsed = namedtuple('Parsed', ('timestamp', 'value'))
+
+
+def source(*timestamps):
+    """Generator yielding (id_, data) with `timestamps` in order"""
+    for (idx, timestamp) in enumerate(timestamps):
+        yield ('id', Parsed(Decimal(timestamp), idx))
+
+
+def timestamps(items):
+    """Return a list of the timestamps of (id_, data) `items` as strings"""
+    return [str(data.timestamp) for (_, data) in items]
+
+
+class TestReordered(TestCase):
+    """Test cases for vse_sync_pp.source.reordered"""
+    @params(
+        (None, None, ['1', '3', '2', '4']),
+        (1, None, ['1', '2', '3', '4']),
+        (0.5, None, ['1', '2', '3', '4']),
+        (None, 1, ['1', '2', '3', '4']),
+        (None, 2, ['1', '2', '3', '4']),
+        (None, 0, ['1', '3', '2', '4']),
+        (0.5, 1, ['1', '2', '3', '4']),
+    )
+    def test_reordered(self, window, count, expect):
+        """Test vse_sync_pp.source.reordered reorders within bounds"""
+        self.assertEqual(timestamps(reordered(source('1', '3', '2', '4'), window, count)), expect)
+
+    def test_late(self):
+        """Test vse_sync_pp.source.reordered yields late items out of order"""
+        items = reordered(source('1.0', '1.1', '1.2', '1.5', '1.25', '2.0', '1.4', '2.1'), window=0.3)
+        self.assertEqual(timestamps(items), ['1.0', '1.1', '1.2', '1.25', '1.5', '1.4', '2.0', '2.1'])
+        items = reordered(source('1', '2', '3', '4', '1.5', '5'), count=2)
+        self.assertEqual(timestamps(items), ['1', '2', '1.5', '3', '4', '5'])
+
+    def test_stable(self):
+        """Test vse_sync_pp.source.reordered keeps order of equal timestamps"""
+        items = list(reordered(source('2', '1', '2', '1'), count=3))
+        self.assertEqual([data.value for (_, data) in items], [1, 3, 0, 2])
+
+    def test_bounded(self):
+        """Test vse_sync_pp.source.reordered holds at most count items"""
+        consumed = []
+
+        def counted():
+            for item in source(*(str(idx) for idx in range(100))):
+                consumed.append(item)
+                yield item
+        for (idx, _) in enumerate(reordered(counted(), count=5)):
+            self.assertEqual(len(consumed), min(idx + 6, 100))
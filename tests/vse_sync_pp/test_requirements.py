@@ -5,8 +5,13 @@
 ### ensure values in REQUIREMENTS have to be changed in two places
 
 from unittest import TestCase
+from nose2.tools import params
 
-from vse_sync_pp.requirements import REQUIREMENTS
+from vse_sync_pp.requirements import (
+    REQUIREMENTS,
+    Mask,
+    compiled,
+)
 
 
 class TestRequirements(TestCase):
@@ -44,3 +49,51 @@ class TestRequirements(TestCase):
     def test_workload_RAN(self):
         """Test workload/RAN requirement values"""
         self.assertEqual(REQUIREMENTS['workload/RAN']['time-error-in-locked-mode/ns'], 100)
+
+
+class TestMask(TestCase):
+    """Test cases for vse_sync_pp.requirements.Mask"""
+    def test_requirements(self):
+        """Test vse_sync_pp.requirements.Mask matches every requirement function"""
+        for (name, requirements) in REQUIREMENTS.items():
+            for (key, value) in requirements.items():
+                if not isinstance(value, dict):
+                    self.assertIs(compiled(name)[key], value)
+                    continue
+                mask = compiled(name)[key]
+                self.assertIsInstance(mask, Mask)
+                for ((low, high), func) in value.items():
+                    start = 1 if low is None else low
+                    for tau in (start + (high - start) / 3, high):
+                        self.assertAlmostEqual(mask.limit(tau), func(tau))
+                self.assertIsNone(mask.limit(max(mask.highs) + 1))
+        self.assertIs(compiled('G.8272/PRTC-A'), compiled('G.8272/PRTC-A'))
+
+    def test_limit(self):
+        """Test vse_sync_pp.requirements.Mask.limit at range bounds"""
+        mask = Mask({
+            (20, 30): lambda t: 2 * t,
+            (10, 20): lambda t: 5,
+        })
+        self.assertEqual(mask.highs, [20, 30])
+        self.assertIsNone(mask.limit(5))
+        self.assertIsNone(mask.limit(10))
+        self.assertEqual(mask.limit(15), 5)
+        self.assertEqual(mask.limit(20), 5)
+        self.assertEqual(mask.limit(25), 50)
+        self.assertEqual(mask.limit(30), 60)
+        self.assertIsNone(mask.limit(31))
+
+    @params(
+        ({}, 'no ranges'),
+        ({(None, 273): lambda t: 1, (274, 1000): lambda t: 2}, 'gap between ranges at 273 and 274'),
+        ({(None, 273): lambda t: 1, (272, 1000): lambda t: 2}, 'overlap between ranges at 273 and 272'),
+        ({(None, 273): lambda t: 1, (None, 1000): lambda t: 2}, 'overlap between ranges at 273 and None'),
+        ({(10, 10): lambda t: 1}, 'empty range (10, 10)'),
+        ({(None, 100): lambda t: t * t}, 'function not linear over range (None, 100)'),
+    )
+    def test_invalid(self, ranges, reason):
+        """Test vse_sync_pp.requirements.Mask rejects invalid ranges"""
+        with self.assertRaises(ValueError) as ctx:
+            Mask(ranges)
+        self.assertEqual(str(ctx.exception), reason)
@@ -0,0 +1,95 @@
+### SPDX-License-Identifier: GPL-2.0-or-later
+
+"""Test cases for vse_sync_pp.sequence"""
+
+from tempfile import TemporaryDirectory
+
+from unittest import TestCase
+from nose2.tools import params
+
+from vse_sync_pp.generate import (
+    GENERATORS,
+    muxed as generate_muxed,
+)
+from vse_sync_pp.parsers import PARSERS
+from vse_sync_pp.sequence import (
+    build_sources,
+    sequenced,
+)
+
+from .test_batch import write
+
+
+def write_sources(dirname, count=100):
+    """Write log files and a sources file to `dirname`, return its file name"""
+    documents = []
+    for (idx, (id_, generate)) in enumerate(GENERATORS.items()):
+        content = ''.join(line + '\n' for line in generate(count, seed=idx, rate=idx + 1))
+        filename = write(dirname, f'source{idx}.log', content)
+        documents.append(f'---\nsource: {filename}\ncontains: {id_}\n')
+    return write(dirname, 'sources.yaml', ''.join(documents))
+
+
+class TestSequenced(TestCase):
+    """Test cases for vse_sync_pp.sequence.sequenced"""
+    @params(
+        (0, False, False),
+        (10, False, False),
+        (1000, False, False),
+        (10, True, False),
+        (10, True, True),
+    )
+    def test_sequenced(self, maxsize, processes, shared_memory):
+        """Test vse_sync_pp.sequence.sequenced sequences sources"""
+        with TemporaryDirectory() as tmpdir:
+            filename = write_sources(tmpdir)
+            items = list(sequenced(tuple(build_sources(
+                PARSERS, filename, maxsize=maxsize, processes=processes, shared_memory=shared_memory,
+            ))))
+        self.assertEqual(len(items), 100 * len(GENERATORS))
+        timestamps = [data.timestamp for (_, data) in items]
+        self.assertEqual(timestamps, sorted(timestamps))
+        for id_ in GENERATORS:
+            self.assertEqual(sum(1 for (item, _) in items if item == id_), 100)
+
+    @params(
+        ({'reorder-window/s': 3}, {}),
+        ({'reorder-count': 2}, {}),
+        ({}, {'window': 3}),
+        ({}, {'count': 2}),
+    )
+    def test_reordered(self, document, kwargs):
+        """Test vse_sync_pp.sequence.sequenced reorders sources"""
+        lines = list(GENERATORS['gnss/time-error'](50))
+        # swap adjacent pairs of lines
+        lines[0::2], lines[1::2] = lines[1::2], lines[0::2]
+        with TemporaryDirectory() as tmpdir:
+            filename = write(tmpdir, 'gnss.log', ''.join(line + '\n' for line in lines))
+            pairs = ''.join(f'{key}: {value}\n' for (key, value) in document.items())
+            sources = write(tmpdir, 'sources.yaml', f'source: {filename}\ncontains: gnss/time-error\n{pairs}')
+            items = list(sequenced(tuple(build_sources(PARSERS, sources, **kwargs))))
+        self.assertEqual([float(data.timestamp) for (_, data) in items], list(range(1000, 1050)))
+
+    @params(
+        ({'sort': True}, {}),
+        ({}, {'sort': True, 'run_size': 7}),
+    )
+    def test_sorted(self, document, kwargs):
+        """Test vse_sync_pp.sequence.sequenced sorts sources"""
+        lines = list(GENERATORS['gnss/time-error'](50))
+        lines.reverse()
+        with TemporaryDirectory() as tmpdir:
+            filename = write(tmpdir, 'gnss.log', ''.join(line + '\n' for line in lines))
+            pairs = ''.join(f'{key}: {value}\n' for (key, value) in document.items())
+            sources = write(tmpdir, 'sources.yaml', f'source: {filename}\ncontains: gnss/time-error\n{pairs}')
+            items = list(sequenced(tuple(build_sources(PARSERS, sources, tmpdir=tmpdir, **kwargs))))
+        self.assertEqual([float(data.timestamp) for (_, data) in items], list(range(1000, 1050)))
+
+    def test_passthrough(self):
+        """Test vse_sync_pp.sequence.sequenced passes multiplexed lines through"""
+        lines = list(generate_muxed(50))
+        with TemporaryDirectory() as tmpdir:
+            filename = write(tmpdir, 'muxed.json', ''.join(line + '\n' for line in lines))
+            sources = write(tmpdir, 'sources.yaml', f'source: {filename}\ncontains: muxed\n')
+            items = list(sequenced(tuple(build_sources(PARSERS, sources, passthrough=True))))
+        self.assertEqual([data.line for (_, data) in items], lines)
@@ -0,0 +1,153 @@
+### SPDX-License-Identifier: GPL-2.0-or-later
+
+"""Test cases for vse_sync_pp.shm"""
+
+import os
+from collections import namedtuple
+from decimal import Decimal
+from io import StringIO
+
+from unittest import TestCase
+from nose2.tools import params
+
+import numpy as np
+
+from vse_sync_pp.generate import muxed
+from vse_sync_pp.parsers import PARSERS
+from vse_sync_pp.shm import (
+    Block,
+    as_float,
+    encode,
+    handoff,
+    handoff_blocks,
+)
+from vse_sync_pp.source import muxed as source_muxed
+
+Data = namedtuple('Data', ('timestamp', 'value', 'state', 'extra'))
+Other = namedtuple('Other', ('timestamp', 'offset'))
+
+ITEMS = (
+    ('alpha', Data(Decimal('1.5'), 3, 's2', None)),
+    ('beta', Other(1.75, Decimal('-12'))),
+    ('alpha', Data(Decimal('2.25'), -4, 's0', [1])),
+    ('alpha', Data(Decimal('3'), 5, 's2', None)),
+    ('beta', Other(4.0, Decimal('7E+3'))),
+)
+
+
+def muxed_items(count, fail=False):
+    """Generator yielding `count` items of multiplexed content then, if `fail`, raising"""
+    parsers = {id_: cls() for (id_, cls) in PARSERS.items()}
+    yield from source_muxed(StringIO(''.join(line + '\n' for line in muxed(count))), parsers)
+    if fail:
+        raise ValueError(count)
+
+
+def many_ids(count):
+    """Generator yielding items of `count` distinct ids"""
+    for idx in range(count):
+        yield (f'id{idx}', Other(float(idx), idx))
+
+
+def shm_names():
+    """Return the set of names of blocks of shared memory in this system"""
+    try:
+        return set(os.listdir('/dev/shm'))
+    except OSError:
+        return set()
+
+
+class TestEncode(TestCase):
+    """Test cases for vse_sync_pp.shm.encode"""
+    @params(
+        (ITEMS,),
+        ((('alpha', Data(Decimal('NaN'), 2 ** 70, 'x', 1)), ('alpha', Data(Decimal(1), 1, 'y', 2.5))),),
+        (tuple(muxed_items(200)),),
+        ((('beta', Other(1.0, Decimal('-0.0'))), ('beta', Other(-0.0, Decimal('2.5')))),),
+    )
+    def test_items(self, items):
+        """Test vse_sync_pp.shm.Block.items returns items encoded"""
+        with Block(encode(items)) as block:
+            self.assertEqual(len(block), len(items))
+            self.assertEqual(block.items(), list(items))
+
+    def test_columns(self):
+        """Test vse_sync_pp.shm.Block.columns maps typed columns"""
+        with Block(encode(ITEMS)) as block:
+            self.assertEqual(block.codes().tolist(), [0, 1, 0, 0, 1])
+            self.assertEqual(block.columns('gamma'), {})
+            columns = block.columns('alpha')
+            self.assertEqual(tuple(columns), Data._fields)
+            self.assertEqual(as_float(columns['timestamp']).tolist(), [1.5, 2.25, 3.0])
+            self.assertEqual(columns['value'].dtype, np.int64)
+            self.assertEqual(columns['value'].tolist(), [3, -4, 5])
+            (codes, categories) = columns['state']
+            self.assertEqual([categories[code] for code in codes], ['s2', 's0', 's2'])
+            self.assertEqual(columns['extra'], (None, [1], None))
+            columns = block.columns('beta')
+            self.assertEqual(columns['timestamp'].dtype, np.float64)
+            self.assertEqual(as_float(columns['offset']).tolist(), [-12.0, 7000.0])
+            del (codes, columns)
+
+    def test_negative_zero(self):
+        """Test vse_sync_pp.shm.Block.items keeps the sign of zero"""
+        items = (('beta', Other(-0.0, Decimal('-0.0'))), ('beta', Other(0.0, Decimal('-0E+2'))))
+        with Block(encode(items)) as block:
+            self.assertEqual([str(data.offset) for (_, data) in block.items()], ['-0.0', '-0E+2'])
+            self.assertEqual([str(data.timestamp) for (_, data) in block.items()], ['-0.0', '0.0'])
+
+    def test_close(self):
+        """Test vse_sync_pp.shm.Block.close releases shared memory"""
+        before = shm_names()
+        chunk = encode(ITEMS)
+        block = Block(chunk)
+        block.close()
+        block.close()
+        self.assertEqual(shm_names(), before)
+
+
+class TestHandoff(TestCase):
+    """Test cases for vse_sync_pp.shm.handoff"""
+    @params(
+        (0, 100, 10),
+        (1000, 100, 64),
+        (1000, 4096, 4096),
+    )
+    def test_items(self, count, maxsize, chunk):
+        """Test vse_sync_pp.shm.handoff yields all items in order"""
+        before = shm_names()
+        self.assertEqual(list(handoff(muxed_items, (count,), maxsize, chunk)), list(muxed_items(count)))
+        self.assertEqual(shm_names(), before)
+
+    def test_blocks(self):
+        """Test vse_sync_pp.shm.handoff_blocks yields full chunks"""
+        sizes = [len(block) for block in handoff_blocks(muxed_items, (1000,), 1000, 300)]
+        self.assertEqual(sizes, [300, 300, 300, 100])
+
+    def test_raise(self):
+        """Test vse_sync_pp.shm.handoff raises source exceptions after items"""
+        items = []
+        with self.assertRaises(ValueError):
+            for item in handoff(muxed_items, (100, True), 100, 30):
+                items.append(item)
+        self.assertEqual(items, list(muxed_items(100)))
+
+    @params(
+        (200, 4096),
+        (200, 150),
+    )
+    def test_encode_error(self, count, chunk):
+        """Test vse_sync_pp.shm.handoff raises errors encoding chunks"""
+        before = shm_names()
+        with self.assertRaises(ValueError) as ctx:
+            list(handoff(many_ids, (count,), 1000, chunk))
+        self.assertEqual(str(ctx.exception), f'too many ids in a chunk: {min(count, chunk)}')
+        self.assertEqual(shm_names(), before)
+
+    def test_close(self):
+        """Test vse_sync_pp.shm.handoff releases shared memory when closed"""
+        before = shm_names()
+        items = handoff(muxed_items, (100000,), 100, 10)
+        next(items)
+        items.close()
+        self.assertEqual(shm_names(), before)
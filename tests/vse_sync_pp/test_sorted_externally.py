@@ -0,0 +1,58 @@
+### SPDX-License-Identifier: GPL-2.0-or-later
+
+"""Test cases for vse_sync_pp.source.sorted_externally"""
+
+import os
+import random
+from tempfile import TemporaryDirectory
+
+from unittest import TestCase
+from nose2.tools import params
+
+from vse_sync_pp.parsers.gnss import TimeErrorParser
+from vse_sync_pp.source import sorted_externally
+
+
+def source(count, seed=0):
+    """Return a list of `count` (id_, data) in random timestamp order.
+
+    Each timestamp occurs twice; data values are in list order.
+    """
+    timestamps = [idx // 2 for idx in range(count)]
+    random.Random(seed).shuffle(timestamps)
+    return [
+        (TimeErrorParser.id_, TimeErrorParser.parsed(timestamp, 5, idx))
+        for (idx, timestamp) in enumerate(timestamps)
+    ]
+
+
+class TestSortedExternally(TestCase):
+    """Test cases for vse_sync_pp.source.sorted_externally"""
+    @params(
+        (0, 10, 2),
+        (5, 10, 2),
+        (100, 1000, 2),
+        (100, 10, 64),
+        (1000, 10, 2),
+        (1000, 7, 3),
+    )
+    def test_sorted(self, count, run_size, fan_in):
+        """Test vse_sync_pp.source.sorted_externally sorts stably"""
+        items = source(count)
+        with TemporaryDirectory() as tmpdir:
+            self.assertEqual(
+                list(sorted_externally(iter(items), run_size, tmpdir, fan_in)),
+                sorted(items, key=lambda item: item[1].timestamp),
+            )
+            self.assertEqual(os.listdir(tmpdir), [])
+
+    def test_bounded(self):
+        """Test vse_sync_pp.source.sorted_externally spills runs to files"""
+        with TemporaryDirectory() as tmpdir:
+            items = sorted_externally(iter(source(1000)), 100, tmpdir, 4)
+            next(items)
+            (sortdir,) = os.listdir(tmpdir)
+            # 10 runs merged 4 at a time into 3 runs, one partly read
+            self.assertEqual(len(os.listdir(os.path.join(tmpdir, sortdir))), 3)
+            items.close()
+            self.assertEqual(os.listdir(tmpdir), [])
@@ -0,0 +1,194 @@
+### SPDX-License-Identifier: GPL-2.0-or-later
+
+"""Test cases for vse_sync_pp.stats"""
+
+import math
+from decimal import Decimal
+
+from unittest import TestCase
+from nose2.tools import params
+
+import numpy as np
+
+from vse_sync_pp.stats import (
+    BLOCK_SIZE,
+    Histogram,
+    Summary,
+    Windows,
+)
+
+
+class TestSummary(TestCase):
+    """Test cases for vse_sync_pp.stats.Summary"""
+    def assertMatches(self, summary, values):
+        """Assert `summary` matches numpy statistics of `values`"""
+        arr = np.array(values, dtype=float)
+        self.assertEqual(summary.count, len(arr))
+        self.assertEqual(summary.min, arr.min())
+        self.assertEqual(summary.max, arr.max())
+        self.assertEqual(summary.range, arr.max() - arr.min())
+        self.assertAlmostEqual(summary.mean, arr.mean())
+        self.assertAlmostEqual(summary.variance(), arr.var(ddof=1))
+        self.assertAlmostEqual(summary.stddev(), arr.std(ddof=1))
+        self.assertAlmostEqual(summary.variance(0), arr.var())
+        self.assertAlmostEqual(summary.stddev(0), arr.std())
+
+    def test_empty(self):
+        """Test vse_sync_pp.stats.Summary of no values"""
+        summary = Summary()
+        self.assertEqual(summary.count, 0)
+        self.assertTrue(math.isnan(summary.min))
+        self.assertTrue(math.isnan(summary.max))
+        self.assertTrue(math.isnan(summary.mean))
+        self.assertTrue(math.isnan(summary.variance()))
+
+    def test_single(self):
+        """Test vse_sync_pp.stats.Summary of a single value"""
+        summary = Summary([Decimal('1.5')])
+        self.assertEqual(summary.min, 1.5)
+        self.assertEqual(summary.max, 1.5)
+        self.assertEqual(summary.mean, 1.5)
+        self.assertEqual(summary.variance(0), 0)
+        self.assertTrue(math.isnan(summary.variance()))
+
+    def test_blocks(self):
+        """Test vse_sync_pp.stats.Summary over multiple blocks"""
+        rng = np.random.default_rng(7)
+        values = rng.normal(1e6, 25, 3 * BLOCK_SIZE + 17).round()
+        self.assertMatches(Summary(values), values)
+
+    def test_merge(self):
+        """Test vse_sync_pp.stats.Summary merge of disjoint values"""
+        rng = np.random.default_rng(11)
+        values = rng.integers(-100, 100, 1000)
+        summary = Summary(values[:123]).merge(Summary(values[123:]))
+        self.assertMatches(summary, values)
+        # merging into or from an empty summary
+        self.assertMatches(Summary().merge(Summary(values)), values)
+        self.assertMatches(Summary(values).merge(Summary()), values)
+
+    @params(
+        ([3, -17, 5], int),
+        (np.array([3, -17, 5]), int),
+        ([Decimal('3.5'), Decimal('-17'), Decimal('5')], Decimal),
+        ([3.5, -17.0, 5.0], float),
+    )
+    def test_extremes(self, values, cls):
+        """Test vse_sync_pp.stats.Summary keeps extremes as sample values"""
+        summary = Summary(values)
+        self.assertEqual((summary.min, summary.max, summary.range), (-17, 5, 22))
+        self.assertEqual({type(summary.min), type(summary.max), type(summary.range)}, {cls})
+
+
+class TestHistogram(TestCase):
+    """Test cases for vse_sync_pp.stats.Histogram"""
+    def test_bins(self):
+        """Test vse_sync_pp.stats.Histogram bins"""
+        histogram = Histogram([-3, -3, 0, 1, 1, 1, 7])
+        self.assertEqual(histogram.count, 7)
+        self.assertEqual(histogram.bins(), [(-3, 2), (0, 1), (1, 3), (7, 1)])
+        histogram = Histogram([-3, -3, 0, 1, 1, 1, 7], width=2)
+        self.assertEqual(histogram.bins(), [(-4, 2), (0, 4), (6, 1)])
+
+    def test_percentiles(self):
+        """Test vse_sync_pp.stats.Histogram percentiles of integer values"""
+        rng = np.random.default_rng(3)
+        values = rng.integers(-50, 50, 10000)
+        pcts = (0, 50, 95, 99, 99.9, 100)
+        histogram = Histogram(values)
+        for (actual, expected) in zip(histogram.percentiles(pcts), np.percentile(values, pcts)):
+            self.assertAlmostEqual(actual, expected)
+        for (actual, expected) in zip(
+            histogram.percentiles(pcts, absolute=True),
+            np.percentile(np.abs(values), pcts),
+        ):
+            self.assertAlmostEqual(actual, expected)
+
+    def test_empty(self):
+        """Test vse_sync_pp.stats.Histogram percentiles of no values"""
+        histogram = Histogram()
+        self.assertEqual(histogram.bins(), [])
+        self.assertTrue(all(math.isnan(val) for val in histogram.percentiles((50, 99))))
+
+    def test_bounded(self):
+        """Test vse_sync_pp.stats.Histogram bins are bounded"""
+        histogram = Histogram(range(1000), max_bins=100)
+        self.assertEqual(histogram.width, 16)
+        self.assertLessEqual(len(histogram.bins()), 100)
+        self.assertEqual(histogram.count, 1000)
+        self.assertEqual(histogram.bins()[0], (0, 16))
+
+    def test_merge(self):
+        """Test vse_sync_pp.stats.Histogram merge of disjoint values"""
+        rng = np.random.default_rng(5)
+        values = rng.integers(-1000, 1000, 5000)
+        merged = Histogram(values[:2000], max_bins=256).merge(Histogram(values[2000:]))
+        whole = Histogram(values, max_bins=256)
+        self.assertEqual(merged.width, whole.width)
+        self.assertEqual(merged.bins(), whole.bins())
+        self.assertEqual(
+            Histogram(values[:10]).merge(Histogram(values[10:], width=4)).bins(),
+            Histogram(values, width=4).bins(),
+        )
+        with self.assertRaises(ValueError):
+            Histogram(width=1).merge(Histogram(width=3))
+
+
+class TestWindows(TestCase):
+    """Test cases for vse_sync_pp.stats.Windows"""
+    def test_windows(self):
+        """Test vse_sync_pp.stats.Windows statistics per window"""
+        timestamps = [Decimal(val) for val in ('0', '0.5', '1', '9.9', '10', '25')]
+        windows = Windows(timestamps, [1, -2, 3, 4, 6, 0], 10, [False, True, False, False, False, False])
+        self.assertEqual(windows.windows(), [
+            (0, 4, -2, 4, 1.5, 1),
+            (10, 1, 6, 6, 6, 0),
+            (20, 1, 0, 0, 0, 0),
+        ])
+        self.assertEqual(Windows().windows(), [])
+
+    def test_blocks(self):
+        """Test vse_sync_pp.stats.Windows reduces values in blocks"""
+        count = BLOCK_SIZE * 2 + 3
+        values = np.arange(count, dtype=np.float64)
+        windows = Windows(values, values, BLOCK_SIZE, values % 2)
+        self.assertEqual(windows.windows()[1], (
+            BLOCK_SIZE, BLOCK_SIZE,
+            BLOCK_SIZE, 2 * BLOCK_SIZE - 1, BLOCK_SIZE + (BLOCK_SIZE - 1) / 2,
+            BLOCK_SIZE // 2,
+        ))
+        self.assertEqual(windows.windows()[2][1], 3)
+
+    def test_spanning(self):
+        """Test vse_sync_pp.stats.Windows combines windows spanning blocks"""
+        count = BLOCK_SIZE * 3
+        values = np.arange(count, dtype=np.float64)
+        # each window spans the boundary of a block of values
+        windows = Windows(values + BLOCK_SIZE // 2, values, BLOCK_SIZE)
+        self.assertEqual([window[:4] for window in windows.windows()], [
+            (0, BLOCK_SIZE // 2, 0, BLOCK_SIZE // 2 - 1),
+            (BLOCK_SIZE, BLOCK_SIZE, BLOCK_SIZE // 2, 3 * BLOCK_SIZE // 2 - 1),
+            (2 * BLOCK_SIZE, BLOCK_SIZE, 3 * BLOCK_SIZE // 2, 5 * BLOCK_SIZE // 2 - 1),
+            (3 * BLOCK_SIZE, BLOCK_SIZE // 2, 5 * BLOCK_SIZE // 2, count - 1),
+        ])
+
+    def test_merge(self):
+        """Test vse_sync_pp.stats.Windows merge of disjoint values"""
+        rng = np.random.default_rng(7)
+        timestamps = np.sort(rng.uniform(0, 1000, 5000))
+        values = rng.normal(0, 10, 5000)
+        flags = rng.random(5000) < 0.01
+        whole = Windows(timestamps, values, 60, flags)
+        merged = Windows(timestamps[:2000], values[:2000], 60, flags[:2000])
+        merged.merge(Windows(timestamps[2000:], values[2000:], 60, flags[2000:]))
+        self.assertEqual(len(merged.windows()), 17)
+        for (actual, expected) in zip(merged.windows(), whole.windows()):
+            self.assertEqual(actual[:4], expected[:4])
+            self.assertAlmostEqual(actual[4], expected[4])
+            self.assertEqual(actual[5], expected[5])
+        # windows of unordered values are combined
+        unordered = Windows(timestamps[2000:], values[2000:], 60, flags[2000:])
+        unordered.merge(Windows(timestamps[:2000], values[:2000], 60, flags[:2000]))
+        self.assertEqual([window[:4] for window in unordered.windows()], [window[:4] for window in whole.windows()])
+        with self.assertRaises(ValueError):
+            Windows(width=1).merge(Windows(width=2))